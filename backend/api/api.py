@@ -1,11 +1,38 @@
-from fastapi import FastAPI, HTTPException
+import os
+import json
+import gzip
+from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, HTTPException, Body, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 
-from backend.controllers.tweet_analyzer_controller import TweetAnalyzerController
+from backend.controllers.tweet_analyzer_controller import TweetAnalyzerController, analyze_tweet_job, warm_up_worker, \
+    TREE_FORMAT, COLUMNS_FORMAT, OUTPUT_FORMATS
+from backend.services.conversation_tracker_service import ConversationTracker
+from backend.services.tweet_tree_builder_service import TweetTreeBuilder
+from backend.services.tweet_tree_view_service import SORT_KEYS, ACCEPTABILITY_SORT, DEFAULT_DEPTH, DEFAULT_LIMIT, \
+    MAX_DEPTH, MAX_LIMIT
+from backend.services.utils.json_encoder import encode_json
+from backend.services.utils.model_registry import model_registry
+from backend.services.utils.inference_cache import get_inference_cache_stats
+from backend.services.utils.rate_limit_scheduler import twitter_rate_limit_scheduler
+from backend.services.utils.pipeline import pipeline_stats
+from backend.services.utils.job_queue import JobQueue, FAILED
 
 # Create the API and handle CORS middleware config
 app = FastAPI()
 controller = TweetAnalyzerController()
+tracker = ConversationTracker()
+# Analyses submitted as jobs run on a pool of ANALYSIS_WORKERS worker processes, each keeping the models loaded. With
+# 0 workers they run on a thread of the API process instead, which then keeps the only copy of the models
+analysis_workers = int(os.getenv("ANALYSIS_WORKERS", 2))
+# Most tweets a single bulk analysis request accepts, set with the BULK_MAX_TWEETS environment variable
+bulk_max_tweets = int(os.getenv("BULK_MAX_TWEETS", 10000))
+analysis_jobs = JobQueue(analyze_tweet_job, max_workers=analysis_workers or None, initializer=warm_up_worker,
+                         executor=ThreadPoolExecutor(1) if analysis_workers == 0 else None)
+# Media type of the analyses encoded as columns, which the clients can ask for in their Accept header
+COLUMNS_MEDIA_TYPE = "application/vnd.tweet-tree.columns+json"
 origins = [
     "http://localhost:3000",
     "localhost:3000"
@@ -20,6 +47,30 @@ app.add_middleware(
 )
 
 
+startup_report = {"warm_up_seconds": None}
+
+
+@app.on_event("startup")
+def warm_up_models():
+    """
+    Loads every model once when the worker starts so the first request does not pay for it. Set WARM_UP_MODELS to
+    false to keep loading the models lazily on first use instead. The models are loaded even when the analysis jobs
+    run on worker processes, as the synchronous analysis, streaming, bulk, view and tracking endpoints run in the API
+    process.
+    """
+    if os.getenv("WARM_UP_MODELS", "true").lower() == "true":
+        startup_report["warm_up_seconds"] = model_registry.warm_up()
+
+
+@app.on_event("shutdown")
+def stop_background_work():
+    """
+    Stops polling the tracked conversations and the analysis worker processes when the worker stops
+    """
+    tracker.stop()
+    analysis_jobs.shutdown()
+
+
 @app.get("/api/health", tags=["health"])
 async def health_check() -> dict:
     """
@@ -28,14 +79,225 @@ async def health_check() -> dict:
     return {"response": "API is up and running!"}
 
 
+@app.get("/api/health/startup", tags=["health"])
+async def startup_timing() -> dict:
+    """
+    :return: seconds spent warming up the models at startup and loading each model
+    """
+    return {"response": {**startup_report, "models": model_registry.get_load_times()}}
+
+
+@app.get("/api/metrics", tags=["health"])
+async def metrics() -> dict:
+    """
+    :return: runtime counters of the analysis pipeline, e.g. the inference cache hits and misses of each model, the
+             Twitter API rate limit quota and wait times, the number of analyses computed, coalesced or kept, the
+             number of analysis jobs in each state, the throughput and queue depth of the tweet tree pipeline stages
+             and the related tweets pruned before the relation model
+    """
+    return {"response": {"inference_cache": get_inference_cache_stats(),
+                         "analyses": controller.get_stats(),
+                         "analysis_views": controller.views.get_stats(),
+                         "twitter_rate_limit": twitter_rate_limit_scheduler.get_stats(),
+                         "analysis_jobs": analysis_jobs.get_stats(),
+                         "tweet_tree_pipeline": pipeline_stats.get_stats(),
+                         "related_prefilter": TweetTreeBuilder.relation_prefilter_service.get_stats()}}
+
+
 @app.get("/api/analyze/{tweet_id}", tags=["analyze"])
-def tweet_analyzer(tweet_id: int) -> dict:
+def tweet_analyzer(tweet_id: int, request: Request,
+                   output_format: Optional[str] = Query(None, alias="format")) -> Response:
+    """
+    :param tweet_id:        the tweet ID to compute the analysis on
+    :param request:         the request, its Accept header selects the columnar format with COLUMNS_MEDIA_TYPE and its
+                            Accept-Encoding header the gzip compression of the columnar format
+    :param output_format:   "tree" for the nested tweet tree, the default, or "columns" for the tweet tree as parallel
+                            columns
+    :return:                argumentation model and analysis of the input tweet
+    """
+    if output_format is None:
+        output_format = COLUMNS_FORMAT if COLUMNS_MEDIA_TYPE in request.headers.get("accept", "") else TREE_FORMAT
+    if output_format not in OUTPUT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"The format must be one of: {', '.join(OUTPUT_FORMATS)}.")
+
+    try:
+        response = controller.analyze_tweet(tweet_id, encoded=True, output_format=output_format)
+    except:
+        raise HTTPException(status_code=500,
+                            detail="Oops! Something went wrong while processing your request. Make sure the Tweet ID "
+                                   "passed is valid and try again later.")
+
+    # The analysis is already encoded, so it is sent as it is rather than encoded again by FastAPI
+    content = b'{"response":' + response + b"}"
+    if output_format == TREE_FORMAT:
+        return Response(content=content, media_type="application/json")
+
+    # The columns of large tweet trees are worth compressing, the nested tree is left as it was
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(content=gzip.compress(content), media_type=COLUMNS_MEDIA_TYPE,
+                        headers={"Content-Encoding": "gzip", "Vary": "Accept, Accept-Encoding"})
+
+    return Response(content=content, media_type=COLUMNS_MEDIA_TYPE, headers={"Vary": "Accept, Accept-Encoding"})
+
+
+def _get_analysis_view(tweet_id, sort_by):
+    # The analysis is computed once, then kept so its views and pages do not compute it again
+    if sort_by not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"The sort must be one of: {', '.join(SORT_KEYS)}.")
+
+    try:
+        return controller.get_analysis_view(tweet_id)
+    except:
+        raise HTTPException(status_code=500,
+                            detail="Oops! Something went wrong while processing your request. Make sure the Tweet ID "
+                                   "passed is valid and try again later.")
+
+
+@app.get("/api/analyze/{tweet_id}/view", tags=["analyze"])
+def tweet_analyzer_view(tweet_id: int, depth: int = Query(DEFAULT_DEPTH, ge=0, le=MAX_DEPTH),
+                        limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+                        sort_by: str = Query(ACCEPTABILITY_SORT, alias="sort")) -> Response:
+    """
+    :param tweet_id:    the tweet ID to compute the analysis on
+    :param depth:       number of levels of replies listed below the root tweet
+    :param limit:       number of children listed for each tweet, the next ones are paged through with the
+                        next_cursor of the tweet
+    :param sort_by:     order of the children, "acceptability", "engagement" or "time"
+    :return:            argumentation model of the input tweet down to depth, with the top children of each tweet,
+                        and its analysis
+    """
+    view = _get_analysis_view(tweet_id, sort_by)
+
+    return Response(content=encode_json({"response": view.get_view(depth, limit, sort_by)}),
+                    media_type="application/json")
+
+
+@app.get("/api/analyze/{tweet_id}/view/{node_id}/children", tags=["analyze"])
+def tweet_analyzer_view_children(tweet_id: int, node_id: str, cursor: Optional[str] = None,
+                                 depth: int = Query(0, ge=0, le=MAX_DEPTH),
+                                 limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+                                 sort_by: str = Query(ACCEPTABILITY_SORT, alias="sort")) -> Response:
+    """
+    :param tweet_id:    the tweet ID the analysis was computed on
+    :param node_id:     the tweet ID of a tweet of its tweet tree
+    :param cursor:      the next_cursor of the previous page, none for the first page
+    :param depth:       number of levels of replies listed below each child
+    :param limit:       number of children of the page, and of each child listed below them
+    :param sort_by:     order of the children, the one of the cursor
+    :return:            a page of the children of the tweet, with the cursor of the next page
     """
+    view = _get_analysis_view(tweet_id, sort_by)
+
+    try:
+        page = view.get_children(node_id, cursor, depth, limit, sort_by)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="This Tweet ID is not in the tweet tree.")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="The cursor is invalid for this sort.")
+
+    return Response(content=encode_json({"response": page}), media_type="application/json")
+
+
+def _server_sent_events(events):
+    # Format each event as a server-sent event, an error is sent as the last event as the response already started
+    try:
+        for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    except Exception:
+        detail = ("Oops! Something went wrong while processing your request. Make sure the Tweet ID passed is valid "
+                  "and try again later.")
+        yield f"event: error\ndata: {json.dumps({'detail': detail})}\n\n"
+
+
+@app.get("/api/analyze/{tweet_id}/stream", tags=["analyze"])
+def tweet_analyzer_stream(tweet_id: int) -> StreamingResponse:
+    """
+    Streams the analysis as server-sent events: a root event with the root tweet, conversation events with each
+    level of its replies, related events with each related conversation, each with the metrics so far, then a model
+    event with the argumentation model and analysis, or an error event
+
+    :param tweet_id:    the tweet ID to compute the analysis on
+    :return:            text/event-stream of the analysis of the input tweet
+    """
+    return StreamingResponse(_server_sent_events(controller.stream_analysis(tweet_id)),
+                             media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+def _bulk_analysis_lines(results):
+    # One JSON object per line and tweet, a failed analysis does not stop the others
+    for tweet_id, analysis, error in results:
+        if error is None:
+            line = {"tweet_id": tweet_id, "response": analysis}
+        else:
+            line = {"tweet_id": tweet_id, "error": "Oops! Something went wrong while processing this tweet. Make sure "
+                                                   "the Tweet ID passed is valid and try again later."}
+        yield json.dumps(line) + "\n"
+
+
+@app.post("/api/analyze/bulk", tags=["analyze"])
+def tweet_analyzer_bulk(tweet_ids: List[int] = Body(...)) -> StreamingResponse:
+    """
+    Analyses many tweets at once, their conversations are fetched concurrently and their replies classified together
+
+    :param tweet_ids:   JSON list of the tweet IDs to compute the analysis on
+    :return:            newline-delimited JSON with the argumentation model and analysis of each input tweet, in order
+    """
+    if len(tweet_ids) > bulk_max_tweets:
+        raise HTTPException(status_code=400, detail=f"At most {bulk_max_tweets} Tweet IDs can be analysed at once.")
+
+    return StreamingResponse(_bulk_analysis_lines(controller.analyze_tweets(tweet_ids)),
+                             media_type="application/x-ndjson")
+
+
+def _job_response(status):
+    # Report failed analyses with the same message as the synchronous endpoint
+    response = {"job_id": status["job_id"], "tweet_id": status["key"], "status": status["status"],
+                "submitted_at": status["submitted_at"], "finished_at": status["finished_at"]}
+    if "result" in status:
+        response["result"] = status["result"]
+    if status["status"] == FAILED:
+        response["error"] = ("Oops! Something went wrong while processing your request. Make sure the Tweet ID passed "
+                             "is valid and try again later.")
+
+    return response
+
+
+@app.post("/api/jobs/analyze/{tweet_id}", tags=["analyze"], status_code=202)
+def submit_tweet_analysis(tweet_id: int) -> dict:
+    """
+    Submits the analysis of a tweet to the analysis workers, the analysis already running for the same tweet is
+    returned instead of starting another one
+
     :param tweet_id:    the tweet ID to compute the analysis on
+    :return:            status of the analysis job, poll /api/jobs/{job_id} for its result
+    """
+    return {"response": _job_response(analysis_jobs.submit(tweet_id, tweet_id))}
+
+
+@app.get("/api/jobs/{job_id}", tags=["analyze"])
+def tweet_analysis_job(job_id: str) -> dict:
+    """
+    :param job_id:  the job ID returned when the analysis was submitted
+    :return:        status of the analysis job, with the argumentation model and analysis of the tweet once it is done
+    """
+    status = analysis_jobs.get_status(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="This job ID is unknown or has expired.")
+
+    return {"response": _job_response(status)}
+
+
+@app.post("/api/track/{tweet_id}", tags=["track"])
+def track_tweet(tweet_id: int) -> dict:
+    """
+    Starts tracking a tweet, its conversations are then polled for new replies in the background
+
+    :param tweet_id:    the tweet ID to track
     :return:            argumentation model and analysis of the input tweet
     """
     try:
-        response = controller.analyze_tweet(tweet_id)
+        response = tracker.track(tweet_id)
+        tracker.start()
 
         return {"response": response}
     except:
@@ -43,3 +305,27 @@ def tweet_analyzer(tweet_id: int) -> dict:
                             detail="Oops! Something went wrong while processing your request. Make sure the Tweet ID "
                                    "passed is valid and try again later.")
 
+
+@app.get("/api/track/{tweet_id}", tags=["track"])
+def tracked_tweet(tweet_id: int) -> dict:
+    """
+    :param tweet_id:    the tracked tweet ID
+    :return:            latest argumentation model and analysis of the tracked tweet, and its tracking status
+    """
+    model = tracker.get_model(tweet_id)
+    if model is None:
+        raise HTTPException(status_code=404, detail="This Tweet ID is not tracked.")
+
+    return {"response": {**model, "tracking": tracker.get_status(tweet_id)}}
+
+
+@app.delete("/api/track/{tweet_id}", tags=["track"])
+def untrack_tweet(tweet_id: int) -> dict:
+    """
+    :param tweet_id:    the tracked tweet ID to stop tracking
+    :return:            confirmation that the tweet is no longer tracked
+    """
+    if not tracker.untrack(tweet_id):
+        raise HTTPException(status_code=404, detail="This Tweet ID is not tracked.")
+
+    return {"response": "Tweet is no longer tracked."}
@@ -0,0 +1,133 @@
+import time
+import random
+import argparse
+import networkx as nx
+
+from backend.services.argumentation_service import ArgumentationAlgorithmService
+from backend.services.vectorized_argumentation_service import VectorizedArgumentationService
+from backend.services.tweet_tree_builder_service import TweetTreeMetrics
+
+
+def generate_tweet_tree(number_of_nodes, depth, seed=0):
+    """
+    Generates a synthetic tweet tree shaped like the TweetTree: a reply chain of the given depth below the root, with
+    the remaining tweets replying to random earlier tweets. Every reply is an argument, as non-argumentative tweets
+    cut their whole subtree out of the evaluation
+
+    :param number_of_nodes: number of tweets in the tree, including the root
+    :param depth:           length of the longest reply chain, at most number_of_nodes - 1
+    :param seed:            random seed of the shape and attributes of the tree
+    :return:                the tree, its root id, and the min and max public metrics of its tweets
+    """
+    generator = random.Random(seed)
+    tree = nx.DiGraph()
+    tree.add_node(0, attributes={"id": 0, "like_count": 0, "retweet_count": 0, "argumentative_type": "none"})
+
+    scores = []
+    for tweet_id in range(1, number_of_nodes):
+        parent_id = tweet_id - 1 if tweet_id <= depth else generator.randrange(tweet_id)
+        attributes = {"id": tweet_id, "like_count": generator.randint(0, 100),
+                      "retweet_count": generator.randint(0, 20),
+                      "argumentative_type": generator.choice(["support", "attack"])}
+        tree.add_node(tweet_id, attributes=attributes)
+        tree.add_edge(parent_id, tweet_id)
+        scores.append(attributes["like_count"] + attributes["retweet_count"])
+
+    return tree, 0, min(scores, default=0), max(scores, default=1)
+
+
+def recursive_acceptability_degree(service, tweet):
+    """
+    The previous, recursive, evaluation of the EBS acceptability degree, kept as the benchmark baseline
+    """
+    if tweet is None or tweet["attributes"]["argumentative_type"] == "neutral":
+        return 0.0
+
+    supporters_score = 0.0
+    attackers_score = 0.0
+
+    for child_tweet_id in service.tweet_tree.successors(tweet["attributes"]["id"]):
+        child_tweet = service.tweet_tree.nodes[child_tweet_id]
+        score = recursive_acceptability_degree(service, child_tweet)
+
+        if child_tweet["attributes"]["argumentative_type"] == "support":
+            supporters_score += score
+        else:
+            attackers_score += score
+
+    strength_child = supporters_score - attackers_score
+    degree = 1 - (
+            (1 - service._base_strength(tweet) ** 2) / (1 + (service._base_strength(tweet) * (2 ** strength_child))))
+    tweet["attributes"]["acceptability"] = degree
+
+    service.tweet_tree_metrics.set_strongest_argument_id(tweet["attributes"]["id"], degree)
+
+    return degree
+
+
+def _time(function):
+    start = time.perf_counter()
+    try:
+        result = function()
+    except RecursionError:
+        return None, None
+
+    return time.perf_counter() - start, result
+
+
+def argumentation_benchmark(sizes, depths, seed=0):
+    """
+    Times the recursive, iterative and vectorized EBS evaluations on synthetic tweet trees. The vectorized time
+    includes converting the tree to arrays and storing the degrees back in it, the time of the evaluation of the
+    arrays alone is reported separately.
+
+    :param sizes:   numbers of tweets of the trees
+    :param depths:  depths of the trees, combined with every size they do not exceed
+    :param seed:    random seed of the trees
+    :return:        list of the results of each tree, the recursive time is None where it hit the recursion limit
+    """
+    results = []
+    for size in sizes:
+        for depth in depths:
+            if depth >= size:
+                continue
+
+            tree, root_id, min_score, max_score = generate_tweet_tree(size, depth, seed)
+
+            service = ArgumentationAlgorithmService(max_score, min_score, tree, TweetTreeMetrics())
+            recursive_seconds, recursive_degree = _time(
+                lambda: recursive_acceptability_degree(service, tree.nodes[root_id]))
+
+            service = ArgumentationAlgorithmService(max_score, min_score, tree, TweetTreeMetrics())
+            iterative_seconds, degrees = _time(lambda: service.acceptability_degrees(tree.nodes[root_id]))
+
+            service = VectorizedArgumentationService(max_score, min_score, tree, TweetTreeMetrics())
+            vectorized_seconds, vectorized_degrees = _time(lambda: service.acceptability_degrees(tree.nodes[root_id]))
+            arrays = service.to_arrays(tree.nodes[root_id])
+            evaluation_seconds, _ = _time(lambda: service.evaluate(arrays))
+
+            same_degree = abs(degrees[root_id] - vectorized_degrees[root_id]) < 1e-9
+            if recursive_degree is not None:
+                same_degree = same_degree and abs(recursive_degree - degrees[root_id]) < 1e-9
+
+            results.append({"nodes": size, "depth": depth, "recursive_seconds": recursive_seconds,
+                            "iterative_seconds": iterative_seconds, "vectorized_seconds": vectorized_seconds,
+                            "vectorized_evaluation_seconds": evaluation_seconds, "same_degree": same_degree})
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the EBS evaluation on synthetic tweet trees")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--depths", type=int, nargs="+", default=[10, 1000, 100000])
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    print(f"{'nodes':>9} {'depth':>7} {'recursive':>12} {'iterative':>12} {'vectorized':>12} {'evaluation':>12} "
+          f"{'same degree':>12}")
+    for result in argumentation_benchmark(arguments.sizes, arguments.depths, arguments.seed):
+        recursive = "recursion" if result["recursive_seconds"] is None else f"{result['recursive_seconds']:.3f}s"
+        print(f"{result['nodes']:>9} {result['depth']:>7} {recursive:>12} {result['iterative_seconds']:>11.3f}s "
+              f"{result['vectorized_seconds']:>11.3f}s {result['vectorized_evaluation_seconds']:>11.3f}s "
+              f"{str(result['same_degree']):>12}")
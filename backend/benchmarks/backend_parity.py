@@ -0,0 +1,124 @@
+import sys
+import time
+import argparse
+import numpy as np
+from transformers import AutoModel, AutoModelForSequenceClassification
+
+from backend.benchmarks.stance_sample import load_stance_sample
+from backend.services.utils.model_registry import load_tokenizer
+from backend.services.utils.inference_backend import PYTORCH, PYTORCH_INT8, ONNX, load_inference_backend
+from backend.services.relation_based_classifier_service import RelationBasedClassifierServiceBert
+from backend.services.sentiment_analysis_service import BertweetSentimentAnalysis
+from backend.services.keyword_extraction_service import BertKeywordExtractor
+
+
+def _run(backend, tokenizer, texts, output_name, batch_size, **tokenizer_kwargs):
+    """
+    Runs an inference backend over texts in batches
+
+    :return:    (outputs of every text stacked together, seconds spent in the backend)
+    """
+    outputs = []
+    seconds = 0.0
+    for start in range(0, len(texts), batch_size):
+        tokens = tokenizer(texts[start:start + batch_size], padding=True, truncation=True, return_tensors="np",
+                           **tokenizer_kwargs)
+        batch_start = time.perf_counter()
+        outputs.append(backend(tokens)[output_name])
+        seconds += time.perf_counter() - batch_start
+
+    return np.concatenate(outputs), seconds
+
+
+def _compare(name, auto_model_class, model_name, path, texts, candidate, batch_size, gold_labels=None,
+             model_kwargs=None, **tokenizer_kwargs):
+    """
+    Compares a candidate inference backend against the fp32 PyTorch reference on the same inputs. Classifiers must
+    predict the same labels, while the keyword extraction encoder must produce embeddings pointing the same way, as
+    keywords are ranked by cosine similarity.
+
+    :return:    dictionary of the parity and speed results of the model
+    """
+    model_kwargs = model_kwargs or {}
+    tokenizer = load_tokenizer(model_name, path)
+    reference = load_inference_backend(auto_model_class, model_name, path, backend=PYTORCH, **model_kwargs)
+    candidate_backend = load_inference_backend(auto_model_class, model_name, path, backend=candidate, **model_kwargs)
+
+    output_name = "logits" if auto_model_class is AutoModelForSequenceClassification else "pooler_output"
+    reference_outputs, reference_seconds = _run(reference, tokenizer, texts, output_name, batch_size,
+                                                **tokenizer_kwargs)
+    candidate_outputs, candidate_seconds = _run(candidate_backend, tokenizer, texts, output_name, batch_size,
+                                                **tokenizer_kwargs)
+
+    result = {"model": name,
+              "max_abs_diff": float(np.abs(reference_outputs - candidate_outputs).max()),
+              "speedup": reference_seconds / candidate_seconds}
+
+    if output_name == "logits":
+        reference_labels = reference_outputs.argmax(axis=-1)
+        candidate_labels = candidate_outputs.argmax(axis=-1)
+        result["agreement"] = float(np.mean(reference_labels == candidate_labels))
+
+        if gold_labels is not None:
+            # Accuracy against the gold labels shows whether the disagreements cost any accuracy
+            id2label = reference.config.id2label
+            result["reference_accuracy"] = float(np.mean([id2label[label_id] == gold for label_id, gold in
+                                                          zip(reference_labels.tolist(), gold_labels)]))
+            result["candidate_accuracy"] = float(np.mean([id2label[label_id] == gold for label_id, gold in
+                                                          zip(candidate_labels.tolist(), gold_labels)]))
+    else:
+        cosine = np.sum(reference_outputs * candidate_outputs, axis=-1) / (
+                np.linalg.norm(reference_outputs, axis=-1) * np.linalg.norm(candidate_outputs, axis=-1))
+        result["agreement"] = float(np.mean(cosine > 0.99))
+
+    return result
+
+
+def backend_parity(candidate, sample_size, batch_size=32):
+    """
+    Checks that a candidate inference backend agrees with the fp32 PyTorch models on a held-out sample of the SRQ
+    stance dataset: the relation labels of the (parent, reply) pairs, the sentiment labels of the replies and the
+    BERTweet embeddings of the parents
+
+    :param candidate:   name of the inference backend to check
+    :param sample_size: number of labeled pairs to check on
+    :param batch_size:  batch size used by both backends
+    :return:            list of the results of each model
+    """
+    sample = load_stance_sample(sample_size)
+    pairs = [f"{parent} {RelationBasedClassifierServiceBert.SEPARATOR_TOKEN} {reply}" for parent, reply, _ in sample]
+    replies = [reply for _, reply, _ in sample]
+    parents = [parent for parent, _, _ in sample]
+    gold_labels = [label for _, _, label in sample]
+
+    return [
+        _compare("relation", AutoModelForSequenceClassification, RelationBasedClassifierServiceBert.MODEL,
+                 RelationBasedClassifierServiceBert.PATH, pairs, candidate, batch_size, gold_labels=gold_labels,
+                 max_length=RelationBasedClassifierServiceBert.MAX_LENGTH),
+        _compare("sentiment", AutoModelForSequenceClassification, BertweetSentimentAnalysis.MODEL,
+                 BertweetSentimentAnalysis.PATH, replies, candidate, batch_size,
+                 model_kwargs={"id2label": BertweetSentimentAnalysis.id2label,
+                               "label2id": BertweetSentimentAnalysis.label2id}),
+        _compare("keyword embeddings", AutoModel, BertKeywordExtractor.MODEL, BertKeywordExtractor.PATH, parents,
+                 candidate, batch_size)
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check an inference backend against the fp32 PyTorch models")
+    parser.add_argument("--backend", choices=[PYTORCH_INT8, ONNX], default=ONNX, help="candidate inference backend")
+    parser.add_argument("--sample-size", type=int, default=500, help="number of held-out pairs to check on")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--min-agreement", type=float, default=0.99,
+                        help="minimum fraction of matching predictions for the backend to be adopted")
+    arguments = parser.parse_args()
+
+    results = backend_parity(arguments.backend, arguments.sample_size, arguments.batch_size)
+
+    for result in results:
+        print(", ".join(f"{key}: {value:.4f}" if isinstance(value, float) else f"{key}: {value}"
+                        for key, value in result.items()))
+
+    # Fail so the check can gate adopting the backend, e.g. in CI
+    if any(result["agreement"] < arguments.min_agreement for result in results):
+        sys.exit(f"{arguments.backend} agrees with fp32 on less than {arguments.min_agreement:.0%} of the sample")
@@ -0,0 +1,78 @@
+import sys
+import json
+import time
+import argparse
+
+from backend.services.tweet_tree_builder_service import BULK_FETCH_WORKERS, BULK_BATCH_SIZE
+
+
+def read_tweet_ids(lines):
+    """
+    :param lines:   lines of a file listing one tweet id per line, blank lines and lines starting with # are skipped
+    :return:        the tweet ids
+    """
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def bulk_analysis(tweet_ids, output, max_workers=BULK_FETCH_WORKERS, batch_size=BULK_BATCH_SIZE):
+    """
+    Analyses many tweets with TweetAnalyzerController.analyze_tweets and writes the results as newline-delimited
+    JSON, one line per tweet with its analysis or its error, as soon as each batch of tweets is analysed
+
+    :param tweet_ids:   ids of the tweets to analyse
+    :param output:      text file the results are written to
+    :param max_workers: number of tweets whose conversations are fetched at the same time
+    :param batch_size:  number of tweets whose replies are classified together
+    :return:            number of analysed and failed tweets, and the seconds taken
+    """
+    from backend.controllers.tweet_analyzer_controller import TweetAnalyzerController
+
+    analysed = failed = 0
+    start = time.perf_counter()
+    for tweet_id, analysis, error in TweetAnalyzerController().analyze_tweets(tweet_ids, max_workers=max_workers,
+                                                                             batch_size=batch_size):
+        if error is None:
+            analysed += 1
+            line = {"tweet_id": tweet_id, "response": analysis}
+        else:
+            failed += 1
+            line = {"tweet_id": tweet_id, "error": f"{type(error).__name__}: {error}"}
+        output.write(json.dumps(line) + "\n")
+        output.flush()
+
+    return analysed, failed, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyse many tweets, writing their analyses as newline-delimited "
+                                                 "JSON")
+    parser.add_argument("tweet_ids", nargs="*", help="ids of the tweets to analyse")
+    parser.add_argument("--input", help="file listing one tweet id per line, - for the standard input")
+    parser.add_argument("--output", help="NDJSON file to write the analyses to, the standard output by default")
+    parser.add_argument("--workers", type=int, default=BULK_FETCH_WORKERS,
+                        help="number of tweets whose conversations are fetched at the same time")
+    parser.add_argument("--batch-size", type=int, default=BULK_BATCH_SIZE,
+                        help="number of tweets whose replies are classified together")
+    arguments = parser.parse_args()
+
+    analysed_ids = list(arguments.tweet_ids)
+    if arguments.input == "-":
+        analysed_ids.extend(read_tweet_ids(sys.stdin))
+    elif arguments.input:
+        with open(arguments.input) as input_file:
+            analysed_ids.extend(read_tweet_ids(input_file))
+
+    output_file = open(arguments.output, "w") if arguments.output else sys.stdout
+    try:
+        analysed_count, failed_count, seconds = bulk_analysis(analysed_ids, output_file, arguments.workers,
+                                                              arguments.batch_size)
+    finally:
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    # The report goes to the standard error, as the analyses may be written to the standard output
+    print(f"Analysed:   {analysed_count}", file=sys.stderr)
+    print(f"Failed:     {failed_count}", file=sys.stderr)
+    print(f"Seconds:    {seconds:.1f}", file=sys.stderr)
+    throughput = 60 * (analysed_count + failed_count) / seconds if seconds > 0 else 0.0
+    print(f"Throughput: {throughput:.1f} conversations/minute", file=sys.stderr)
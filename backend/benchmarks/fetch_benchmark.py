@@ -0,0 +1,64 @@
+import os
+import time
+import argparse
+
+from backend.benchmarks.twitter_replay_server import ReplayServer
+from backend.benchmarks.synthetic_conversations import generate_fixtures, FIRST_TWEET_ID
+from backend.services.utils.rate_limit_scheduler import RELATED_PRIORITY
+
+
+def fetch(tweet_id, keyword):
+    """
+    Fetches what an analysis fetches, with the TwitterAPIService alone: the tweet, its conversation, the tweets about
+    the keyword and each of their conversations. No model is run, as the fetched tweets are not scored.
+
+    :param tweet_id:    id of the tweet to fetch the conversations of
+    :param keyword:     keyword the related tweets are searched for
+    :return:            number of fetched tweets, and seconds taken by each step
+    """
+    from backend.services.twitter_api_service import TwitterAPIService
+
+    twitter_api_service = TwitterAPIService("replay_token", base_url=os.environ["TWITTER_API_BASE_URL"])
+    seconds = {}
+
+    start = time.perf_counter()
+    twitter_api_service.get_tweet(tweet_id)
+    conversation_thread = twitter_api_service.get_conversation_thread(tweet_id)
+    seconds["root"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    related_tweets = twitter_api_service.get_tweets_from_keyword(keyword)
+    seconds["search"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    related_tweet_threads = [twitter_api_service.get_conversation_thread(related_tweet["id"], priority=RELATED_PRIORITY)
+                             for related_tweet in related_tweets if related_tweet["id"] != tweet_id]
+    seconds["related"] = time.perf_counter() - start
+
+    number_of_tweets = 1 + len(conversation_thread) + len(related_tweets) + sum(map(len, related_tweet_threads))
+
+    return number_of_tweets, seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark fetching the conversations of an analysis from the Twitter "
+                                                 "API replay server, without the models")
+    parser.add_argument("--conversations", type=int, default=4, help="number of synthetic conversations")
+    parser.add_argument("--depth", type=int, default=3, help="depth of the synthetic conversations")
+    parser.add_argument("--breadth", type=int, default=4, help="breadth of the synthetic conversations")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds every API response is delayed by")
+    arguments = parser.parse_args()
+
+    replay_fixtures = generate_fixtures(arguments.conversations, arguments.depth, arguments.breadth)
+    with ReplayServer(replay_fixtures, latency=arguments.latency) as server:
+        os.environ["TWITTER_API_BASE_URL"] = server.base_url
+        runs = [fetch(str(FIRST_TWEET_ID), "pizza") for _ in range(arguments.repeat)]
+
+    fetched_tweets = runs[0][0]
+    total_seconds = [sum(seconds.values()) for _, seconds in runs]
+    print(f"Fetched tweets: {fetched_tweets}")
+    for step in ["root", "search", "related"]:
+        print(f"{step:15} {sum(seconds[step] for _, seconds in runs) / len(runs):.3f}s")
+    print(f"{'total':15} {sum(total_seconds) / len(runs):.3f}s")
+    print(f"Throughput:     {fetched_tweets * len(runs) / sum(total_seconds):.0f} tweets/s")
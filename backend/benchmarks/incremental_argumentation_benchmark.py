@@ -0,0 +1,95 @@
+import time
+import random
+import argparse
+
+from backend.benchmarks.synthetic_conversations import generate_conversation
+from backend.services.relation_based_classifier_service import IRelationBasedClassifierService
+from backend.services.tweet_tree_builder_service import TweetTree, TweetTreeMetrics, TweetTreeBuilder
+from backend.services.incremental_argumentation_service import IncrementalArgumentationService
+
+
+class RandomRelationClassifier(IRelationBasedClassifierService):
+    """
+    Classifies the argumentative relations at random, so the benchmark only measures the evaluation
+    """
+
+    def __init__(self, seed=0):
+        self.generator = random.Random(seed)
+
+    def predict_argumentative_relations(self, pairs, batch_size=32):
+        return [self.generator.choice(["support", "attack", "attack", "support", "neutral"]) for _ in pairs]
+
+
+def _sentiment(tweet):
+    tweet.update(tweet["public_metrics"], sentiment="neutral")
+    return tweet
+
+
+def incremental_argumentation_benchmark(depth, breadth, updates=100, seed=0):
+    """
+    Times the evaluation of a synthetic conversation from scratch against incremental updates of its replies
+
+    :param depth:   number of reply levels of the conversation
+    :param breadth: number of replies of every tweet
+    :param updates: number of updates of each kind timed
+    :param seed:    random seed of the conversation and updates
+    :return:        number of tweets, seconds of the full evaluation, and mean seconds of each kind of update
+    """
+    generator = random.Random(seed)
+    root_tweet, pages = generate_conversation(0, depth, breadth, generator=generator)
+    replies = [_sentiment(reply) for page in reversed(pages) for reply in reversed(page["data"])]
+    for reply in replies:
+        reply["referenced_tweets"][0]["text"] = ""
+
+    # Keep the last replies to add them incrementally, they are leaves of the conversation
+    tweet_tree = TweetTree(_sentiment(dict(root_tweet, argumentative_type="none")), replies[:-updates],
+                           TweetTreeMetrics())
+    argumentation_service = IncrementalArgumentationService(tweet_tree)
+
+    start = time.perf_counter()
+    argumentation_service.evaluate()
+    evaluation_seconds = time.perf_counter() - start
+
+    # Keep the public metrics within the max and min of the tree, as changing them evaluates the whole tree again
+    metrics = tweet_tree.get_tweet_tree_metrics()
+    low, high = metrics.get_min_public_metrics() + 1, metrics.get_max_public_metrics() - 1
+    update_ids = generator.sample([reply["id"] for reply in replies[:-updates]], updates)
+    for reply in replies[-updates:]:
+        reply["like_count"], reply["retweet_count"] = generator.randint(low, high), 0
+
+    seconds = {}
+    start = time.perf_counter()
+    for tweet_id in update_ids:
+        argumentation_service.update_public_metrics(tweet_id, generator.randint(low, high), 0)
+    seconds["update_public_metrics"] = (time.perf_counter() - start) / updates
+
+    start = time.perf_counter()
+    for reply in replies[-updates:]:
+        argumentation_service.add_replies([reply])
+    seconds["add_replies"] = (time.perf_counter() - start) / updates
+
+    start = time.perf_counter()
+    for reply in replies[-updates:]:
+        argumentation_service.remove_tweet(reply["id"])
+    seconds["remove_tweet"] = (time.perf_counter() - start) / updates
+
+    return tweet_tree.get_tree().number_of_nodes(), evaluation_seconds, seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the incremental EBS evaluation on synthetic conversations")
+    parser.add_argument("--depth", type=int, nargs="+", default=[4, 6, 8])
+    parser.add_argument("--breadth", type=int, default=5)
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    TweetTreeBuilder.argumentation_relation_service = RandomRelationClassifier(arguments.seed)
+
+    print(f"{'tweets':>9} {'evaluate':>10} {'update':>10} {'add':>10} {'remove':>10}")
+    for conversation_depth in arguments.depth:
+        number_of_tweets, full_seconds, update_seconds = incremental_argumentation_benchmark(
+            conversation_depth, arguments.breadth, arguments.updates, arguments.seed)
+        print(f"{number_of_tweets:>9} {full_seconds * 1000:>8.2f}ms "
+              f"{update_seconds['update_public_metrics'] * 1000:>8.3f}ms "
+              f"{update_seconds['add_replies'] * 1000:>8.3f}ms {update_seconds['remove_tweet'] * 1000:>8.3f}ms")
@@ -0,0 +1,92 @@
+import os
+import sys
+import argparse
+import multiprocessing
+
+# Model loading configurations to compare, as the environment variables each worker is started with
+CONFIGURATIONS = {
+    "private copies": {"SHARE_BERTWEET_TOKENIZER": "false", "MMAP_MODEL_WEIGHTS": "false"},
+    "shared tokenizer + mmap weights": {"SHARE_BERTWEET_TOKENIZER": "true", "MMAP_MODEL_WEIGHTS": "true"},
+}
+
+
+def _read_memory():
+    """
+    Reads the memory usage of the current process. RSS counts every resident page, including the ones shared with
+    other processes, while PSS splits each shared page between the processes sharing it, so the sum of the PSS of all
+    workers is the real memory used by the workers on the host.
+
+    :return:    (RSS, PSS) of the current process in MB
+    """
+    memory = {}
+    with open("/proc/self/smaps_rollup") as smaps:
+        for line in smaps:
+            fields = line.split()
+            if fields[0] in ("Rss:", "Pss:"):
+                memory[fields[0]] = int(fields[1]) / 1024
+
+    return memory["Rss:"], memory["Pss:"]
+
+
+def _worker(environment, loaded, measured, results):
+    """
+    Loads every model like an API worker would, then measures its memory once all the workers have loaded theirs
+
+    :param environment: environment variables configuring how the models are loaded
+    :param loaded:      barrier waited on once the models are loaded
+    :param measured:    barrier waited on once the memory is measured, keeps the workers alive until then
+    :param results:     queue the measurements are put on
+    """
+    os.environ.update(environment)
+
+    import backend.api.api  # Registers every model, like the API worker does
+    from backend.services.utils.model_registry import model_registry
+
+    model_registry.warm_up()
+
+    loaded.wait()
+    results.put(_read_memory())
+    measured.wait()
+
+
+def memory_report(workers):
+    """
+    Starts the given number of worker processes for each configuration and measures their memory usage
+
+    :param workers: number of concurrent worker processes, like uvicorn --workers
+    :return:        mapping from configuration name to the list of (RSS, PSS) of each worker
+    """
+    context = multiprocessing.get_context("spawn")
+    report = {}
+    for name, environment in CONFIGURATIONS.items():
+        loaded = context.Barrier(workers)
+        measured = context.Barrier(workers)
+        results = context.Queue()
+
+        processes = [context.Process(target=_worker, args=(environment, loaded, measured, results))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+
+        report[name] = [results.get() for _ in range(workers)]
+
+        for process in processes:
+            process.join()
+
+    return report
+
+
+if __name__ == "__main__":
+    if not sys.platform.startswith("linux"):
+        sys.exit("The memory report reads /proc/self/smaps_rollup and only runs on Linux")
+
+    parser = argparse.ArgumentParser(description="Compare per-worker memory with and without shared model weights")
+    parser.add_argument("--workers", type=int, default=4, help="number of concurrent worker processes")
+    arguments = parser.parse_args()
+
+    for configuration, measurements in memory_report(arguments.workers).items():
+        total_pss = sum(pss for _, pss in measurements)
+        print(f"{configuration}:")
+        for worker, (rss, pss) in enumerate(measurements):
+            print(f"    worker {worker}: RSS {rss:8.1f} MB, PSS {pss:8.1f} MB")
+        print(f"    total PSS of {len(measurements)} workers: {total_pss:.1f} MB")
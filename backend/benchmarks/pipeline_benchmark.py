@@ -0,0 +1,50 @@
+import os
+import time
+import argparse
+
+from backend.benchmarks.twitter_replay_server import ReplayServer
+from backend.benchmarks.synthetic_conversations import generate_fixtures, FIRST_TWEET_ID
+from backend.services.utils.pipeline import pipeline_stats
+
+
+def build_seconds(tweet_id, pipelined, repeat=1):
+    """
+    :param tweet_id:    id of the tweet to build the tweet tree of
+    :param pipelined:   whether the pages of replies are scored and classified while the next pages are fetched
+    :param repeat:      number of times the tweet tree is built
+    :return:            mean seconds taken by a build
+    """
+    from backend.services.tweet_tree_builder_service import TweetTreeBuilder
+
+    os.environ["TWEET_TREE_PIPELINE"] = "true" if pipelined else "false"
+    start = time.perf_counter()
+    for _ in range(repeat):
+        TweetTreeBuilder(tweet_id)
+
+    return (time.perf_counter() - start) / repeat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the sequential and the pipelined tweet tree builds against "
+                                                 "the Twitter API replay server")
+    parser.add_argument("--conversations", type=int, default=4, help="number of synthetic conversations")
+    parser.add_argument("--depth", type=int, default=3, help="depth of the synthetic conversations")
+    parser.add_argument("--breadth", type=int, default=8, help="breadth of the synthetic conversations")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds every API response is delayed by")
+    arguments = parser.parse_args()
+
+    replay_fixtures = generate_fixtures(arguments.conversations, arguments.depth, arguments.breadth)
+    root_id = str(FIRST_TWEET_ID)
+    with ReplayServer(replay_fixtures, latency=arguments.latency) as server:
+        os.environ["TWITTER_API_BASE_URL"] = server.base_url
+        # Load the models before timing the builds
+        build_seconds(root_id, pipelined=False)
+
+        print(f"Sequential: {build_seconds(root_id, False, arguments.repeat):.3f}s")
+        print(f"Pipelined:  {build_seconds(root_id, True, arguments.repeat):.3f}s")
+
+    print(f"{'stage':10} {'items':>7} {'batches':>8} {'items/s':>9} {'max queue':>10}")
+    for name, stage_stats in pipeline_stats.get_stats().items():
+        print(f"{name:10} {stage_stats['items']:7} {stage_stats['batches']:8} {stage_stats['items_per_second']:9.1f} "
+              f"{stage_stats['max_queue_depth']:10}")
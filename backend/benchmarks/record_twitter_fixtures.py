@@ -0,0 +1,18 @@
+import os
+import argparse
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record the Twitter API responses of analysing tweets, to serve them "
+                                                 "with the Twitter API replay server")
+    parser.add_argument("output", help="JSON file to record the fixtures to, appended to if it exists")
+    parser.add_argument("tweet_ids", nargs="+", help="ids of the tweets to analyse")
+    arguments = parser.parse_args()
+
+    # Every Twitter client created from now on records its responses to the fixtures file
+    os.environ["TWITTER_API_RECORD_PATH"] = arguments.output
+
+    from backend.controllers.tweet_analyzer_controller import TweetAnalyzerController
+
+    for tweet_id in arguments.tweet_ids:
+        TweetAnalyzerController().analyze_tweet(tweet_id)
+        print(f"Recorded the analysis of {tweet_id}")
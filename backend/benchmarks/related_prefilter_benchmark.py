@@ -0,0 +1,96 @@
+import random
+import argparse
+from collections import defaultdict
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+from backend.benchmarks.stance_sample import load_stance_sample
+from backend.services.relation_prefilter_service import TfidfRelationPrefilter, MIN_RELATED_SIMILARITY
+
+# Tweets returned by the keyword search of an analysis, the candidate related tweets
+SEARCH_SIZE = 15
+
+
+def _words(text):
+    return {word for word in text.lower().split() if word.isalpha() and len(word) > 3 and
+            word not in ENGLISH_STOP_WORDS}
+
+
+def generate_searches(sample, search_size=SEARCH_SIZE, seed=0):
+    """
+    Simulates the keyword searches of analyses from labeled (parent, reply) pairs: every parent is an analysed tweet,
+    and its search hits are its labeled replies, filled up with replies to other parents sharing a word with it, as
+    a keyword search would return them. The replies to other parents are labeled neutral, as they do not answer it.
+
+    :param sample:      (parent text, reply text, argumentative relation) tuples
+    :param search_size: number of hits of every search
+    :param seed:        random seed of the filling hits
+    :return:            list of (parent text, [(hit text, argumentative relation)]) searches
+    """
+    generator = random.Random(seed)
+    replies = defaultdict(list)
+    for parent, reply, relation in sample:
+        replies[parent].append((reply, relation))
+
+    replies_by_word = defaultdict(list)
+    for parent, reply, _ in sample:
+        for word in _words(reply):
+            replies_by_word[word].append((parent, reply))
+
+    searches = []
+    for parent, hits in replies.items():
+        hits = hits[:search_size]
+        other_replies = [reply for word in sorted(_words(parent)) for other_parent, reply in replies_by_word[word]
+                         if other_parent != parent]
+        if not other_replies:
+            other_replies = [reply for _, reply, _ in sample]
+        fillers = generator.sample(other_replies, min(search_size - len(hits), len(other_replies)))
+        hits = hits + [(reply, "neutral") for reply in fillers]
+        generator.shuffle(hits)
+        searches.append((parent, hits))
+
+    return searches
+
+
+def evaluate(searches, budget, min_similarity):
+    """
+    Pre-filters every search, the labels standing in for the relation model: every hit kept is one relation
+    classification, and every kept hit that is not neutral one conversation fetch
+
+    :return:    classifications and fetches without and with the pre-filter, and the share of the argumentative
+                replies of the parents that are kept
+    """
+    prefilter = TfidfRelationPrefilter(budget=budget, min_similarity=min_similarity)
+    result = defaultdict(int)
+    for parent, hits in searches:
+        candidates = [{"text": text, "relation": relation} for text, relation in hits]
+        selected = prefilter.select_candidates({"text": parent}, candidates)
+
+        result["classifications"] += len(candidates)
+        result["kept_classifications"] += len(selected)
+        result["fetches"] += sum(candidate["relation"] != "neutral" for candidate in candidates)
+        result["kept_fetches"] += sum(candidate["relation"] != "neutral" for candidate in selected)
+
+    result["recall"] = result["kept_fetches"] / result["fetches"] if result["fetches"] else 1.0
+
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the related tweet pre-filter on a labeled stance sample")
+    parser.add_argument("--sample-size", type=int, default=2000, help="number of labeled pairs")
+    parser.add_argument("--budgets", type=int, nargs="*", default=[1, 2, 3, 5, 8, 10, SEARCH_SIZE])
+    parser.add_argument("--min-similarity", type=float, default=MIN_RELATED_SIMILARITY)
+    arguments = parser.parse_args()
+
+    simulated_searches = generate_searches(load_stance_sample(arguments.sample_size))
+
+    print(f"Searches: {len(simulated_searches)} of {SEARCH_SIZE} hits")
+    print(f"{'budget':>6} {'classifications avoided':>24} {'fetches avoided':>16} {'recall':>7}")
+    for expansion_budget in arguments.budgets:
+        evaluation = evaluate(simulated_searches, expansion_budget, arguments.min_similarity)
+        avoided_classifications = evaluation["classifications"] - evaluation["kept_classifications"]
+        avoided_fetches = evaluation["fetches"] - evaluation["kept_fetches"]
+        classification_share = avoided_classifications / evaluation["classifications"]
+        fetch_share = avoided_fetches / evaluation["fetches"] if evaluation["fetches"] else 0.0
+        print(f"{expansion_budget:6} {avoided_classifications:14} ({classification_share:6.1%}) {avoided_fetches:6} "
+              f"({fetch_share:6.1%}) {evaluation['recall']:7.1%}")
@@ -0,0 +1,60 @@
+import os
+import time
+import argparse
+
+from backend.services.utils.twitter_fixtures import TwitterFixtures
+from backend.benchmarks.twitter_replay_server import ReplayServer
+from backend.benchmarks.synthetic_conversations import generate_fixtures
+
+
+def replay_analysis(fixtures, tweet_ids, repeat=1, **server_kwargs):
+    """
+    Benchmarks TweetAnalyzerController.analyze_tweet end to end, with the Twitter API replaced by the local replay
+    server serving the fixtures
+
+    :param fixtures:        recorded or synthetic fixtures to serve
+    :param tweet_ids:       ids of the tweets to analyse
+    :param repeat:          number of times every tweet is analysed
+    :param server_kwargs:   latency and rate limit settings of the replay server
+    :return:                seconds taken by every analysis, and the number of requests served by the replay server
+    """
+    from backend.controllers.tweet_analyzer_controller import TweetAnalyzerController
+
+    with ReplayServer(fixtures, **server_kwargs) as server:
+        os.environ["TWITTER_API_BASE_URL"] = server.base_url
+
+        seconds = []
+        for _ in range(repeat):
+            for tweet_id in tweet_ids:
+                start = time.perf_counter()
+                TweetAnalyzerController().analyze_tweet(tweet_id)
+                seconds.append(time.perf_counter() - start)
+
+        return seconds, server.get_request_counts()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the tweet analysis against the Twitter API replay server")
+    parser.add_argument("--fixtures", help="JSON file of recorded fixtures, synthetic conversations if not given")
+    parser.add_argument("--tweet-ids", nargs="*", help="tweets to analyse, defaults to every fixture root tweet")
+    parser.add_argument("--conversations", type=int, default=4, help="number of synthetic conversations")
+    parser.add_argument("--depth", type=int, default=3, help="depth of the synthetic conversations")
+    parser.add_argument("--breadth", type=int, default=4, help="breadth of the synthetic conversations")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds every API response is delayed by")
+    arguments = parser.parse_args()
+
+    if arguments.fixtures:
+        replay_fixtures = TwitterFixtures.load(arguments.fixtures)
+    else:
+        replay_fixtures = generate_fixtures(arguments.conversations, arguments.depth, arguments.breadth)
+
+    analysed_ids = arguments.tweet_ids or list(replay_fixtures.tweets)
+    analysis_seconds, request_counts = replay_analysis(replay_fixtures, analysed_ids, arguments.repeat,
+                                                       latency=arguments.latency)
+
+    print(f"Analyses:     {len(analysis_seconds)}")
+    print(f"Mean latency: {sum(analysis_seconds) / len(analysis_seconds):.3f}s")
+    print(f"Max latency:  {max(analysis_seconds):.3f}s")
+    print(f"Throughput:   {len(analysis_seconds) / sum(analysis_seconds):.2f} analyses/s")
+    print(f"API requests: {request_counts}")
@@ -0,0 +1,62 @@
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from fastapi.encoders import jsonable_encoder
+
+from backend.services.tweet_tree_builder_service import TweetTree, TweetTreeMetrics
+from backend.benchmarks.argumentation_benchmark import generate_tweet_tree
+
+
+def previous_serialization(tweet_tree):
+    """
+    The previous serialization of an analysis: the nested dicts of get_json, encoded by FastAPI as the response
+    """
+    return json.dumps(jsonable_encoder({"response": tweet_tree.get_json()})).encode("utf-8")
+
+
+def serialization(tweet_tree):
+    """
+    The serialization of an analysis straight to JSON bytes, as the analysis endpoint sends it
+    """
+    return b'{"response":' + tweet_tree.get_json_bytes() + b"}"
+
+
+def measure(function, tweet_tree, repeat):
+    """
+    :return:    best seconds taken by the serialization of the tweet tree, and the peak memory it allocated in bytes
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(tweet_tree)
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function(tweet_tree)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return min(seconds), peak
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the JSON serialization of the tweet tree of an analysis")
+    parser.add_argument("--nodes", type=int, default=100000, help="number of tweets in the synthetic tweet tree")
+    parser.add_argument("--depth", type=int, default=200, help="length of the longest reply chain")
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    tree, root_id, _, _ = generate_tweet_tree(arguments.nodes, arguments.depth)
+    benchmarked_tree = TweetTree(tree.nodes[root_id]["attributes"], [], TweetTreeMetrics())
+    benchmarked_tree.set_tree(tree)
+
+    # The previous serialization recurses once per level of the tree
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * arguments.depth + 1000))
+    assert json.loads(serialization(benchmarked_tree)) == json.loads(previous_serialization(benchmarked_tree))
+
+    for name, serialize in [("get_json + jsonable_encoder", previous_serialization),
+                            ("get_json_bytes", serialization)]:
+        best_seconds, peak_bytes = measure(serialize, benchmarked_tree, arguments.repeat)
+        print(f"{name:30} {best_seconds:.3f}s  peak {peak_bytes / 2 ** 20:.1f} MiB")
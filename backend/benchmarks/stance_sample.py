@@ -0,0 +1,39 @@
+import os
+import json
+import random
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), "../../ml/datasets/stance_dataset.json")
+
+# Maps the SRQ stance labels to the argumentative relations predicted by the relation classifier
+LABEL_MAPPING = {"Implicit_Support": "support", "Explicit_Support": "support",
+                 "Implicit_Denial": "attack", "Explicit_Denial": "attack",
+                 "Queries": "neutral", "Comment": "neutral"}
+
+
+def load_stance_sample(sample_size, seed=0):
+    """
+    Loads a reproducible random sample of labeled (parent, reply) pairs from the SRQ stance dataset. The dataset
+    only stores the text of a tweet the first time it appears, so the texts are reconstructed from an id to text
+    mapping, like the ml data preparation does.
+
+    :param sample_size: number of pairs to sample
+    :param seed:        random seed of the sample
+    :return:            list of (parent text, reply text, argumentative relation) tuples
+    """
+    with open(DATASET_PATH) as dataset:
+        rows = [json.loads(line) for line in dataset]
+
+    texts = {}
+    for row in rows:
+        if "target_text" in row:
+            texts[row["target_id"]] = row["target_text"]
+        if "response_text" in row:
+            texts[row["response_id"]] = row["response_text"]
+
+    pairs = [(texts[row["target_id"]], texts[row["response_id"]], LABEL_MAPPING[row["label"]]) for row in rows]
+
+    return random.Random(seed).sample(pairs, min(sample_size, len(pairs)))
+
+
+if __name__ == "__main__":
+    pass
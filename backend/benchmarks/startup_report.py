@@ -0,0 +1,59 @@
+import os
+import sys
+import json
+import subprocess
+
+# Run from the repository root so the backend package can be imported by the child processes
+ROOT = os.path.join(os.path.dirname(__file__), "../..")
+
+IMPORT_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import backend.api.api
+print(json.dumps({"import_seconds": time.perf_counter() - start}))
+"""
+
+WARM_UP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import backend.api.api
+from backend.services.utils.model_registry import model_registry
+import_seconds = time.perf_counter() - start
+warm_up_seconds = model_registry.warm_up()
+print(json.dumps({"import_seconds": import_seconds, "warm_up_seconds": warm_up_seconds,
+                  "models": model_registry.get_load_times()}))
+"""
+
+
+def _run(script):
+    """
+    Runs a script in a fresh interpreter, so nothing is already imported or loaded, and returns its JSON output
+
+    :param script:  python source to run
+    :return:        the decoded JSON printed on the last line of the script's output
+    """
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, check=True, capture_output=True, text=True)
+
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def startup_report():
+    """
+    Measures the cold start of an API worker: the time to import the application, which no longer loads any model,
+    and the time to warm up each model from the local models directory
+
+    :return:    the startup timings
+    """
+    report = _run(WARM_UP_SCRIPT)
+    report["import_seconds"] = _run(IMPORT_SCRIPT)["import_seconds"]
+
+    return report
+
+
+if __name__ == "__main__":
+    report = startup_report()
+
+    print(f"Import backend.api.api: {report['import_seconds']:.2f}s")
+    print(f"Warm up all models:     {report['warm_up_seconds']:.2f}s")
+    for name, seconds in report["models"].items():
+        print(f"    {name:<35} {seconds:.2f}s")
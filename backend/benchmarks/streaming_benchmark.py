@@ -0,0 +1,77 @@
+import os
+import time
+import argparse
+
+from backend.services.utils.twitter_fixtures import TwitterFixtures
+from backend.services.tweet_tree_builder_service import CONVERSATION_EVENT
+from backend.benchmarks.twitter_replay_server import ReplayServer
+from backend.benchmarks.synthetic_conversations import generate_fixtures
+
+
+def streaming_benchmark(fixtures, tweet_ids, **server_kwargs):
+    """
+    Benchmarks the streamed analysis against the complete one, with the Twitter API replaced by the local replay
+    server serving the fixtures. The time to first byte is the time to the first event, the root tweet, and the time
+    to first useful render the time to the first replies of its conversation.
+
+    :param fixtures:        recorded or synthetic fixtures to serve
+    :param tweet_ids:       ids of the tweets to analyse
+    :param server_kwargs:   latency and rate limit settings of the replay server
+    :return:                seconds to the first event, to the first replies and to the model of every streamed
+                            analysis, and seconds taken by every complete analysis
+    """
+    from backend.controllers.tweet_analyzer_controller import TweetAnalyzerController
+
+    with ReplayServer(fixtures, **server_kwargs) as server:
+        os.environ["TWITTER_API_BASE_URL"] = server.base_url
+        # The results are not reused, so both analyses do the whole work every time
+        controller = TweetAnalyzerController(analysis_cache_seconds=0)
+
+        streamed_seconds = []
+        complete_seconds = []
+        for tweet_id in tweet_ids:
+            start = time.perf_counter()
+            first_event = first_replies = None
+            for event, _ in controller.stream_analysis(tweet_id):
+                seconds = time.perf_counter() - start
+                first_event = first_event if first_event is not None else seconds
+                if event == CONVERSATION_EVENT and first_replies is None:
+                    first_replies = seconds
+            streamed_seconds.append((first_event, first_replies, time.perf_counter() - start))
+
+            start = time.perf_counter()
+            controller.analyze_tweet(tweet_id)
+            complete_seconds.append(time.perf_counter() - start)
+
+        return streamed_seconds, complete_seconds
+
+
+def _mean(values):
+    values = [value for value in values if value is not None]
+    return sum(values) / len(values) if values else float("nan")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the time to first byte and to first useful render of the "
+                                                 "streamed analysis against the complete analysis")
+    parser.add_argument("--fixtures", help="JSON file of recorded fixtures, synthetic conversations if not given")
+    parser.add_argument("--tweet-ids", nargs="*", help="tweets to analyse, defaults to every fixture root tweet")
+    parser.add_argument("--conversations", type=int, default=4, help="number of synthetic conversations")
+    parser.add_argument("--depth", type=int, default=3, help="depth of the synthetic conversations")
+    parser.add_argument("--breadth", type=int, default=4, help="breadth of the synthetic conversations")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds every API response is delayed by")
+    arguments = parser.parse_args()
+
+    if arguments.fixtures:
+        replay_fixtures = TwitterFixtures.load(arguments.fixtures)
+    else:
+        replay_fixtures = generate_fixtures(arguments.conversations, arguments.depth, arguments.breadth)
+
+    analysed_ids = arguments.tweet_ids or list(replay_fixtures.tweets)
+    streamed, complete = streaming_benchmark(replay_fixtures, analysed_ids, latency=arguments.latency)
+
+    print(f"Analyses:                      {len(complete)}")
+    print(f"Streamed, first byte:          {_mean([seconds[0] for seconds in streamed]):.3f}s")
+    print(f"Streamed, first useful render: {_mean([seconds[1] for seconds in streamed]):.3f}s")
+    print(f"Streamed, complete model:      {_mean([seconds[2] for seconds in streamed]):.3f}s")
+    print(f"Complete analysis:             {_mean(complete):.3f}s")
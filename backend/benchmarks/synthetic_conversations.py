@@ -0,0 +1,122 @@
+import random
+import argparse
+
+from backend.services.utils.twitter_fixtures import TwitterFixtures, DEFAULT_KEYWORD_SEARCH
+
+# Ids of synthetic tweets are fixed width, like real tweet ids, so replies sort after the tweets they reply to
+FIRST_TWEET_ID = 1500000000000000000
+CONVERSATION_ID_STRIDE = 10 ** 9
+
+# Search results are paged like the Twitter API, which returns at most 100 tweets per page
+PAGE_SIZE = 100
+
+SUBJECTS = ["Pizza", "Remote work", "Electric cars", "The new phone", "This policy", "The final", "Coffee",
+            "The movie", "Public transport", "The update"]
+OPINIONS = ["is the best thing ever", "is completely overrated", "changed my life", "is a waste of money",
+            "deserves more attention", "is getting worse every year", "is fine I guess", "makes no sense at all"]
+REPLIES = ["I totally agree with this", "No way, that is just wrong", "Interesting point, never thought of it",
+           "This is exactly what I was saying", "Source? That does not sound right", "Couldn't have said it better",
+           "Strongly disagree", "Not sure about that, but ok"]
+
+
+def _public_metrics(generator):
+    return {"retweet_count": generator.randint(0, 50), "reply_count": generator.randint(0, 20),
+            "like_count": generator.randint(0, 200), "quote_count": generator.randint(0, 5)}
+
+
+def generate_conversation(conversation_number, depth, breadth, max_tweets=None, generator=None):
+    """
+    Generates a synthetic conversation shaped as a complete tree: every tweet up to the given depth has breadth
+    replies. A breadth of 1 generates a single reply chain, e.g. to produce very deep threads.
+
+    :param conversation_number: number of the conversation, which determines its tweet ids
+    :param depth:               number of reply levels below the root tweet
+    :param breadth:             number of replies of every tweet
+    :param max_tweets:          maximum number of replies, None for no limit
+    :param generator:           random number generator of the texts and public metrics
+    :return:                    the root tweet and the search result pages of its conversation, as returned by the
+                                tweet lookup and recent search endpoints
+    """
+    generator = generator or random.Random(0)
+    next_id = FIRST_TWEET_ID + conversation_number * CONVERSATION_ID_STRIDE
+    root_id = str(next_id)
+    root_tweet = {"id": root_id, "text": f"{generator.choice(SUBJECTS)} {generator.choice(OPINIONS)}",
+                  "conversation_id": root_id, "public_metrics": _public_metrics(generator)}
+
+    # Create the replies level by level, so the number of replies can be capped without leaving holes in the tree
+    tweets = {root_id: root_tweet}
+    replies = []
+    level = [root_id]
+    for _ in range(depth):
+        next_level = []
+        for parent_id in level:
+            for _ in range(breadth):
+                if max_tweets is not None and len(replies) >= max_tweets:
+                    break
+
+                next_id += 1
+                reply = {"id": str(next_id), "text": generator.choice(REPLIES), "conversation_id": root_id,
+                         "referenced_tweets": [{"type": "replied_to", "id": parent_id}],
+                         "public_metrics": _public_metrics(generator)}
+                tweets[reply["id"]] = reply
+                replies.append(reply)
+                next_level.append(reply["id"])
+        level = next_level
+
+    # Page the replies, newest first like the Twitter API, including the tweets each page replies to
+    replies.reverse()
+    pages = []
+    for start in range(0, len(replies), PAGE_SIZE):
+        page_replies = replies[start:start + PAGE_SIZE]
+        parent_ids = dict.fromkeys(reply["referenced_tweets"][0]["id"] for reply in page_replies)
+        pages.append({"data": page_replies,
+                      "includes": {"tweets": [tweets[parent_id] for parent_id in parent_ids]},
+                      "meta": {"result_count": len(page_replies), "newest_id": page_replies[0]["id"],
+                               "oldest_id": page_replies[-1]["id"]}})
+
+    return root_tweet, pages
+
+
+def generate_fixtures(number_of_conversations, depth, breadth, max_tweets=None, seed=0):
+    """
+    Generates fixtures of synthetic conversations for the Twitter API replay server. Every keyword search returns the
+    root tweets of the conversations, so the first conversation analysed finds all the others as related tweets.
+
+    :param number_of_conversations: number of conversations to generate
+    :param depth:                   number of reply levels below each root tweet
+    :param breadth:                 number of replies of every tweet
+    :param max_tweets:              maximum number of replies of each conversation, None for no limit
+    :param seed:                    random seed of the texts and public metrics
+    :return:                        the fixtures of the conversations
+    """
+    generator = random.Random(seed)
+    fixtures = TwitterFixtures()
+
+    root_tweets = []
+    for conversation_number in range(number_of_conversations):
+        root_tweet, pages = generate_conversation(conversation_number, depth, breadth, max_tweets, generator)
+        fixtures.tweets[root_tweet["id"]] = root_tweet
+        fixtures.searches[f"conversation_id: {root_tweet['id']} lang:en"] = pages
+        root_tweets.append(root_tweet)
+
+    fixtures.searches[DEFAULT_KEYWORD_SEARCH] = [{"data": root_tweets, "includes": {},
+                                                  "meta": {"result_count": len(root_tweets)}}]
+
+    return fixtures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic conversations for the Twitter API replay server")
+    parser.add_argument("output", help="JSON file to write the fixtures to")
+    parser.add_argument("--conversations", type=int, default=16, help="number of conversations")
+    parser.add_argument("--depth", type=int, default=3, help="number of reply levels below each root tweet")
+    parser.add_argument("--breadth", type=int, default=5, help="number of replies of every tweet")
+    parser.add_argument("--max-tweets", type=int, default=None, help="maximum number of replies per conversation")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    synthetic_fixtures = generate_fixtures(arguments.conversations, arguments.depth, arguments.breadth,
+                                           arguments.max_tweets, arguments.seed)
+    synthetic_fixtures.save(arguments.output)
+    print(f"Wrote {arguments.conversations} conversations with the root tweet ids:")
+    print("\n".join(synthetic_fixtures.tweets))
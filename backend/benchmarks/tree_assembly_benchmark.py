@@ -0,0 +1,71 @@
+import time
+import argparse
+import networkx as nx
+
+from backend.services.tweet_tree_builder_service import TweetTree, TweetTreeMetrics, RELATED_EDGE_COLOR
+from backend.benchmarks.tweet_tree_memory_benchmark import generate_conversation, previous_tweet_tree
+
+
+def generate_conversations(number_of_related, number_of_tweets, depth):
+    """
+    :return:    a root conversation and its related conversations, each of number_of_tweets tweets with distinct ids
+    """
+    root_conversation = generate_conversation(number_of_tweets, depth)
+    related_conversations = []
+    for number in range(1, number_of_related + 1):
+        related_tweet, conversation_thread, argumentative_types = generate_conversation(
+            number_of_tweets, depth, seed=number, first_id=number * number_of_tweets)
+        related_tweet["argumentative_type"] = "attack"
+        related_conversations.append((related_tweet, conversation_thread, argumentative_types))
+
+    return root_conversation, related_conversations
+
+
+def previous_assembly(root_conversation, related_conversations):
+    """
+    The previous assembly of the tweet tree: the tree of every related conversation is built on its own, then
+    composed with a copy of the tree built so far
+    """
+    tree = previous_tweet_tree(*root_conversation)
+    root_id = root_conversation[0]["id"]
+    for related_tweet, conversation_thread, argumentative_types in related_conversations:
+        tree = nx.compose(tree, previous_tweet_tree(related_tweet, conversation_thread, argumentative_types))
+        tree.add_edge(root_id, related_tweet["id"], color=RELATED_EDGE_COLOR, weight=3)
+
+    return tree
+
+
+def assembly(root_conversation, related_conversations):
+    """
+    The assembly of the tweet tree by the TweetTreeBuilder, every related conversation is added in place
+    """
+    tweet_tree = TweetTree(*root_conversation[:2], TweetTreeMetrics(), root_conversation[2])
+    for related_tweet, conversation_thread, argumentative_types in related_conversations:
+        tweet_tree.add_related_conversation(related_tweet, conversation_thread, argumentative_types)
+
+    return tweet_tree.get_tree()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the assembly of a tweet tree from many related "
+                                                 "conversations")
+    parser.add_argument("--related", type=int, nargs="+", default=[1, 10, 25, 50],
+                        help="numbers of related conversations")
+    parser.add_argument("--tweets", type=int, default=2000, help="number of tweets of every conversation")
+    parser.add_argument("--depth", type=int, default=20, help="length of the longest reply chain of every conversation")
+    arguments = parser.parse_args()
+
+    print(f"{'related':>8} {'tweets':>8} {'compose':>9} {'in place':>9}")
+    for number_of_related in arguments.related:
+        conversations = generate_conversations(number_of_related, arguments.tweets, arguments.depth)
+
+        start = time.perf_counter()
+        previous_tree = previous_assembly(*conversations)
+        previous_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tree = assembly(*conversations)
+        seconds = time.perf_counter() - start
+
+        assert set(tree.edges) == set(previous_tree.edges)
+        print(f"{number_of_related:8} {tree.number_of_nodes():8} {previous_seconds:8.2f}s {seconds:8.2f}s")
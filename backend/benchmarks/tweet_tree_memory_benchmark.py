@@ -0,0 +1,100 @@
+import gc
+import time
+import argparse
+import tracemalloc
+import networkx as nx
+
+from backend.services.tweet_tree_builder_service import TweetTree, TweetTreeMetrics, REPLY_EDGE_COLOR
+from backend.services.argumentation_service import ArgumentationAlgorithmService
+from backend.benchmarks.argumentation_benchmark import generate_tweet_tree
+
+
+def generate_conversation(number_of_tweets, depth, seed=0, first_id=0):
+    """
+    Generates a synthetic conversation shaped like the tweet trees of generate_tweet_tree, as the Twitter API service
+    returns it
+
+    :param first_id:    id of the root tweet, the replies have the next ids
+    :return:            the root tweet, its replies and the argumentative type of each reply
+    """
+    tree, root_id, _, _ = generate_tweet_tree(number_of_tweets, depth, seed)
+    texts = {tweet_id: f"Tweet {tweet_id}: pineapple does not belong on a pizza, whatever the others say"
+             for tweet_id in tree.nodes}
+
+    root_tweet = {"id": str(first_id + root_id), "text": texts[root_id], "retweet_count": 0, "reply_count": 0,
+                  "like_count": 0, "quote_count": 0, "sentiment": "neutral", "argumentative_type": "none"}
+    conversation_thread = []
+    argumentative_types = {}
+    for parent_id, tweet_id in nx.bfs_edges(tree, root_id):
+        attributes = tree.nodes[tweet_id]["attributes"]
+        conversation_thread.append({"id": str(first_id + tweet_id), "text": texts[tweet_id],
+                                    "retweet_count": attributes["retweet_count"], "reply_count": 0,
+                                    "like_count": attributes["like_count"], "quote_count": 0,
+                                    "sentiment": ("positive", "negative", "neutral")[tweet_id % 3],
+                                    "referenced_tweets": [{"id": str(first_id + parent_id),
+                                                           "text": texts[parent_id]}]})
+        argumentative_types[str(first_id + tweet_id)] = attributes["argumentative_type"]
+
+    return root_tweet, conversation_thread, argumentative_types
+
+
+def previous_tweet_tree(root_tweet, conversation_thread, argumentative_types):
+    """
+    The previous representation of the tweet tree: a networkx DiGraph with an attributes dict per tweet
+    """
+    tree = nx.DiGraph()
+    tree.add_node(root_tweet["id"], attributes=root_tweet)
+    for tweet in conversation_thread:
+        tree.add_node(tweet["id"], attributes={"id": tweet["id"], "text": tweet["text"],
+                                               "retweet_count": tweet["retweet_count"],
+                                               "reply_count": tweet["reply_count"], "like_count": tweet["like_count"],
+                                               "quote_count": tweet["quote_count"], "sentiment": tweet["sentiment"],
+                                               "argumentative_type": argumentative_types[tweet["id"]]})
+        tree.add_edge(tweet["referenced_tweets"][0]["id"], tweet["id"], color=REPLY_EDGE_COLOR, weight=3)
+
+    return tree
+
+
+def tweet_tree(root_tweet, conversation_thread, argumentative_types):
+    """
+    The tweet tree as the TweetTree stores it, in a TweetGraph
+    """
+    return TweetTree(root_tweet, conversation_thread, TweetTreeMetrics(), argumentative_types).get_tree()
+
+
+def measure(build, conversation):
+    """
+    :return:    bytes allocated by the tree and kept alive, and seconds taken by the argumentation algorithm on it
+    """
+    gc.collect()
+    tracemalloc.start()
+    tree = build(*conversation)
+    kept_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    root_tweet = conversation[0]
+    metrics = TweetTreeMetrics()
+    for tweet in conversation[1]:
+        metrics.set_max_min_public_metrics(tweet)
+    start = time.perf_counter()
+    ArgumentationAlgorithmService(metrics.get_max_public_metrics(), metrics.get_min_public_metrics(), tree,
+                                  metrics).acceptability_degree(tree.nodes[root_tweet["id"]])
+    evaluation_seconds = time.perf_counter() - start
+
+    return kept_bytes, evaluation_seconds
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the memory of the tweet tree representations")
+    parser.add_argument("--tweets", type=int, default=100000, help="number of tweets in the synthetic conversation")
+    parser.add_argument("--depth", type=int, default=200, help="length of the longest reply chain")
+    arguments = parser.parse_args()
+
+    benchmarked_conversation = generate_conversation(arguments.tweets, arguments.depth)
+
+    # The texts and ids of the conversation are shared by both representations, so they are not counted
+    print(f"{'representation':28} {'bytes/tweet':>12} {'evaluation':>11}")
+    for name, build_tree in [("networkx DiGraph + dicts", previous_tweet_tree),
+                             ("TweetGraph + TweetRecords", tweet_tree)]:
+        tree_bytes, evaluation = measure(build_tree, benchmarked_conversation)
+        print(f"{name:28} {tree_bytes / arguments.tweets:12.0f} {evaluation:10.2f}s")
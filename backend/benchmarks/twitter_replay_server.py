@@ -0,0 +1,213 @@
+import math
+import time
+import random
+import asyncio
+import argparse
+import threading
+from aiohttp import web
+
+from backend.services.utils.twitter_fixtures import TwitterFixtures
+
+# Default quota of the recent search endpoint of the Twitter API, 450 requests per 15 minute window
+RATE_LIMIT = 450
+RATE_LIMIT_WINDOW = 900
+
+
+class RateLimitWindow:
+    """
+    Fixed window request quota of one endpoint, reported with the same headers as the Twitter API
+    """
+
+    def __init__(self, limit, window, clock=time.time):
+        """
+        :param limit:   number of requests allowed per window
+        :param window:  length of the window in seconds
+        :param clock:   function returning the current time in seconds
+        """
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        # Windows end on whole seconds, as the reset header is an integer timestamp
+        self.reset = math.ceil(clock() + window)
+        self.remaining = limit
+
+    def consume(self):
+        """
+        Counts a request against the quota
+
+        :return:    whether the request is within the quota, and the rate limit headers of its response
+        """
+        now = self.clock()
+        if now >= self.reset:
+            self.reset = math.ceil(now + self.window)
+            self.remaining = self.limit
+
+        allowed = self.remaining > 0
+        if allowed:
+            self.remaining -= 1
+
+        headers = {"x-rate-limit-limit": str(self.limit),
+                   "x-rate-limit-remaining": str(self.remaining),
+                   "x-rate-limit-reset": str(self.reset)}
+
+        return allowed, headers
+
+
+def create_replay_app(fixtures, latency=0.0, jitter=0.0, rate_limit=RATE_LIMIT, rate_limit_window=RATE_LIMIT_WINDOW,
+                      seed=0, request_counts=None):
+    """
+    Creates a local stand-in of the Twitter API v2 tweet lookup and recent search endpoints that serves recorded
+    fixtures, so the analysis pipeline can be run and load tested without network access. Search results are paged
+    like the recorded responses, with the next_token replaced by the number of the next page, and filtered by the
+    since_id parameter. The fixtures are served as they are when requested, so tests can add replies to a conversation
+    while the server runs.
+
+    :param fixtures:            recorded responses to serve
+    :param latency:             seconds every response is delayed by
+    :param jitter:              maximum extra seconds added at random to the latency
+    :param rate_limit:          number of requests allowed per window on each endpoint, then it responds 429
+    :param rate_limit_window:   length of the rate limit window in seconds
+    :param seed:                random seed of the jitter
+    :param request_counts:      dictionary updated with the number of requests served by each endpoint and the number
+                                of rate limited requests
+    :return:                    the aiohttp application
+    """
+    generator = random.Random(seed)
+    rate_limits = {"lookup": RateLimitWindow(rate_limit, rate_limit_window),
+                   "search": RateLimitWindow(rate_limit, rate_limit_window)}
+    request_counts = request_counts if request_counts is not None else {}
+    request_counts.update({"lookup": 0, "search": 0, "rate_limited": 0})
+
+    async def respond(endpoint, build_response):
+        request_counts[endpoint] += 1
+        await asyncio.sleep(latency + generator.uniform(0.0, jitter))
+
+        allowed, headers = rate_limits[endpoint].consume()
+        if not allowed:
+            request_counts["rate_limited"] += 1
+            return web.json_response({"title": "Too Many Requests", "status": 429}, status=429, headers=headers)
+
+        return web.json_response(build_response(), headers=headers)
+
+    async def tweet_lookup(request):
+        def build_response():
+            tweet_ids = request.query["ids"].split(",")
+            tweets = fixtures.get_tweets(tweet_ids)
+            response = {"data": tweets} if tweets else {}
+
+            found_ids = {tweet["id"] for tweet in tweets}
+            errors = [{"value": tweet_id, "detail": f"Could not find tweet with ids: [{tweet_id}].",
+                       "title": "Not Found Error"} for tweet_id in tweet_ids if tweet_id not in found_ids]
+            if errors:
+                response["errors"] = errors
+
+            return response
+
+        return await respond("lookup", build_response)
+
+    async def search_recent(request):
+        def build_response():
+            pages = fixtures.get_search_pages(request.query["query"])
+            page_number = int(request.query.get("next_token", "0"))
+            if page_number >= len(pages):
+                return {"meta": {"result_count": 0}}
+
+            page = dict(pages[page_number])
+            meta = {key: value for key, value in page.get("meta", {}).items() if key != "next_token"}
+            if page_number + 1 < len(pages):
+                meta["next_token"] = str(page_number + 1)
+            page["meta"] = meta
+
+            # Only return the tweets newer than since_id, like the Twitter API
+            if "since_id" in request.query and "data" in page:
+                page["data"] = [tweet for tweet in page["data"] if int(tweet["id"]) > int(request.query["since_id"])]
+                meta["result_count"] = len(page["data"])
+                if not page["data"]:
+                    del page["data"]
+
+            return page
+
+        return await respond("search", build_response)
+
+    app = web.Application()
+    app.router.add_get("/2/tweets", tweet_lookup)
+    app.router.add_get("/2/tweets/search/recent", search_recent)
+
+    return app
+
+
+class ReplayServer:
+    """
+    Runs the Twitter API replay server on a background thread, so synchronous code such as the TwitterAPIService can
+    be pointed at it in tests and benchmarks:
+
+        with ReplayServer(fixtures) as server:
+            twitter_api_service = TwitterAPIService(bearer_token, base_url=server.base_url)
+    """
+
+    def __init__(self, fixtures, host="127.0.0.1", port=0, **kwargs):
+        """
+        :param fixtures:    recorded responses to serve
+        :param host:        host to listen on
+        :param port:        port to listen on, 0 for any free port
+        :param kwargs:      latency and rate limit settings passed to create_replay_app
+        """
+        self.request_counts = {}
+        self.app = create_replay_app(fixtures, request_counts=self.request_counts, **kwargs)
+        self.host = host
+        self.port = port
+        self.base_url = None
+        self.loop = None
+        self.runner = None
+        self.thread = None
+
+    def __enter__(self):
+        started = threading.Event()
+
+        def serve():
+            self.loop = asyncio.new_event_loop()
+            self.runner = web.AppRunner(self.app)
+            self.loop.run_until_complete(self.runner.setup())
+            site = web.TCPSite(self.runner, self.host, self.port)
+            self.loop.run_until_complete(site.start())
+
+            port = site._server.sockets[0].getsockname()[1]
+            self.base_url = f"http://{self.host}:{port}"
+            started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=serve, daemon=True)
+        self.thread.start()
+        started.wait()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    def get_request_counts(self):
+        """
+        :return:    number of requests served by each endpoint, and number of rate limited requests
+        """
+        return dict(self.request_counts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve recorded Twitter API responses for offline load testing. Point "
+                                                 "the backend at it with TWITTER_API_BASE_URL=http://HOST:PORT")
+    parser.add_argument("fixtures", help="JSON file of the recorded or synthetic fixtures")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every response is delayed by")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum extra seconds of random latency")
+    parser.add_argument("--rate-limit", type=int, default=RATE_LIMIT, help="requests per window on each endpoint")
+    parser.add_argument("--rate-limit-window", type=int, default=RATE_LIMIT_WINDOW, help="window length in seconds")
+    arguments = parser.parse_args()
+
+    web.run_app(create_replay_app(TwitterFixtures.load(arguments.fixtures), latency=arguments.latency,
+                                  jitter=arguments.jitter, rate_limit=arguments.rate_limit,
+                                  rate_limit_window=arguments.rate_limit_window),
+                host=arguments.host, port=arguments.port)
@@ -1,23 +1,168 @@
-from backend.services.tweet_tree_builder_service import TweetTreeBuilder
+import os
+from backend.services.tweet_tree_builder_service import TweetTreeBuilder, BULK_FETCH_WORKERS, BULK_BATCH_SIZE
+from backend.services.tweet_tree_view_service import TweetTreeView
+from backend.services.utils.model_registry import model_registry
+from backend.services.utils.single_flight import SingleFlight
+from backend.services.utils.json_encoder import encode_json
 from backend.services.argumentation_service import ArgumentationAlgorithmService
+from backend.services.vectorized_argumentation_service import VectorizedArgumentationService
+
+# EBS engines, selected with the ARGUMENTATION_ENGINE environment variable
+ITERATIVE_ENGINE = "iterative"      # Walks the tweet tree, the default
+VECTORIZED_ENGINE = "vectorized"    # Evaluates the tweet tree converted to NumPy arrays, for very large trees
+ARGUMENTATION_ENGINES = {ITERATIVE_ENGINE: ArgumentationAlgorithmService,
+                         VECTORIZED_ENGINE: VectorizedArgumentationService}
+
+# Formats of the analyses, the nested tweet tree or the tweet tree as parallel columns
+TREE_FORMAT = "tree"
+COLUMNS_FORMAT = "columns"
+OUTPUT_FORMATS = [TREE_FORMAT, COLUMNS_FORMAT]
+
+# Last event of a streamed analysis, with the argumentation model
+MODEL_EVENT = "model"
+
+# Seconds the analysis of a tweet is reused for, set with the ANALYSIS_CACHE_SECONDS environment variable
+ANALYSIS_CACHE_SECONDS = 60.0
+
+# Seconds and number of analysed tweet trees kept for their views, set with the ANALYSIS_VIEW_SECONDS and
+# ANALYSIS_VIEWS environment variables
+ANALYSIS_VIEW_SECONDS = 600.0
+ANALYSIS_VIEWS = 20
 
 
 class TweetAnalyzerController:
     """
     Controller class for the API to prevent business logic from leaking to the API later.
     Composes and orchestrates the services required to produce the argumentation models.
+    Concurrent analyses of the same tweet share a single computation, and its result is reused for a short while.
     """
 
-    def analyze_tweet(self, tweet_id):
+    def __init__(self, analysis_cache_seconds=None):
+        """
+        :param analysis_cache_seconds:  seconds the analysis of a tweet is reused for, defaults to the
+                                        ANALYSIS_CACHE_SECONDS environment variable, 0 to only share the concurrent
+                                        analyses
+        """
+        if analysis_cache_seconds is None:
+            analysis_cache_seconds = float(os.getenv("ANALYSIS_CACHE_SECONDS", ANALYSIS_CACHE_SECONDS))
+        self.analyses = SingleFlight(ttl_seconds=analysis_cache_seconds)
+        self.views = SingleFlight(ttl_seconds=float(os.getenv("ANALYSIS_VIEW_SECONDS", ANALYSIS_VIEW_SECONDS)),
+                                  max_results=int(os.getenv("ANALYSIS_VIEWS", ANALYSIS_VIEWS)))
+
+    def _get_argumentation_service_class(self, argumentation_engine):
+        argumentation_engine = argumentation_engine or os.getenv("ARGUMENTATION_ENGINE", ITERATIVE_ENGINE).lower()
+        if argumentation_engine not in ARGUMENTATION_ENGINES:
+            raise ValueError(f"Unknown argumentation engine {argumentation_engine!r}, the engines are: "
+                             f"{', '.join(ARGUMENTATION_ENGINES)}")
+
+        return argumentation_engine, ARGUMENTATION_ENGINES[argumentation_engine]
+
+    def analyze_tweet(self, tweet_id, argumentation_engine=None, encoded=False, output_format=TREE_FORMAT):
         """
         Given an input tweet, it will generate and return the final computed argumentation model,
         metrics and analysis
 
-        :param tweet_id:    tweet id to analyse
-        :return:            the argumentation model, metrics and analysis
+        :param tweet_id:                tweet id to analyse
+        :param argumentation_engine:    name of the EBS engine, defaults to the ARGUMENTATION_ENGINE environment
+                                        variable
+        :param encoded:                 whether to return the analysis encoded as JSON bytes, ready to be sent
+        :param output_format:           TREE_FORMAT for the nested tweet tree of TweetTree.get_json, COLUMNS_FORMAT
+                                        for the columns of TweetTree.get_columns
+        :return:                        the argumentation model, metrics and analysis
+        """
+        argumentation_engine, argumentation_service_class = self._get_argumentation_service_class(argumentation_engine)
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format!r}, the formats are: {', '.join(OUTPUT_FORMATS)}")
+
+        return self.analyses.do((str(tweet_id), argumentation_engine, encoded, output_format), self._analyze_tweet,
+                                tweet_id, argumentation_service_class, encoded, output_format)
+
+    def stream_analysis(self, tweet_id, argumentation_engine=None):
+        """
+        Given an input tweet, it will generate the tweets of its tweet tree as they are fetched and classified, then
+        the final computed argumentation model, metrics and analysis
+
+        :param tweet_id:                tweet id to analyse
+        :param argumentation_engine:    name of the EBS engine, defaults to the ARGUMENTATION_ENGINE environment
+                                        variable
+        :return:                        generator of (event, data) pairs, the tweet tree events of the
+                                        TweetTreeBuilder then a MODEL_EVENT with the argumentation model
+        """
+        _, argumentation_service_class = self._get_argumentation_service_class(argumentation_engine)
+
+        tweet_tree = yield from TweetTreeBuilder.stream_tweet_tree(tweet_id)
+
+        yield MODEL_EVENT, self._evaluate_tweet_tree(tweet_tree, argumentation_service_class)
+
+    def analyze_tweets(self, tweet_ids, argumentation_engine=None, max_workers=BULK_FETCH_WORKERS,
+                       batch_size=BULK_BATCH_SIZE):
+        """
+        Given many input tweets, e.g. for a nightly analysis, it will generate the final computed argumentation model,
+        metrics and analysis of each. The conversations are fetched concurrently and the replies of batch_size
+        tweets are classified together.
+
+        :param tweet_ids:               tweet ids to analyse
+        :param argumentation_engine:    name of the EBS engine, defaults to the ARGUMENTATION_ENGINE environment
+                                        variable
+        :param max_workers:             number of tweets whose conversations are fetched at the same time
+        :param batch_size:              number of tweets whose replies are classified together
+        :return:                        generator of (tweet id, analysis, error) triples in the order of the ids, the
+                                        analysis is None and the error the exception raised if the analysis failed
+        """
+        _, argumentation_service_class = self._get_argumentation_service_class(argumentation_engine)
+
+        for tweet_id, tweet_tree, error in TweetTreeBuilder.build_tweet_trees(list(tweet_ids), max_workers,
+                                                                              batch_size):
+            analysis = None
+            if error is None:
+                try:
+                    analysis = self._evaluate_tweet_tree(tweet_tree, argumentation_service_class)
+                except Exception as evaluation_error:
+                    error = evaluation_error
+
+            yield tweet_id, analysis, error
+
+    def get_analysis_view(self, tweet_id, argumentation_engine=None):
+        """
+        Given an input tweet, it will compute the argumentation model once and keep it server-side, so it can be
+        viewed down to a depth and paged through
+
+        :param tweet_id:                tweet id to analyse
+        :param argumentation_engine:    name of the EBS engine, defaults to the ARGUMENTATION_ENGINE environment
+                                        variable
+        :return:                        the TweetTreeView of the analysed tweet tree
         """
-        # Create the tweet tree and metrics
+        argumentation_engine, argumentation_service_class = self._get_argumentation_service_class(argumentation_engine)
+
+        return self.views.do((str(tweet_id), argumentation_engine), self._create_analysis_view, tweet_id,
+                             argumentation_service_class)
+
+    def _create_analysis_view(self, tweet_id, argumentation_service_class):
         tweet_tree = TweetTreeBuilder(tweet_id).get_tweet_tree()
+        self._compute_argumentation(tweet_tree, argumentation_service_class)
+
+        return TweetTreeView(tweet_tree)
+
+    def _analyze_tweet(self, tweet_id, argumentation_service_class, encoded, output_format):
+        # Create the tweet tree
+        tweet_tree = TweetTreeBuilder(tweet_id).get_tweet_tree()
+
+        return self._evaluate_tweet_tree(tweet_tree, argumentation_service_class, encoded, output_format)
+
+    def _evaluate_tweet_tree(self, tweet_tree, argumentation_service_class, encoded=False, output_format=TREE_FORMAT):
+        self._compute_argumentation(tweet_tree, argumentation_service_class)
+
+        # Encode the output as JSON and return
+        if output_format == COLUMNS_FORMAT:
+            data = tweet_tree.get_columns()
+            return encode_json(data) if encoded else data
+
+        data = tweet_tree.get_json_bytes() if encoded else tweet_tree.get_json()
+
+        return data
+
+    @staticmethod
+    def _compute_argumentation(tweet_tree, argumentation_service_class):
         tweet_tree_metrics = tweet_tree.get_tweet_tree_metrics()
 
         root_node = tweet_tree.get_tree().nodes[tweet_tree.get_root()]
@@ -26,15 +171,37 @@ class TweetAnalyzerController:
         max_score = tweet_tree.get_tweet_tree_metrics().get_max_public_metrics()
         min_score = tweet_tree.get_tweet_tree_metrics().get_min_public_metrics()
 
-        argumentation_service = ArgumentationAlgorithmService(max_score, min_score, tweet_tree.get_tree(), tweet_tree_metrics)
+        argumentation_service = argumentation_service_class(max_score, min_score, tweet_tree.get_tree(),
+                                                            tweet_tree_metrics)
 
         root_argument_score = argumentation_service.acceptability_degree(root_node)
         tweet_tree.metrics.set_root_tweet_argument_strength(root_argument_score)
 
-        # Encode the output as JSON and return
-        data = tweet_tree.get_json()
+    def get_stats(self):
+        """
+        :return:    number of analyses computed, shared with a concurrent analysis of the same tweet or reused
+        """
+        return self.analyses.get_stats()
 
-        return data
+
+def warm_up_worker():
+    """
+    Loads every model once when an analysis worker process starts, so they stay resident for all its jobs. Set
+    WARM_UP_MODELS to false to load them on the first job instead.
+    """
+    if os.getenv("WARM_UP_MODELS", "true").lower() == "true":
+        model_registry.warm_up()
+
+
+def analyze_tweet_job(tweet_id):
+    """
+    Analyses a tweet in an analysis worker process
+
+    :param tweet_id:    tweet id to analyse
+    :return:            the argumentation model, metrics and analysis
+    """
+    # The job queue already shares the running analyses of a tweet, and a new controller is created for every job
+    return TweetAnalyzerController(analysis_cache_seconds=0).analyze_tweet(tweet_id)
 
 
 if __name__ == "__main__":
@@ -37,6 +37,72 @@ class ArgumentationAlgorithmService:
 
         return normalized_score
 
+    def acceptability_degrees(self, tweet):
+        """
+        Computes the EBS acceptability degree of a tweet node and of every argument below it, each exactly once. The
+        tree is walked iteratively in post-order (children before their parent), so threads of any depth are
+        supported without hitting the recursion limit. The degree of every argument is also stored in its
+        "acceptability" attribute, and the strongest argument is set once at the end.
+
+        :param tweet:   input tweet node of the tree to compute acceptability degree using EBS
+        :return:        mapping from tweet id to acceptability degree, 0.0 for the non-argumentative tweets
+        """
+        nodes = self.tweet_tree.nodes
+        successors = self.tweet_tree.successors
+        tweet_id = tweet["attributes"]["id"]
+
+        if tweet["attributes"]["argumentative_type"] == "neutral":
+            # The tweet is non-argumentative, hence, should not be included in the algorithm
+            return {tweet_id: 0.0}
+
+        degrees = {}
+        strongest_argument_id = tweet_id
+        strongest_argument_degree = -1.0
+
+        # Each frame of the stack replaces a recursive call: [tweet id, tweet, iterator over its children,
+        # supporters score, attackers score]. A tweet is evaluated once its children iterator is exhausted, in the
+        # same order as the recursion, and only the frames of the current reply chain are kept in memory
+        stack = [[tweet_id, tweet, successors(tweet_id), 0.0, 0.0]]
+        while stack:
+            frame = stack[-1]
+
+            for child_tweet_id in frame[2]:
+                child_tweet = nodes[child_tweet_id]
+                if child_tweet["attributes"]["argumentative_type"] == "neutral":
+                    # The tweet is non-argumentative, hence, should not be included in the algorithm
+                    degrees[child_tweet_id] = 0.0
+                    continue
+
+                stack.append([child_tweet_id, child_tweet, successors(child_tweet_id), 0.0, 0.0])
+                break
+            else:
+                # Run the EBS algorithm as normal, it is practically a 1:1 mapping from here
+                stack.pop()
+                tweet_id, current_tweet, _, supporters_score, attackers_score = frame
+
+                strength_child = supporters_score - attackers_score
+                base_strength = self._base_strength(current_tweet)
+                degree = 1 - ((1 - base_strength ** 2) / (1 + (base_strength * (2 ** strength_child))))
+                current_tweet["attributes"]["acceptability"] = degree
+
+                degrees[tweet_id] = degree
+
+                # The first argument with the highest degree, in evaluation order, is the strongest
+                if degree > strongest_argument_degree:
+                    strongest_argument_id = tweet_id
+                    strongest_argument_degree = degree
+
+                # Add the degree to the supporters or attackers score of the parent
+                if stack:
+                    if current_tweet["attributes"]["argumentative_type"] == "support":
+                        stack[-1][3] += degree
+                    else:
+                        stack[-1][4] += degree
+
+        self.tweet_tree_metrics.set_strongest_argument_id(strongest_argument_id, strongest_argument_degree)
+
+        return degrees
+
     def acceptability_degree(self, tweet):
         """
         Computes the EBS acceptability degree of a tweet node that represents the strength of an argument
@@ -48,27 +114,7 @@ class ArgumentationAlgorithmService:
             # The tweet is non-argumentative, hence, should not be included in the algorithm
             return 0.0
 
-        # Run the EBS algorithm as normal, it is practically a 1:1 mapping from here
-        supporters_score = 0.0
-        attackers_score = 0.0
-
-        for child_tweet_id in self.tweet_tree.successors(tweet["attributes"]["id"]):
-            child_tweet = self.tweet_tree.nodes[child_tweet_id]
-            score = self.acceptability_degree(child_tweet)
-
-            if child_tweet["attributes"]["argumentative_type"] == "support":
-                supporters_score += score
-            else:
-                attackers_score += score
-
-        strength_child = supporters_score - attackers_score
-        degree = 1 - (
-                    (1 - self._base_strength(tweet) ** 2) / (1 + (self._base_strength(tweet) * (2 ** strength_child))))
-        tweet["attributes"]["acceptability"] = degree
-
-        self.tweet_tree_metrics.set_strongest_argument_id(tweet["attributes"]["id"], degree)
-
-        return degree
+        return self.acceptability_degrees(tweet)[tweet["attributes"]["id"]]
 
 
 if __name__ == "__main__":
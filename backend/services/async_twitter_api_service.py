@@ -0,0 +1,168 @@
+import os
+import asyncio
+import aiohttp
+from twarc.expansions import flatten
+
+from backend.services.twitter_api_service import TwitterResponseParser
+from backend.services.utils.twitter_client import TWITTER_API_BASE_URL, RATE_LIMITED_SECONDS
+from backend.services.utils.rate_limit_scheduler import ROOT_PRIORITY, RELATED_PRIORITY, RateLimitExceeded, \
+    twitter_rate_limit_scheduler
+
+
+class AsyncTwitterAPIService(TwitterResponseParser):
+    """
+    Asynchronous variant of the TwitterAPIService, returning exactly the same tweets. Requests go through a single
+    pooled HTTP session and at most max_concurrency of them are in flight at once, so the root tweet, the root
+    conversation and every related conversation can be fetched concurrently without flooding the API. Like the
+    synchronous client, every request first waits for the rate limit scheduler shared by the process, and a 429
+    response goes back to the scheduler, so the request waits for the quota or is shed like any other.
+
+    The HTTP session is bound to the event loop, so the service must be used as an async context manager:
+
+        async with AsyncTwitterAPIService(bearer_token) as twitter_api_service:
+            tweet, conversation_thread = await twitter_api_service.get_tweet_and_conversation_thread(tweet_id)
+    """
+
+    def __init__(self, bearer_token, base_url=None, max_concurrency=None, scheduler=None):
+        """
+        :param bearer_token:    Twitter API bearer token
+        :param base_url:        base URL of the Twitter API, defaults to the TWITTER_API_BASE_URL environment variable,
+                                e.g. to point the service at a local stand-in server
+        :param max_concurrency: maximum number of requests in flight, defaults to the TWITTER_API_MAX_CONCURRENCY
+                                environment variable
+        :param scheduler:       rate limit scheduler, defaults to the one shared by the process
+        """
+        self.bearer_token = bearer_token
+        self.base_url = (base_url or os.getenv("TWITTER_API_BASE_URL", TWITTER_API_BASE_URL)).rstrip("/")
+        self.max_concurrency = max_concurrency or int(os.getenv("TWITTER_API_MAX_CONCURRENCY", "8"))
+        self.scheduler = scheduler or twitter_rate_limit_scheduler
+        self.rate_limit_wait_seconds = 0.0  # Seconds this service's requests waited for the rate limit quota
+        self.session = None
+        self.semaphore = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        self.session = aiohttp.ClientSession(connector=connector,
+                                             headers={"Authorization": f"Bearer {self.bearer_token}"})
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.session.close()
+        self.session = None
+        self.semaphore = None
+
+    async def _get(self, path, params, priority=ROOT_PRIORITY):
+        while True:
+            self.rate_limit_wait_seconds += await self.scheduler.acquire_async(path, priority)
+
+            async with self.semaphore:
+                async with self.session.get(f"{self.base_url}{path}", params=params) as response:
+                    self.scheduler.update(path, response.headers)
+                    if response.status != 429:
+                        response.raise_for_status()
+                        return await response.json()
+
+            # The quota is used up, e.g. by another client of the same app, wait for it like any other request, or be
+            # shed by the scheduler
+            now = self.scheduler.clock()
+            reset = float(response.headers.get("x-rate-limit-reset", 0))
+            self.scheduler.exhaust(path, reset if reset > now else now + RATE_LIMITED_SECONDS)
+
+    async def _get_pages(self, path, params, max_results=None, priority=ROOT_PRIORITY):
+        # Follow the next_token of every page, like twarc does, until the results run out or enough were fetched
+        pages = []
+        result_count = 0
+        while True:
+            page = await self._get(path, params, priority)
+            pages.append(page)
+            result_count += page.get("meta", {}).get("result_count", 0)
+
+            next_token = page.get("meta", {}).get("next_token")
+            if next_token is None or (max_results is not None and result_count >= max_results):
+                return pages
+
+            params = {**params, "next_token": next_token}
+
+    def _flatten(self, page):
+        # Pages without results have no data, and the referenced tweets are only included if there are any
+        return flatten(page) if "data" in page else []
+
+    async def get_tweet(self, tweet_id):
+        # Fetch tweet from Twitter API
+        params = {"ids": tweet_id, "tweet.fields": "public_metrics"}
+        tweet_lookup = await self._get("/2/tweets", params)
+
+        # Parse the tweet
+        parsed_tweet = self._parse_tweet(tweet_lookup['data'][0])
+
+        return parsed_tweet
+
+    async def get_conversation_thread(self, conversation_id, priority=ROOT_PRIORITY, since_id=None):
+        # Query Twitter API for the conversation thread using conversation_id, only allow English results. The
+        # referenced tweets are expanded so every reply carries the text of the tweet it replies to
+        # Only the replies newer than since_id are fetched when it is given, e.g. to follow a live conversation
+        params = {"query": f"conversation_id: {conversation_id} lang:en",
+                  "tweet.fields": "in_reply_to_user_id,public_metrics,referenced_tweets",
+                  "expansions": "referenced_tweets.id",
+                  "max_results": 100}
+        if since_id is not None:
+            params["since_id"] = since_id
+        pages = await self._get_pages("/2/tweets/search/recent", params, priority=priority)
+
+        # Parse the output to a list
+        conversation_thread = [self._parse_tweet_reply(tweet) for page in pages for tweet in self._flatten(page)]
+        conversation_thread.sort(key=lambda x: x["id"])
+
+        return conversation_thread
+
+    async def get_tweets_from_keyword(self, keyword, number_of_tweets=15):
+        # Query the Twitter API for (default 15) tweets that discuss a certain keyword
+        # The tweet must be original, not a retweet, a reply or quote
+        params = {"query": f"{keyword} lang:en -is:retweet -is:reply -is:quote",
+                  "tweet.fields": "id,text,public_metrics",
+                  "max_results": number_of_tweets}
+        pages = await self._get_pages("/2/tweets/search/recent", params, max_results=number_of_tweets,
+                                      priority=RELATED_PRIORITY)
+
+        # Parse the tweets
+        tweets = [self._parse_tweet_keyword(tweet) for page in pages for tweet in self._flatten(page)]
+
+        return tweets[:number_of_tweets]
+
+    async def get_tweet_and_conversation_thread(self, tweet_id):
+        """
+        Fetches a tweet and its conversation thread concurrently
+
+        :param tweet_id:    id of the tweet, which is also the id of its conversation
+        :return:            the tweet and its conversation thread
+        """
+        tweet, conversation_thread = await asyncio.gather(self.get_tweet(tweet_id),
+                                                          self.get_conversation_thread(tweet_id))
+
+        return tweet, conversation_thread
+
+    async def get_conversation_threads(self, conversation_ids, priority=ROOT_PRIORITY):
+        """
+        Fetches several conversation threads concurrently, bounded by the maximum number of requests in flight
+
+        :param conversation_ids:    ids of the conversations
+        :param priority:            priority of the requests for the rate limit scheduler
+        :return:                    the conversation threads, in the same order as the ids, None for the conversations
+                                    whose requests were shed by the rate limit scheduler
+        """
+        conversation_threads = await asyncio.gather(*[self.get_conversation_thread(conversation_id, priority)
+                                                      for conversation_id in conversation_ids],
+                                                    return_exceptions=True)
+
+        for conversation_thread in conversation_threads:
+            if isinstance(conversation_thread, Exception) and not isinstance(conversation_thread, RateLimitExceeded):
+                raise conversation_thread
+
+        return [None if isinstance(conversation_thread, RateLimitExceeded) else conversation_thread
+                for conversation_thread in conversation_threads]
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,266 @@
+import os
+import copy
+import time
+import threading
+from dotenv import load_dotenv
+
+from backend.services.twitter_api_service import TwitterAPIService
+from backend.services.tweet_tree_builder_service import TweetTreeBuilder, REPLY_EDGE_COLOR, RELATED_EDGE_COLOR
+from backend.services.incremental_argumentation_service import IncrementalArgumentationService
+from backend.services.utils.rate_limit_scheduler import ROOT_PRIORITY, RELATED_PRIORITY, RateLimitExceeded
+
+# Seconds between two polls of the tracked conversations, set with the TRACKER_POLL_SECONDS environment variable
+POLL_SECONDS = 60.0
+
+
+class TrackedConversation:
+    """
+    State of a tracked tweet: its live tweet tree, the service keeping its degrees up to date, the newest tweet seen
+    in each of its conversations and a snapshot of the last argumentation model computed
+    """
+
+    def __init__(self, tweet_tree, argumentation_service, since_ids):
+        """
+        :param tweet_tree:              the TweetTree of the tweet, updated in place
+        :param argumentation_service:   the IncrementalArgumentationService of the tweet tree
+        :param since_ids:               mapping from the id of each conversation of the tree, the tweet and its
+                                        related tweets, to the id of its newest tweet, only newer replies are fetched
+        """
+        self.tweet_tree = tweet_tree
+        self.argumentation_service = argumentation_service
+        self.since_ids = since_ids
+        # Only one poll updates the tweet tree at a time
+        self.update_lock = threading.Lock()
+        self.model = None
+        self.number_of_tweets = 0
+        self.polls = 0
+        self.poll_errors = 0
+        self.updated_at = None
+
+    def create_model(self):
+        # Snapshot the model, as the node attributes of the JSON are shared with the tweet tree updated by the polls
+        return copy.deepcopy(self.tweet_tree.get_json()), self.tweet_tree.get_tree().number_of_nodes()
+
+    def set_model(self, model, number_of_tweets):
+        self.model = model
+        self.number_of_tweets = number_of_tweets
+        self.updated_at = time.time()
+
+    def get_status(self):
+        return {"since_ids": dict(self.since_ids),
+                "number_of_tweets": self.number_of_tweets,
+                "polls": self.polls,
+                "poll_errors": self.poll_errors,
+                "updated_at": self.updated_at}
+
+
+def _get_since_ids(tweet_tree):
+    """
+    :param tweet_tree:  a TweetTree built by the TweetTreeBuilder
+    :return:            mapping from the id of each conversation of the tree to the id of its newest tweet
+    """
+    # The related tweets are attached to the root tweet with related edges, each starts its own conversation
+    tree = tweet_tree.get_tree()
+    root_id = tweet_tree.get_root()
+    conversation_ids = [root_id] + [related_tweet_id for related_tweet_id in tree.successors(root_id)
+                                    if tree.edges[root_id, related_tweet_id]["color"] == RELATED_EDGE_COLOR]
+
+    since_ids = {}
+    for conversation_id in conversation_ids:
+        # Only follow the reply edges, so the root conversation does not include the related conversations
+        since_id = conversation_id
+        tweet_ids = [conversation_id]
+        while tweet_ids:
+            tweet_id = tweet_ids.pop()
+            since_id = max(since_id, tweet_id, key=int)
+            tweet_ids.extend(reply_id for reply_id in tree.successors(tweet_id)
+                             if tree.edges[tweet_id, reply_id]["color"] == REPLY_EDGE_COLOR)
+        since_ids[conversation_id] = since_id
+
+    return since_ids
+
+
+class ConversationTracker:
+    """
+    Service that follows live conversations. Every tracked tweet is analysed once, then its conversation and the
+    conversations of its related tweets are polled for the replies newer than the newest tweet seen in each of them.
+    The since_id of a conversation only moves forward once its replies are added, so a conversation whose request is
+    shed by the rate limit scheduler catches up on the next poll. Only the new replies are classified and scored,
+    along their path to the root, and a snapshot of the argumentation model is kept so reading it does not compute
+    anything or wait for a poll. The public metrics of the tweets already in the tree are not refreshed by the polls.
+    """
+
+    def __init__(self, twitter_api_service=None, poll_seconds=None):
+        """
+        :param twitter_api_service: the TwitterAPIService used to poll the conversations, created on first use by
+                                    default, so it uses the TWITTER_API_BASE_URL set at that time
+        :param poll_seconds:        seconds between two polls, defaults to the TRACKER_POLL_SECONDS environment
+                                    variable
+        """
+        self.twitter_api_service = twitter_api_service
+        self.poll_seconds = poll_seconds or float(os.getenv("TRACKER_POLL_SECONDS", POLL_SECONDS))
+        self.conversations = {}
+        # Guards the tracked tweets and their snapshots, it is never held while a tweet tree is updated
+        self.lock = threading.RLock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def _get_twitter_api_service(self):
+        if self.twitter_api_service is None:
+            load_dotenv()
+            self.twitter_api_service = TwitterAPIService(os.getenv("TWITTER_API_KEY"))
+
+        return self.twitter_api_service
+
+    def track(self, tweet_id):
+        """
+        Analyses a tweet and starts tracking its conversations, a tweet already tracked is not analysed again
+
+        :param tweet_id:    id of the tweet to track
+        :return:            the argumentation model of the tweet
+        """
+        tweet_id = str(tweet_id)
+        with self.lock:
+            if tweet_id in self.conversations:
+                return self.conversations[tweet_id].model
+
+        tweet_tree = TweetTreeBuilder(tweet_id).get_tweet_tree()
+        argumentation_service = IncrementalArgumentationService(tweet_tree)
+        argumentation_service.evaluate()
+
+        conversation = TrackedConversation(tweet_tree, argumentation_service, _get_since_ids(tweet_tree))
+        conversation.set_model(*conversation.create_model())
+        with self.lock:
+            conversation = self.conversations.setdefault(tweet_id, conversation)
+
+        return conversation.model
+
+    def untrack(self, tweet_id):
+        """
+        :param tweet_id:    id of the tweet to stop tracking
+        :return:            whether the tweet was tracked
+        """
+        with self.lock:
+            return self.conversations.pop(str(tweet_id), None) is not None
+
+    def is_tracked(self, tweet_id):
+        with self.lock:
+            return str(tweet_id) in self.conversations
+
+    def poll(self, tweet_id):
+        """
+        Fetches the new replies of the conversations of a tracked tweet and adds them to its tweet tree
+
+        :param tweet_id:    id of the tracked tweet
+        :return:            number of replies added to the tweet tree
+        """
+        with self.lock:
+            conversation = self.conversations[str(tweet_id)]
+
+        twitter_api_service = self._get_twitter_api_service()
+        with conversation.update_lock:
+            new_replies = []
+            since_ids = {}
+            for conversation_id, since_id in conversation.since_ids.items():
+                # The related conversations are polled with a lower priority, and keep their since_id until the next
+                # poll when the rate limit scheduler sheds their requests
+                priority = ROOT_PRIORITY if conversation_id == conversation.tweet_tree.get_root() else RELATED_PRIORITY
+                try:
+                    conversation_thread = twitter_api_service.get_conversation_thread(conversation_id,
+                                                                                      priority=priority,
+                                                                                      since_id=since_id)
+                except RateLimitExceeded:
+                    continue
+
+                new_replies.extend(conversation_thread)
+                since_ids[conversation_id] = max([since_id] + [reply["id"] for reply in conversation_thread], key=int)
+
+            # The replies are classified and scored without the lock, reads get the last snapshot meanwhile
+            model = None
+            number_of_tweets = conversation.number_of_tweets
+            if new_replies:
+                conversation.argumentation_service.add_replies(sorted(new_replies, key=lambda reply: int(reply["id"])))
+                conversation.tweet_tree.get_tweet_tree_metrics().compute_sentiment_towards_root()
+                model, number_of_tweets = conversation.create_model()
+
+            with self.lock:
+                added_replies = number_of_tweets - conversation.number_of_tweets
+                conversation.since_ids.update(since_ids)
+                conversation.polls += 1
+                if model is not None:
+                    conversation.set_model(model, number_of_tweets)
+
+        return added_replies
+
+    def poll_all(self):
+        """
+        Polls every tracked tweet, a failing poll is counted and retried on the next poll
+
+        :return:    number of replies added to the tweet tree of each tracked tweet
+        """
+        with self.lock:
+            tweet_ids = list(self.conversations)
+
+        added_replies = {}
+        for tweet_id in tweet_ids:
+            try:
+                added_replies[tweet_id] = self.poll(tweet_id)
+            except KeyError:
+                # The tweet was untracked meanwhile
+                continue
+            except Exception:
+                with self.lock:
+                    if tweet_id in self.conversations:
+                        self.conversations[tweet_id].poll_errors += 1
+
+        return added_replies
+
+    def get_model(self, tweet_id):
+        """
+        :param tweet_id:    id of a tracked tweet
+        :return:            the latest argumentation model of the tweet, None if it is not tracked
+        """
+        with self.lock:
+            conversation = self.conversations.get(str(tweet_id))
+
+            return conversation.model if conversation is not None else None
+
+    def get_status(self, tweet_id):
+        """
+        :param tweet_id:    id of a tracked tweet
+        :return:            newest tweet seen, size of the tweet tree and poll counters of the tweet, None if it is not
+                            tracked
+        """
+        with self.lock:
+            conversation = self.conversations.get(str(tweet_id))
+
+            return conversation.get_status() if conversation is not None else None
+
+    def start(self):
+        """
+        Starts polling the tracked tweets every poll_seconds on a background thread, if it is not running yet
+        """
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while not self.stopped.wait(self.poll_seconds):
+            self.poll_all()
+
+    def stop(self):
+        """
+        Stops the background polling, the tracked tweets are kept
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+
+if __name__ == "__main__":
+    pass
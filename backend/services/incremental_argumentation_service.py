@@ -0,0 +1,195 @@
+from backend.services.argumentation_service import ArgumentationAlgorithmService
+
+
+class IncrementalArgumentationService(ArgumentationAlgorithmService):
+    """
+    Service that keeps the EBS acceptability degrees of a live tweet tree up to date as replies are added, removed
+    or their public metrics change. Only the degrees on the path from the changed tweet to the root are recomputed,
+    each from the supporters and attackers scores of its replies, which are kept up to date by adding the change of
+    degree of the reply rather than summing all the replies again. The whole tree is only evaluated again when the
+    max or min public metrics of the tree change, as they change the base strength of every tweet. The tree is
+    evaluated once with evaluate before it is updated.
+    """
+
+    def __init__(self, tweet_tree):
+        """
+        Constructor of the service
+
+        :param tweet_tree:  the TweetTree to keep the degrees of up to date, its metrics are updated in place
+        """
+        metrics = tweet_tree.get_tweet_tree_metrics()
+        super().__init__(metrics.get_max_public_metrics(), metrics.get_min_public_metrics(), tweet_tree.get_tree(),
+                         metrics)
+        self.live_tweet_tree = tweet_tree
+        self.scores = {}  # Supporters and attackers scores of the tweets, computed the first time they are needed
+        self.strongest_argument_weakened = False
+
+    def evaluate(self):
+        """
+        Evaluates the whole tree, and sets the root tweet argument strength and strongest argument of the metrics
+
+        :return:    acceptability degree of the root tweet
+        """
+        self.max_score = self.tweet_tree_metrics.get_max_public_metrics()
+        self.min_score = self.tweet_tree_metrics.get_min_public_metrics()
+        self.tweet_tree = self.live_tweet_tree.get_tree()
+        self.scores = {}
+        self.strongest_argument_weakened = False
+
+        self.tweet_tree_metrics.reset_strongest_argument()
+        root_argument_score = self.acceptability_degree(self.tweet_tree.nodes[self.live_tweet_tree.get_root()])
+        self.tweet_tree_metrics.set_root_tweet_argument_strength(root_argument_score)
+
+        return root_argument_score
+
+    def _public_metrics_changed(self):
+        return (self.max_score != self.tweet_tree_metrics.get_max_public_metrics() or
+                self.min_score != self.tweet_tree_metrics.get_min_public_metrics())
+
+    def _get_scores(self, tweet_id):
+        """
+        :param tweet_id:    id of an evaluated tweet
+        :return:            supporters and attackers scores of the tweet, from the degrees of its replies
+        """
+        scores = self.scores.get(tweet_id)
+        if scores is None:
+            scores = [0.0, 0.0]
+            for child_tweet_id in self.tweet_tree.successors(tweet_id):
+                child_tweet = self.tweet_tree.nodes[child_tweet_id]["attributes"]
+                if "acceptability" not in child_tweet:
+                    # Non-argumentative replies are not evaluated
+                    continue
+
+                if child_tweet["argumentative_type"] == "support":
+                    scores[0] += child_tweet["acceptability"]
+                else:
+                    scores[1] += child_tweet["acceptability"]
+            self.scores[tweet_id] = scores
+
+        return scores
+
+    def _is_evaluated(self, tweet_id):
+        # A tweet is evaluated if it is the root or if the tweet it replies to is an evaluated argument
+        tweet_parent_id = self.live_tweet_tree.get_parent(tweet_id)
+        return tweet_parent_id is None or "acceptability" in self.tweet_tree.nodes[tweet_parent_id]["attributes"]
+
+    def _update_strongest_argument(self, tweet_id, previous_degree, degree):
+        if degree > self.tweet_tree_metrics.strongest_argument_score:
+            self.tweet_tree_metrics.set_strongest_argument_id(tweet_id, degree)
+        elif tweet_id == self.tweet_tree_metrics.strongest_argument_id and previous_degree is not None and \
+                degree < previous_degree:
+            # Another argument may be stronger now, it is searched for once the update is complete
+            self.strongest_argument_weakened = True
+
+    def _find_strongest_argument(self):
+        self.tweet_tree_metrics.reset_strongest_argument()
+        for tweet_id, tweet in self.tweet_tree.nodes(data="attributes"):
+            if "acceptability" in tweet:
+                self.tweet_tree_metrics.set_strongest_argument_id(tweet_id, tweet["acceptability"])
+        self.strongest_argument_weakened = False
+
+    def _rescore(self, tweet_id):
+        """
+        Recomputes the acceptability degree of a tweet, and of the tweets on the path to the root as long as the
+        degrees change
+
+        :param tweet_id:    id of the tweet whose base strength or replies changed
+        """
+        while tweet_id is not None:
+            tweet = self.tweet_tree.nodes[tweet_id]["attributes"]
+            if tweet["argumentative_type"] == "neutral" or not self._is_evaluated(tweet_id):
+                # The tweet is non-argumentative, or below one, hence, is not included in the algorithm
+                return
+
+            supporters_score, attackers_score = self._get_scores(tweet_id)
+            strength_child = supporters_score - attackers_score
+            base_strength = self._base_strength({"attributes": tweet})
+            degree = 1 - ((1 - base_strength ** 2) / (1 + (base_strength * (2 ** strength_child))))
+
+            previous_degree = tweet.get("acceptability")
+            tweet["acceptability"] = degree
+            self._update_strongest_argument(tweet_id, previous_degree, degree)
+
+            tweet_parent_id = self.live_tweet_tree.get_parent(tweet_id)
+            if tweet_parent_id is None:
+                self.tweet_tree_metrics.set_root_tweet_argument_strength(degree)
+                return
+            if degree == previous_degree:
+                return
+
+            self._add_to_scores(tweet_parent_id, tweet["argumentative_type"], degree - (previous_degree or 0.0))
+            tweet_id = tweet_parent_id
+
+    def _add_to_scores(self, tweet_id, argumentative_type, degree_change):
+        # Scores not computed yet will be computed from the updated degrees of the replies
+        scores = self.scores.get(tweet_id)
+        if scores is not None:
+            scores[0 if argumentative_type == "support" else 1] += degree_change
+
+    def _complete_update(self):
+        if self.strongest_argument_weakened:
+            self._find_strongest_argument()
+
+        return self.tweet_tree_metrics.root_tweet_argument_strength
+
+    def add_replies(self, conversation_thread):
+        """
+        Adds the replies of a conversation thread to the tree and evaluates them
+
+        :param conversation_thread: new replies of the conversations of the tree
+        :return:                    acceptability degree of the root tweet
+        """
+        added_tweet_ids = self.live_tweet_tree.add_replies(conversation_thread)
+        if self._public_metrics_changed():
+            return self.evaluate()
+
+        # Every reply is added after the tweet it replies to, which is then already evaluated
+        for tweet_id in added_tweet_ids:
+            self._rescore(tweet_id)
+
+        return self._complete_update()
+
+    def remove_tweet(self, tweet_id):
+        """
+        Removes a tweet and the replies below it from the tree, and evaluates the tweet it replied to again
+
+        :param tweet_id:    id of the tweet to remove
+        :return:            acceptability degree of the root tweet
+        """
+        tweet = self.tweet_tree.nodes[tweet_id]["attributes"]
+        tweet_parent_id = self.live_tweet_tree.get_parent(tweet_id)
+        removed_tweet_ids = self.live_tweet_tree.remove_tweet(tweet_id)
+        for removed_tweet_id in removed_tweet_ids:
+            self.scores.pop(removed_tweet_id, None)
+        if self.tweet_tree_metrics.strongest_argument_id in removed_tweet_ids:
+            self.strongest_argument_weakened = True
+
+        if self._public_metrics_changed():
+            return self.evaluate()
+
+        if "acceptability" in tweet:
+            self._add_to_scores(tweet_parent_id, tweet["argumentative_type"], -tweet["acceptability"])
+            self._rescore(tweet_parent_id)
+
+        return self._complete_update()
+
+    def update_public_metrics(self, tweet_id, like_count, retweet_count):
+        """
+        Updates the like and retweet counts of a tweet and evaluates it again
+
+        :param tweet_id:        id of the tweet to update
+        :param like_count:      new like count of the tweet
+        :param retweet_count:   new retweet count of the tweet
+        :return:                acceptability degree of the root tweet
+        """
+        self.live_tweet_tree.update_public_metrics(tweet_id, like_count, retweet_count)
+        if self._public_metrics_changed():
+            return self.evaluate()
+
+        self._rescore(tweet_id)
+
+        return self._complete_update()
+
+
+if __name__ == "__main__":
+    pass
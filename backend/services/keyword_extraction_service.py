@@ -1,11 +1,13 @@
 import os
 from yake import KeywordExtractor as Yake
-from transformers import AutoModel, AutoTokenizer
+from transformers import AutoModel
 from textblob import TextBlob
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.feature_extraction.text import CountVectorizer
 
 from backend.services.utils.preprocessor import preprocess
+from backend.services.utils.model_registry import model_registry, load_tokenizer, register_bertweet_tokenizer
+from backend.services.utils.inference_backend import load_inference_backend
 
 
 class IKeywordExtractor:
@@ -69,14 +71,9 @@ class BertKeywordExtractor(IKeywordExtractor):
 
     MODEL = "vinai/bertweet-base"
 
-    # Set tokenizer normalization to true to continue tweet preprocessing
-    # (normalization) according to the model's requirements
-    tokenizer = AutoTokenizer.from_pretrained(MODEL, normalization=True, cache_dir=PATH)
-    tokenizer.save_pretrained(PATH)  # Save tokenizer to specified path in disk to prevent re-downloading
-
-    # Use Pytorch model instead of tensorflow due to small performance advantage
-    model = AutoModel.from_pretrained(MODEL, cache_dir=PATH)
-    model.save_pretrained(PATH)  # Save model to specified path in disk to prevent re-downloading
+    # Names of the tokenizer and model in the model registry, they are only loaded on first use
+    TOKENIZER = "vinai/bertweet-base/tokenizer"
+    ENCODER = "vinai/bertweet-base/model"
 
     def _get_noun_candidates(self, text, n_grams=3):
         """
@@ -140,11 +137,11 @@ class BertKeywordExtractor(IKeywordExtractor):
         :return:            BERTweet embeddings of the input text
         """
         # Extract the embeddings from the pooler output layer of BERTweet
-        tokens = BertKeywordExtractor.tokenizer(text_list, padding=True, return_tensors="pt")
-        embeddings = BertKeywordExtractor.model(**tokens)["pooler_output"]
+        tokenizer = model_registry.get(BertKeywordExtractor.TOKENIZER)
+        model = model_registry.get(BertKeywordExtractor.ENCODER)
 
-        # Convert it into numpy and return it
-        embeddings_np = embeddings.detach().numpy()
+        tokens = tokenizer(text_list, padding=True, return_tensors="np")
+        embeddings_np = model(tokens)["pooler_output"]
 
         return embeddings_np
 
@@ -208,6 +205,13 @@ class BertKeywordExtractor(IKeywordExtractor):
         return top_keyword
 
 
+register_bertweet_tokenizer(BertKeywordExtractor.TOKENIZER,
+                            lambda: load_tokenizer(BertKeywordExtractor.MODEL, BertKeywordExtractor.PATH))
+model_registry.register(BertKeywordExtractor.ENCODER,
+                        lambda: load_inference_backend(AutoModel, BertKeywordExtractor.MODEL,
+                                                       BertKeywordExtractor.PATH))
+
+
 class KeywordExtractor(IKeywordExtractor):
     """
     Class that extracts keywords from a tweet's text using BERTweet and cosine similarities, and falls
@@ -1,5 +1,9 @@
 import os
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, TextClassificationPipeline
+from transformers import AutoModelForSequenceClassification
+
+from backend.services.utils.model_registry import model_registry, load_tokenizer
+from backend.services.utils.inference_backend import load_inference_backend, get_backend_name
+from backend.services.utils.inference_cache import create_inference_cache
 
 
 class IRelationBasedClassifierService:
@@ -15,6 +19,17 @@ class IRelationBasedClassifierService:
         """
         pass
 
+    def predict_argumentative_relations(self, pairs, batch_size=32):
+        """
+        Abstract function that predicts the argumentative relationships of many (parent, child) tweet pairs at once
+        as one of {support, attack, neutral}.
+
+        :param pairs:       list of (parent node tweet, child node tweet) tuples
+        :param batch_size:  number of pairs classified per forward pass
+        :return:            argumentative relations of each pair, in the same order as the input pairs
+        """
+        pass
+
 
 class RelationBasedClassifierServiceBert(IRelationBasedClassifierService):
     """
@@ -26,17 +41,18 @@ class RelationBasedClassifierServiceBert(IRelationBasedClassifierService):
 
     MODEL = "MohammadABH/twitter-roberta-base-dec2021_rbam_fine_tuned"
 
-    # Set tokenizer normalization to true to continue tweet preprocessing
-    # (normalization) according to the model's requirements
-    tokenizer = AutoTokenizer.from_pretrained(MODEL, normalization=True, cache_dir=PATH)
-    tokenizer.save_pretrained(PATH)  # Save tokenizer to specified path in disk to prevent re-downloading
-
-    # Use Pytorch model instead of tensorflow due to small performance advantage
-    model = AutoModelForSequenceClassification.from_pretrained(MODEL, cache_dir=PATH)
-    model.save_pretrained(PATH)  # Save model to specified path in disk to prevent re-downloading
+    # Names of the tokenizer and model in the model registry, they are only loaded on first use
+    TOKENIZER = "rbam_twitter/tokenizer"
+    CLASSIFIER = "rbam_twitter/model"
 
     SEPARATOR_TOKEN = "</s> </s>"  # BERT special separator token
 
+    # Tokenizing parameters, truncate, pad and max length of 512
+    MAX_LENGTH = 512
+
+    # Cache of the predicted relations keyed by the model, its inference backend and the pair's texts
+    cache = create_inference_cache("relation", f"{MODEL}@{get_backend_name()}")
+
     def predict_argumentative_relation(self, text_a, text_b):
         """
         Function that predicts the argumentative relationship between a tweet and its parent as one
@@ -46,24 +62,63 @@ class RelationBasedClassifierServiceBert(IRelationBasedClassifierService):
         :param text_b:      child node tweet
         :return:            argumentative relation between child and parent tweets
         """
-        # Tokenizing parameters, truncate, apdd and max length of 512
-        tokenizer_kwargs = {'padding': True, 'truncation': True, 'max_length': 512}
+        return self.predict_argumentative_relations([(text_a, text_b)])[0]
 
-        # Use a pipeline to simplify classification
-        pipe = TextClassificationPipeline(model=RelationBasedClassifierServiceBert.model,
-                                          tokenizer=RelationBasedClassifierServiceBert.tokenizer,
-                                          return_all_scores=False)
-
-        # Classify the relation between the two tweets, add a BERT special seperator token between the texts
-        classification_output = pipe(f"{text_a} {RelationBasedClassifierServiceBert.SEPARATOR_TOKEN} {text_b}",
-                                     **tokenizer_kwargs)
+    def predict_argumentative_relations(self, pairs, batch_size=32):
+        """
+        Function that predicts the argumentative relationships of many (parent, child) tweet pairs at once using a
+        custom fine-tuned Twitter RoBERTa model, run by the configured inference backend. Pairs that were already
+        classified are served from the inference cache. The rest are sorted by length so each fixed-size batch is only
+        padded to its own longest sequence (dynamic padding), and the labels are returned in the input order.
+
+        :param pairs:       list of (parent node tweet, child node tweet) tuples
+        :param batch_size:  number of pairs classified per forward pass
+        :return:            argumentative relations of each pair, in the same order as the input pairs
+        """
+        # Only the pairs that have not been classified before are run through the model
+        return RelationBasedClassifierServiceBert.cache.get_or_compute(
+            pairs, lambda missing_pairs: self._classify(missing_pairs, batch_size))
 
-        # Extract the best prediction and return the label
-        best_prediction = classification_output[0]
-        classification_score = best_prediction['score']
-        classification_label = best_prediction['label']
+    def _classify(self, pairs, batch_size):
+        """
+        Classifies the argumentative relations of (parent, child) tweet pairs with the model, bypassing the cache
 
-        return classification_label
+        :param pairs:       list of (parent node tweet, child node tweet) tuples
+        :param batch_size:  number of pairs classified per forward pass
+        :return:            argumentative relations of each pair, in the same order as the input pairs
+        """
+        # Add a BERT special separator token between the texts of each pair
+        texts = [f"{text_a} {RelationBasedClassifierServiceBert.SEPARATOR_TOKEN} {text_b}" for text_a, text_b in pairs]
+
+        # Group sequences of similar length together to minimise the padding within each batch
+        order = sorted(range(len(texts)), key=lambda index: len(texts[index]))
+        labels = [None] * len(texts)
+        if len(labels) == 0:
+            # Nothing to classify, don't load the model
+            return labels
+
+        tokenizer = model_registry.get(RelationBasedClassifierServiceBert.TOKENIZER)
+        model = model_registry.get(RelationBasedClassifierServiceBert.CLASSIFIER)
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            tokens = tokenizer([texts[index] for index in batch_indices], padding=True, truncation=True,
+                               max_length=RelationBasedClassifierServiceBert.MAX_LENGTH, return_tensors="np")
+            logits = model(tokens)["logits"]
+
+            # Extract the best prediction of each pair and map it back to its position in the input
+            for index, label_id in zip(batch_indices, logits.argmax(axis=-1).tolist()):
+                labels[index] = model.config.id2label[label_id]
+
+        return labels
+
+
+model_registry.register(RelationBasedClassifierServiceBert.TOKENIZER,
+                        lambda: load_tokenizer(RelationBasedClassifierServiceBert.MODEL,
+                                               RelationBasedClassifierServiceBert.PATH))
+model_registry.register(RelationBasedClassifierServiceBert.CLASSIFIER,
+                        lambda: load_inference_backend(AutoModelForSequenceClassification,
+                                                       RelationBasedClassifierServiceBert.MODEL,
+                                                       RelationBasedClassifierServiceBert.PATH))
 
 
 if __name__ == "__main__":
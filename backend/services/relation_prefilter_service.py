@@ -0,0 +1,111 @@
+import os
+import threading
+from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from backend.services.utils.preprocessor import preprocess
+
+# Keyword search hits whose relation to the analysed tweet is classified at most per analysis, the most similar to it
+# are kept. Each one classified as not neutral has its conversation fetched, so this bounds the expansions too. Unset
+# by default, as pruning lowers the recall of the related conversations, related_prefilter_benchmark measures it
+RELATED_EXPANSION_BUDGET = int(os.getenv("RELATED_EXPANSION_BUDGET")) if os.getenv("RELATED_EXPANSION_BUDGET") else None
+# TF-IDF cosine similarity to the analysed tweet below which a keyword search hit is pruned, whatever the budget
+MIN_RELATED_SIMILARITY = float(os.getenv("MIN_RELATED_SIMILARITY", "0.0"))
+
+
+class IRelationPrefilter:
+
+    def select_candidates(self, tweet, candidates):
+        """
+        Abstract function that selects the keyword search hits worth classifying the argumentative relation of to the
+        analysed tweet.
+
+        :param tweet:       the analysed tweet
+        :param candidates:  keyword search hits, each with its text
+        :return:            the selected candidates, the most promising first
+        """
+        pass
+
+
+class TfidfRelationPrefilter(IRelationPrefilter):
+    """
+    Cheap first stage of the selection of the related tweets: the keyword search hits are ranked by the TF-IDF cosine
+    similarity of their text to the analysed tweet, and only the most similar ones within the expansion budget are
+    passed on to the relation model, and so possibly fetched. The pruned candidates are neither classified nor fetched.
+    Without a budget nor a minimum similarity, the default, every candidate is kept in the search order and only
+    counted.
+    """
+
+    def __init__(self, budget=None, min_similarity=None):
+        """
+        :param budget:          candidates kept at most per analysis, defaults to RELATED_EXPANSION_BUDGET, None for
+                                no budget
+        :param min_similarity:  similarity below which a candidate is pruned, defaults to MIN_RELATED_SIMILARITY
+        """
+        self.budget = RELATED_EXPANSION_BUDGET if budget is None else budget
+        self.min_similarity = MIN_RELATED_SIMILARITY if min_similarity is None else min_similarity
+        self.analyses = 0
+        self.candidates = 0
+        self.kept = 0
+        self.lock = threading.Lock()
+
+    def get_similarities(self, text, candidate_texts):
+        """
+        :param text:            text of the analysed tweet
+        :param candidate_texts: texts of the candidates
+        :return:                TF-IDF cosine similarity of each candidate text to the text, with the inverse document
+                                frequencies of the texts themselves
+        """
+        if not candidate_texts:
+            return []
+
+        vectorizer = TfidfVectorizer(preprocessor=lambda tweet: preprocess(tweet).lower(), stop_words="english",
+                                     sublinear_tf=True)
+        try:
+            vectors = vectorizer.fit_transform([text] + list(candidate_texts))
+        except ValueError:
+            # No word left once the stop words are removed, nothing to rank the candidates by
+            return [0.0] * len(candidate_texts)
+
+        return cosine_similarity(vectors[0], vectors[1:])[0].tolist()
+
+    def select_candidates(self, tweet, candidates):
+        """
+        Selects the candidates most similar to the analysed tweet, within the expansion budget
+
+        :param tweet:       the analysed tweet
+        :param candidates:  keyword search hits, each with its text
+        :return:            the selected candidates, the most similar first, in the search order when equally similar
+        """
+        if self.budget is None and self.min_similarity <= 0.0:
+            # Nothing to prune, the candidates are not ranked
+            selected = list(candidates)
+        else:
+            similarities = self.get_similarities(tweet["text"], [candidate["text"] for candidate in candidates])
+            ranked = sorted(range(len(candidates)), key=lambda index: -similarities[index])
+            selected = [candidates[index] for index in ranked
+                        if similarities[index] >= self.min_similarity][:self.budget]
+
+        with self.lock:
+            self.analyses += 1
+            self.candidates += len(candidates)
+            self.kept += len(selected)
+
+        return selected
+
+    def get_stats(self):
+        """
+        :return:    analyses and candidates pre-filtered, and candidates kept and pruned: each pruned candidate is one
+                    relation classification avoided, and one conversation fetch too if it would not have been neutral
+        """
+        with self.lock:
+            return {"budget": self.budget,
+                    "min_similarity": self.min_similarity,
+                    "analyses": self.analyses,
+                    "candidates": self.candidates,
+                    "kept": self.kept,
+                    "pruned": self.candidates - self.kept}
+
+
+if __name__ == "__main__":
+    pass
@@ -1,12 +1,12 @@
 import os
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from nltk import tokenize, download
-from transformers import AutoModelForSequenceClassification, AutoTokenizer, TextClassificationPipeline
+from nltk import tokenize, download, data
+from transformers import AutoModelForSequenceClassification
 
 from backend.services.utils.preprocessor import preprocess
-
-
-download('punkt')
+from backend.services.utils.model_registry import model_registry, load_tokenizer, register_bertweet_tokenizer
+from backend.services.utils.inference_backend import load_inference_backend, get_backend_name
+from backend.services.utils.inference_cache import create_inference_cache
 
 
 class ISentimentAnalysis:
@@ -23,11 +23,35 @@ class ISentimentAnalysis:
         """
         pass
 
+    def predict_sentiments(self, tweets):
+        """
+        Abstract function that returns the sentiment labels of many input Tweets at once.
+
+        :param tweets:  list of input tweets to predict the sentiment labels for
+
+        :return:        sentiment labels, in the same order as the input tweets
+        """
+        pass
+
 
 class VaderSentimentAnalysis(ISentimentAnalysis):
     # Vader sentiment analysis object
     vader_analyzer = SentimentIntensityAnalyzer()
 
+    punkt_downloaded = False
+
+    def _ensure_punkt(self):
+        """
+        Downloads the punkt sentence tokenizer the first time it is needed, only if it is not already on disk
+        """
+        if not VaderSentimentAnalysis.punkt_downloaded:
+            try:
+                data.find('tokenizers/punkt')
+            except LookupError:
+                download('punkt')
+
+            VaderSentimentAnalysis.punkt_downloaded = True
+
     def _get_sentiment_label(self, sentiment_score):
         """
         Function that gets the sentiment label [positive, neutral, negative]
@@ -61,6 +85,7 @@ class VaderSentimentAnalysis(ISentimentAnalysis):
         # not on a whole paragraph. So the tweet sentiment is calculated as the
         # average sentiment of each sentence in the tweet
 
+        self._ensure_punkt()
         sentences = tokenize.sent_tokenize(preprocessed_tweet)  # Break tweet up into sentences
         overall_tweet_sentiment = 0.0
         for sentence in sentences:
@@ -76,6 +101,16 @@ class VaderSentimentAnalysis(ISentimentAnalysis):
         # return the sentiment label and not the score
         return self._get_sentiment_label(overall_tweet_sentiment)
 
+    def predict_sentiments(self, tweets):
+        """
+        Function that predicts the sentiment labels of many input tweets using Vader
+
+        :param tweets:  list of input tweets to predict the sentiment labels for
+
+        :return         sentiment labels, in the same order as the input tweets
+        """
+        return [self.predict_sentiment(tweet) for tweet in tweets]
+
 
 class BertweetSentimentAnalysis(ISentimentAnalysis):
     dirname = os.path.dirname(__file__)
@@ -83,20 +118,17 @@ class BertweetSentimentAnalysis(ISentimentAnalysis):
 
     MODEL = "cardiffnlp/bertweet-base-sentiment"
 
-    # Set tokenizer normalization to true to continue tweet preprocessing
-    # (normalization) according to the model's requirements
-    tokenizer = AutoTokenizer.from_pretrained(MODEL, normalization=True, cache_dir=PATH)
-    tokenizer.save_pretrained(PATH)  # Save tokenizer to specified path in disk to prevent re-downloading
-
     # Dictionaries that map labels to model output ids and vice versa
     # to have more readable prediction outputs
     id2label = {0: "negative", 1: "neutral", 2: "positive"}
     label2id = {"negative": 0, "neutral": 1, "positive": 2}
 
-    # Use Pytorch model instead of tensorflow due to small performance advantage
-    model = AutoModelForSequenceClassification.from_pretrained(MODEL, id2label=id2label, label2id=label2id,
-                                                               cache_dir=PATH)
-    model.save_pretrained(PATH)  # Save model to specified path in disk to prevent re-downloading
+    # Names of the tokenizer and model in the model registry, they are only loaded on first use
+    TOKENIZER = "sentiment-analysis/tokenizer"
+    CLASSIFIER = "sentiment-analysis/model"
+
+    # Cache of the predicted sentiments keyed by the model, its inference backend and the tweet's text
+    cache = create_inference_cache("sentiment", f"{MODEL}@{get_backend_name()}")
 
     def predict_sentiment(self, tweet):
         """
@@ -106,15 +138,59 @@ class BertweetSentimentAnalysis(ISentimentAnalysis):
 
         :return       sentiment label of a given tweet
         """
+        return self.predict_sentiments([tweet])[0]
 
-        pipe = TextClassificationPipeline(model=BertweetSentimentAnalysis.model,
-                                          tokenizer=BertweetSentimentAnalysis.tokenizer, return_all_scores=False)
-        classification_output = pipe(tweet)
-        best_prediction = classification_output[0]
-        classification_score = best_prediction['score']
-        classification_label = best_prediction['label']
+    def predict_sentiments(self, tweets, batch_size=64):
+        """
+        Function that predicts the sentiment labels of many input tweets using BERTweet. Tweets that were already
+        classified are served from the inference cache. The rest are sorted by length so each fixed-size batch is only
+        padded to its own longest tweet, and the labels are returned in input order.
+
+        :param tweets:      list of input tweets to predict the sentiment labels for
+        :param batch_size:  number of tweets classified per forward pass
+
+        :return             sentiment labels, in the same order as the input tweets
+        """
+        # Only the tweets that have not been classified before are run through the model
+        return BertweetSentimentAnalysis.cache.get_or_compute(
+            tweets, lambda missing_tweets: self._classify(missing_tweets, batch_size))
+
+    def _classify(self, tweets, batch_size):
+        """
+        Classifies the sentiment of tweets with the model, bypassing the cache
+
+        :param tweets:      list of input tweets to predict the sentiment labels for
+        :param batch_size:  number of tweets classified per forward pass
+
+        :return             sentiment labels, in the same order as the input tweets
+        """
+        order = sorted(range(len(tweets)), key=lambda index: len(tweets[index]))
+        labels = [None] * len(tweets)
+        if len(labels) == 0:
+            # Nothing to classify, don't load the model
+            return labels
+
+        tokenizer = model_registry.get(BertweetSentimentAnalysis.TOKENIZER)
+        model = model_registry.get(BertweetSentimentAnalysis.CLASSIFIER)
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            tokens = tokenizer([tweets[index] for index in batch_indices], padding=True, truncation=True,
+                               return_tensors="np")
+            logits = model(tokens)["logits"]
 
-        return classification_label
+            for index, label_id in zip(batch_indices, logits.argmax(axis=-1).tolist()):
+                labels[index] = BertweetSentimentAnalysis.id2label[label_id]
+
+        return labels
+
+
+register_bertweet_tokenizer(BertweetSentimentAnalysis.TOKENIZER,
+                            lambda: load_tokenizer(BertweetSentimentAnalysis.MODEL, BertweetSentimentAnalysis.PATH))
+model_registry.register(BertweetSentimentAnalysis.CLASSIFIER,
+                        lambda: load_inference_backend(AutoModelForSequenceClassification,
+                                                       BertweetSentimentAnalysis.MODEL, BertweetSentimentAnalysis.PATH,
+                                                       id2label=BertweetSentimentAnalysis.id2label,
+                                                       label2id=BertweetSentimentAnalysis.label2id))
 
 
 class SentimentAnalysis(ISentimentAnalysis):
@@ -136,6 +212,20 @@ class SentimentAnalysis(ISentimentAnalysis):
         except:
             return SentimentAnalysis.vaderSentimentAnalysis.predict_sentiment(tweet)
 
+    def predict_sentiments(self, tweets):
+        """
+        Function that predicts the sentiment labels of many input tweets. It attempts to classify the whole batch
+        with BERTweet, if it fails, each tweet is retried on its own so only the tweets that fail fall back on VADER.
+
+        :param tweets:  list of input tweets to predict the sentiment labels for
+
+        :return         sentiment labels, in the same order as the input tweets
+        """
+        try:
+            return SentimentAnalysis.bertSentimentAnalysis.predict_sentiments(tweets)
+        except:
+            return [self.predict_sentiment(tweet) for tweet in tweets]
+
 
 if __name__ == "__main__":
     pass
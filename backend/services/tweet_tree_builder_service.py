@@ -1,12 +1,46 @@
 import os
+import asyncio
+from itertools import chain
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import networkx as nx
-from networkx.readwrite import json_graph
 
-from backend.services.twitter_api_service import TwitterAPIService
+from backend.services.twitter_api_service import TwitterAPIService, TwitterResponseParser
+from backend.services.async_twitter_api_service import AsyncTwitterAPIService
+from backend.services.utils.rate_limit_scheduler import ROOT_PRIORITY, RELATED_PRIORITY, RateLimitExceeded
+from backend.services.utils.json_encoder import encode_json
+from backend.services.utils.tweet_graph import TweetGraph, TweetRecord
+from backend.services.utils.pipeline import PipelineStage
 from backend.services.keyword_extraction_service import KeywordExtractor
+from backend.services.relation_prefilter_service import TfidfRelationPrefilter
 from backend.services.relation_based_classifier_service import RelationBasedClassifierServiceBert
 
+# Colors of the edges of the tweet tree, from a tweet to its replies and from the root tweet to the related tweets
+REPLY_EDGE_COLOR = "g"
+RELATED_EDGE_COLOR = "r"
+
+# Events of a streamed tweet tree: the root tweet, each level of replies of its conversation, each related conversation
+ROOT_EVENT = "root"
+CONVERSATION_EVENT = "conversation"
+RELATED_EVENT = "related"
+
+# Tweets whose conversations are fetched at the same time, and whose replies are classified together, in bulk builds
+BULK_FETCH_WORKERS = 8
+BULK_BATCH_SIZE = 32
+
+# Stages of the pipelined tweet tree build, enabled with TWEET_TREE_PIPELINE: the pages of replies are scored by the
+# sentiment stage then classified by the relation stage, each on its own worker thread, while the next pages are fetched
+SENTIMENT_STAGE = "sentiment"
+RELATION_STAGE = "relation"
+
+# Columns of the columnar encoding of the tweet tree, and the attribute of the tweets in each, besides their ids
+COLUMNS = [("texts", "text"), ("like_counts", "like_count"), ("retweet_counts", "retweet_count"),
+           ("reply_counts", "reply_count"), ("quote_counts", "quote_count"), ("sentiments", "sentiment"),
+           ("argumentative_types", "argumentative_type"), ("acceptabilities", "acceptability")]
+
+# Marks the end of the children of a tweet when encoding the tweet tree
+_NO_CHILD = object()
+
 
 class TweetTreeMetrics:
     """
@@ -33,6 +67,8 @@ class TweetTreeMetrics:
         self.max_public_metrics = 0
         self.min_public_metrics = 0
         self.min_public_metrics_set = False
+        # Number of tweets of each public metrics score, to update the max and min when a tweet is removed or updated
+        self.public_metrics_counts = Counter()
 
     def set_root_tweet_sentiment(self, root_tweet_sentiment):
         self.root_tweet_sentiment = root_tweet_sentiment
@@ -45,6 +81,10 @@ class TweetTreeMetrics:
             self.strongest_argument_id = strongest_argument_id
             self.strongest_argument_score = argument_strength
 
+    def reset_strongest_argument(self):
+        self.strongest_argument_id = ""
+        self.strongest_argument_score = 0.0
+
     def _set_max_public_metrics(self, tweet):
         score = tweet["like_count"] + tweet["retweet_count"]
 
@@ -68,6 +108,19 @@ class TweetTreeMetrics:
     def set_max_min_public_metrics(self, tweet):
         self._set_max_public_metrics(tweet)
         self._set_min_public_metrics(tweet)
+        self.public_metrics_counts[tweet["like_count"] + tweet["retweet_count"]] += 1
+
+    def remove_public_metrics(self, tweet):
+        score = tweet["like_count"] + tweet["retweet_count"]
+        self.public_metrics_counts[score] -= 1
+        if self.public_metrics_counts[score] <= 0:
+            del self.public_metrics_counts[score]
+
+        # Only the removal of the last tweet with the max or min score changes them
+        if score not in self.public_metrics_counts and score in (self.max_public_metrics, self.min_public_metrics):
+            self.max_public_metrics = max(self.public_metrics_counts, default=0)
+            self.min_public_metrics = min(self.public_metrics_counts, default=0)
+            self.min_public_metrics_set = len(self.public_metrics_counts) > 0
 
     def increment_general_sentiment(self, sentiment_type):
         if sentiment_type == "positive":
@@ -85,6 +138,22 @@ class TweetTreeMetrics:
         else:
             self.root_neutral_sentiment_count += 1
 
+    def decrement_general_sentiment(self, sentiment_type):
+        if sentiment_type == "positive":
+            self.general_positive_sentiment_count -= 1
+        elif sentiment_type == "negative":
+            self.general_negative_sentiment_count -= 1
+        else:
+            self.general_neutral_sentiment_count -= 1
+
+    def decrement_root_sentiment(self, sentiment_type):
+        if sentiment_type == "positive":
+            self.root_positive_sentiment_count -= 1
+        elif sentiment_type == "negative":
+            self.root_negative_sentiment_count -= 1
+        else:
+            self.root_neutral_sentiment_count -= 1
+
     def compute_general_sentiment(self):
         values = [self.general_positive_sentiment_count,
                   self.general_negative_sentiment_count,
@@ -125,15 +194,16 @@ class TweetTreeMetrics:
 
 class TweetTree:
     """
-    Tweet tree data structure that ensures O(1) operations, uses a networkx DiGraph internally.
+    Tweet tree data structure that ensures O(1) operations, uses a TweetGraph internally, which has the interface of
+    a networkx DiGraph but stores the replies as compact TweetRecords.
     """
 
-    def __init__(self, root_tweet, conversation_thread, metrics):
-        self.tree = nx.DiGraph()
+    def __init__(self, root_tweet, conversation_thread, metrics, argumentative_types=None):
+        self.tree = TweetGraph()
         self.root = None
         self.metrics = metrics
         self._create_root(root_tweet)
-        self._create_children(conversation_thread)
+        self._create_children(conversation_thread, argumentative_types)
 
     def _create_root(self, root_tweet):
         root_id = root_tweet["id"]
@@ -141,44 +211,157 @@ class TweetTree:
         self.tree.add_node(root_id, attributes=root_tweet)
 
     def _parse_tweet(self, tweet):
-        return {"id": tweet["id"],
-                "text": tweet["text"],
-                "retweet_count": tweet["retweet_count"],
-                "reply_count": tweet["reply_count"],
-                "like_count": tweet["like_count"],
-                "quote_count": tweet["quote_count"],
-                "sentiment": tweet["sentiment"]}
-
-    def _create_children(self, conversation_thread):
-        # Loop through conversation thread
+        return TweetRecord(id=tweet["id"],
+                           text=tweet["text"],
+                           retweet_count=tweet["retweet_count"],
+                           reply_count=tweet["reply_count"],
+                           like_count=tweet["like_count"],
+                           quote_count=tweet["quote_count"],
+                           sentiment=tweet["sentiment"])
+
+    def _create_children(self, conversation_thread, argumentative_types=None):
+        self.add_replies(conversation_thread, argumentative_types)
+
+    def _is_conversation_root(self, tweet_id):
+        # The root tweet and the related tweets attached to it each start a conversation
+        return tweet_id == self.root or (self.tree.has_edge(self.root, tweet_id) and
+                                         self.tree.edges[self.root, tweet_id]["color"] == RELATED_EDGE_COLOR)
+
+    def _is_reply(self, tweet_id):
+        # Only the replies are counted in the metrics, not the root tweet and the related tweets
+        tweet_parent_id = self.get_parent(tweet_id)
+        return tweet_parent_id is not None and self.tree.edges[tweet_parent_id, tweet_id]["color"] == REPLY_EDGE_COLOR
+
+    def add_replies(self, conversation_thread, argumentative_types=None):
+        """
+        Adds the replies of a conversation thread to the tree, and counts them in the metrics
+
+        :param conversation_thread: replies to add, a reply is only added if the tweet it replies to is in the tree,
+                                    the sentiment of the added replies is scored if they have none
+        :param argumentative_types: mapping from reply id to its argumentative relation to its parent when it is
+                                    already classified, e.g. along with other conversations, the others are classified
+        :return:                    ids of the added replies, every reply after the tweet it replies to
+        """
+        # Loop through conversation thread and collect the replies whose parent is in the tree,
+        # if parent tweet is deleted, ignore tweet
+        added_tweet_ids = set()
+        replies = []
         for tweet in conversation_thread:
+            tweet_parent_id = tweet['referenced_tweets'][0]['id']
+            is_new = tweet['id'] not in self.tree and tweet['id'] not in added_tweet_ids
+
+            if is_new and (tweet_parent_id in self.tree or tweet_parent_id in added_tweet_ids):
+                added_tweet_ids.add(tweet['id'])
+                replies.append(tweet)
+
+        # Score the sentiment of the added replies not scored yet, and classify the argumentative relation of every
+        # (parent, child) pair, in bulk
+        TwitterResponseParser.set_tweets_sentiment(replies)
+        known_types = dict(argumentative_types or {})
+        unclassified_replies = [tweet for tweet in replies if tweet['id'] not in known_types]
+        if argumentative_types is None or unclassified_replies:
+            pairs = [(tweet['referenced_tweets'][0]["text"], tweet["text"]) for tweet in unclassified_replies]
+            predicted_types = TweetTreeBuilder.argumentation_relation_service.predict_argumentative_relations(pairs)
+            known_types.update(zip([tweet['id'] for tweet in unclassified_replies], predicted_types))
+
+        for tweet in replies:
             tweet_id = tweet['id']
-            tweet_parent = tweet['referenced_tweets'][0]
-            tweet_parent_id = tweet_parent['id']
-
-            # If parent tweet is deleted, ignore tweet
-            if tweet_parent_id in self.tree:
-                # Add the tweet to the tree
-                parsed_tweet = self._parse_tweet(tweet)
-                parsed_tweet[
-                    "argumentative_type"] = TweetTreeBuilder.argumentation_relation_service.predict_argumentative_relation(
-                    tweet_parent["text"], tweet["text"])
-                self.tree.add_node(tweet_id, attributes=parsed_tweet)
-                self.tree.add_edge(tweet_parent_id, tweet_id, color="g", weight=3)
-
-                # Update metrics
-                self.metrics.set_max_min_public_metrics(parsed_tweet)
-
-                if tweet_parent_id == self.root:
-                    self.metrics.increment_root_sentiment(parsed_tweet["sentiment"])
-                else:
-                    self.metrics.increment_general_sentiment(parsed_tweet["sentiment"])
+            argumentative_type = known_types[tweet_id]
+            tweet_parent_id = tweet['referenced_tweets'][0]['id']
+
+            # Add the tweet to the tree
+            parsed_tweet = self._parse_tweet(tweet)
+            parsed_tweet["argumentative_type"] = argumentative_type
+            self.tree.add_node(tweet_id, attributes=parsed_tweet)
+            self.tree.add_edge(tweet_parent_id, tweet_id, color=REPLY_EDGE_COLOR, weight=3)
+
+            # Update metrics
+            self.metrics.set_max_min_public_metrics(parsed_tweet)
+
+            if self._is_conversation_root(tweet_parent_id):
+                self.metrics.increment_root_sentiment(parsed_tweet["sentiment"])
+            else:
+                self.metrics.increment_general_sentiment(parsed_tweet["sentiment"])
+
+        return [tweet['id'] for tweet in replies]
+
+    def add_related_conversation(self, related_tweet, conversation_thread, argumentative_types=None):
+        """
+        Adds a related tweet below the root tweet, and the replies of its conversation below it, in place: adding a
+        conversation takes time in the size of the conversation, not of the tree
+
+        :param related_tweet:       tweet starting the related conversation
+        :param conversation_thread: replies of the related conversation
+        :param argumentative_types: mapping from reply id to its argumentative relation to its parent when it is
+                                    already classified, the others are classified
+        :return:                    ids of the added tweets, the related tweet first and every reply after the tweet
+                                    it replies to
+        """
+        TwitterResponseParser.set_tweets_sentiment([related_tweet])
+        self.tree.add_node(related_tweet["id"], attributes=related_tweet)
+        self.add_edge(self.root, related_tweet["id"])
+
+        return [related_tweet["id"]] + self.add_replies(conversation_thread, argumentative_types)
+
+    def remove_tweet(self, tweet_id):
+        """
+        Removes a tweet and the replies below it from the tree, e.g. when it is deleted, and uncounts the replies
+        from the metrics
+
+        :param tweet_id:    id of the tweet to remove, any tweet but the root
+        :return:            ids of the removed tweets
+        """
+        if tweet_id == self.root:
+            raise ValueError("The root tweet cannot be removed from the tweet tree")
+
+        removed_tweet_ids = [tweet_id]
+        for removed_tweet_id in removed_tweet_ids:
+            removed_tweet_ids.extend(self.tree.successors(removed_tweet_id))
+        for removed_tweet_id in removed_tweet_ids:
+            if not self._is_reply(removed_tweet_id):
+                continue
+
+            tweet = self.tree.nodes[removed_tweet_id]["attributes"]
+            self.metrics.remove_public_metrics(tweet)
+            if self._is_conversation_root(self.get_parent(removed_tweet_id)):
+                self.metrics.decrement_root_sentiment(tweet["sentiment"])
+            else:
+                self.metrics.decrement_general_sentiment(tweet["sentiment"])
+
+        self.tree.remove_nodes_from(removed_tweet_ids)
+
+        return removed_tweet_ids
+
+    def update_public_metrics(self, tweet_id, like_count, retweet_count):
+        """
+        Updates the like and retweet counts of a tweet, and the max and min public metrics of the tree
+
+        :param tweet_id:        id of the tweet to update
+        :param like_count:      new like count of the tweet
+        :param retweet_count:   new retweet count of the tweet
+        """
+        tweet = self.tree.nodes[tweet_id]["attributes"]
+        is_reply = self._is_reply(tweet_id)
+
+        if is_reply:
+            self.metrics.remove_public_metrics(tweet)
+        tweet["like_count"] = like_count
+        tweet["retweet_count"] = retweet_count
+        if is_reply:
+            self.metrics.set_max_min_public_metrics(tweet)
+
+    def get_parent(self, tweet_id):
+        """
+        :param tweet_id:    id of a tweet of the tree
+        :return:            id of the tweet it replies to, None for the root
+        """
+        return next(iter(self.tree.predecessors(tweet_id)), None)
 
     def set_tree(self, tree):
         self.tree = tree
 
     def add_edge(self, parent_node, child_node):
-        self.tree.add_edge(parent_node, child_node, color='r', weight=3)
+        self.tree.add_edge(parent_node, child_node, color=RELATED_EDGE_COLOR, weight=3)
 
     def get_tree(self):
         return self.tree
@@ -186,15 +369,104 @@ class TweetTree:
     def get_root(self):
         return self.root
 
+    def _get_node_json(self, tweet_id):
+        # The data of the node with plain dict attributes, as the replies are stored as TweetRecords
+        node = {key: dict(value) if key == "attributes" else value for key, value in self.tree.nodes[tweet_id].items()}
+        node["name"] = tweet_id
+
+        return node
+
     def get_json(self):
-        # Encode the tweet tree and metrics in JSON
-        tweet_tree_json = json_graph.tree_data(self.tree, root=self.root, ident="name")
+        # Encode the tweet tree and metrics in JSON, like networkx tree_data: the root always has its children, the
+        # other tweets only when they have replies. The tree is walked without recursion, so any depth is supported
+        tweet_tree_json = self._get_node_json(self.root)
+        tweet_tree_json["children"] = []
+        nodes_to_visit = [(self.root, tweet_tree_json)]
+        while nodes_to_visit:
+            tweet_id, node = nodes_to_visit.pop()
+            for child_id in self.tree.successors(tweet_id):
+                child = self._get_node_json(child_id)
+                if self.tree.out_degree(child_id) > 0:
+                    child["children"] = []
+                    nodes_to_visit.append((child_id, child))
+                node["children"].append(child)
         metrics_json = self.metrics.get_metrics()
 
         json_representation = {"tweet_tree": tweet_tree_json, "metrics": metrics_json}
 
         return json_representation
 
+    def get_json_bytes(self):
+        """
+        Encodes the tweet tree and metrics like get_json, straight to JSON bytes: the tree is walked once without
+        recursion, so neither the nested dicts nor the stack grow with the tree, and each node is encoded on its own
+
+        :return:    the UTF-8 encoded JSON of get_json
+        """
+        def encode_node(tweet_id):
+            # The node without its closing brace, its children are appended after it
+            return encode_json({**self.tree.nodes[tweet_id], "name": tweet_id})[:-1]
+
+        parts = [b'{"tweet_tree":', encode_node(self.root), b',"children":[']
+        # Children left to encode at each level of the path from the root, and whether one was encoded yet
+        children = [iter(self.tree.successors(self.root))]
+        has_encoded_child = [False]
+        while children:
+            child_id = next(children[-1], _NO_CHILD)
+            if child_id is _NO_CHILD:
+                children.pop()
+                has_encoded_child.pop()
+                parts.append(b"]}")
+                continue
+
+            if has_encoded_child[-1]:
+                parts.append(b",")
+            has_encoded_child[-1] = True
+            parts.append(encode_node(child_id))
+            if self.tree.out_degree(child_id) > 0:
+                parts.append(b',"children":[')
+                children.append(iter(self.tree.successors(child_id)))
+                has_encoded_child.append(False)
+            else:
+                parts.append(b"}")
+
+        parts.extend([b',"metrics":', encode_json(self.metrics.get_metrics()), b"}"])
+
+        return b"".join(parts)
+
+    def get_columns(self):
+        """
+        Encodes the tweet tree and metrics as parallel columns, one value per tweet in each column, so the attribute
+        names are not repeated for every tweet and the tree is not nested. The tweets are listed from the root down,
+        every tweet after its parent, and each refers to its parent by its index, -1 for the root.
+
+        :return:    columns of the tweet tree and metrics, the missing attributes of a tweet are None
+        """
+        tweet_ids = [self.root]
+        parents = [-1]
+        tweet_ids_to_visit = [(self.root, 0)]
+        while tweet_ids_to_visit:
+            tweet_id, index = tweet_ids_to_visit.pop()
+            for child_id in self.tree.successors(tweet_id):
+                tweet_ids_to_visit.append((child_id, len(tweet_ids)))
+                tweet_ids.append(child_id)
+                parents.append(index)
+
+        attributes = [self.tree.nodes[tweet_id]["attributes"] for tweet_id in tweet_ids]
+        columns = {"ids": tweet_ids, "parents": parents}
+        for column, attribute in COLUMNS:
+            columns[column] = [tweet.get(attribute) for tweet in attributes]
+
+        return {"tweet_tree": columns, "metrics": self.metrics.get_metrics()}
+
+    def get_nodes(self, tweet_ids):
+        """
+        :param tweet_ids:   ids of tweets of the tree
+        :return:            id, parent id and attributes of each tweet, e.g. to send the tweets added to the tree
+        """
+        return [{"name": tweet_id, "parent": self.get_parent(tweet_id),
+                 "attributes": dict(self.tree.nodes[tweet_id]["attributes"])} for tweet_id in tweet_ids]
+
     def get_tweet_tree_metrics(self):
         return self.metrics
 
@@ -208,51 +480,374 @@ class TweetTreeBuilder:
     """
     keyword_extraction_service = KeywordExtractor()
     argumentation_relation_service = RelationBasedClassifierServiceBert()
+    relation_prefilter_service = TfidfRelationPrefilter()
 
     def __init__(self, tweet_id):
+        self._create_twitter_api_service()
+        self.tweet_tree = self._build_tweet_tree(tweet_id)
+
+    @classmethod
+    async def create_async(cls, tweet_id):
+        """
+        Builds the tweet tree of a tweet from a running event loop, e.g. an async API route, without blocking it: the
+        conversations are fetched on the loop and the models run on worker threads
+
+        :param tweet_id:    id of the tweet to build the tweet tree of
+        :return:            the TweetTreeBuilder holding the tweet tree
+        """
+        builder = cls.__new__(cls)
+        builder._create_twitter_api_service()
+        loop = asyncio.get_running_loop()
+        if builder.use_async_api:
+            conversations = await builder._fetch_conversations_async(tweet_id)
+        else:
+            conversations = await loop.run_in_executor(None, builder._fetch_conversations, tweet_id)
+        builder.tweet_tree = await loop.run_in_executor(None, builder._create_tweet_tree, *conversations)
+
+        return builder
+
+    @classmethod
+    def stream_tweet_tree(cls, tweet_id):
+        """
+        Builds the tweet tree of a tweet step by step, yielding the tweets as soon as they are added so they can be
+        shown before the whole tree is built: the root tweet first, then the replies of its conversation one level at
+        a time, then each related conversation once it is fetched and classified
+
+        :param tweet_id:    id of the tweet to build the tweet tree of
+        :return:            generator of (event, data) pairs, the data holds the added tweets and the metrics so far,
+                            it returns the complete TweetTree
+        """
+        builder = cls.__new__(cls)
+        # The tweets are yielded between the requests, so the conversations are fetched one after the other
+        builder._create_twitter_api_service(use_async_api=False)
+
+        tweet = builder.twitter_api_service.set_tweets_sentiment([builder.twitter_api_service.get_tweet(tweet_id)])[0]
+        tweet["argumentative_type"] = "none"
+        metrics = TweetTreeMetrics()
+        tweet_tree = TweetTree(tweet, [], metrics)
+        metrics.set_root_tweet_sentiment(tweet["sentiment"])
+        yield ROOT_EVENT, {"nodes": tweet_tree.get_nodes([tweet["id"]]), "metrics": metrics.get_metrics()}
+
+        tweet_conversation_thread = builder.twitter_api_service.get_conversation_thread(tweet_id)
+        for replies in builder._get_reply_levels(tweet["id"], tweet_conversation_thread):
+            added_tweet_ids = tweet_tree.add_replies(replies)
+            metrics.compute_sentiment_towards_root()
+            yield CONVERSATION_EVENT, {"nodes": tweet_tree.get_nodes(added_tweet_ids), "metrics": metrics.get_metrics()}
+
+        for related_tweet in builder._select_related_tweets(tweet, builder._get_related_tweets(tweet["text"])):
+            try:
+                related_tweet_thread = builder.twitter_api_service.get_conversation_thread(related_tweet['id'],
+                                                                                           priority=RELATED_PRIORITY)
+            except RateLimitExceeded:
+                continue
+
+            added_tweet_ids = tweet_tree.add_related_conversation(related_tweet, related_tweet_thread)
+            yield RELATED_EVENT, {"nodes": tweet_tree.get_nodes(added_tweet_ids), "metrics": metrics.get_metrics()}
+
+        builder.tweet_tree = tweet_tree
+
+        return tweet_tree
+
+    @classmethod
+    def build_tweet_trees(cls, tweet_ids, max_workers=BULK_FETCH_WORKERS, batch_size=BULK_BATCH_SIZE):
+        """
+        Builds the tweet trees of many tweets, batch_size tweets at a time: the conversations of a batch are fetched
+        concurrently, then the argumentative relations of the replies of all of them are classified together, so
+        the relation model runs on large batches rather than on one conversation at a time
+
+        :param tweet_ids:   ids of the tweets to build the tweet trees of
+        :param max_workers: number of tweets whose conversations are fetched at the same time
+        :param batch_size:  number of tweets whose replies are classified together
+        :return:            generator of (tweet id, TweetTree, error) triples in the order of the ids, the tweet tree
+                            is None and the error the exception raised if the tweet tree could not be built
+        """
+        with ThreadPoolExecutor(max_workers) as executor:
+            for start in range(0, len(tweet_ids), batch_size):
+                batch_ids = tweet_ids[start:start + batch_size]
+                futures = [executor.submit(cls._fetch_conversations_of, tweet_id) for tweet_id in batch_ids]
+
+                fetched = {}
+                errors = {}
+                for tweet_id, future in zip(batch_ids, futures):
+                    try:
+                        fetched[tweet_id] = future.result()
+                    except Exception as error:
+                        errors[tweet_id] = error
+
+                # One classification of the replies of every conversation of the batch, with the tweets they reply to
+                conversation_threads = []
+                for tweet, tweet_conversation_thread, related_conversations in fetched.values():
+                    conversation_threads.append(tweet_conversation_thread)
+                    conversation_threads.extend(thread for _, thread in related_conversations)
+                argumentative_types = cls._classify_replies(conversation_threads)
+                # And one scoring of the sentiment of the tweets of every tweet tree of the batch
+                cls._set_conversations_sentiment([conversation for conversations in fetched.values()
+                                                  for conversation in cls._get_conversations(*conversations)])
+
+                for tweet_id in batch_ids:
+                    if tweet_id in errors:
+                        yield tweet_id, None, errors[tweet_id]
+                        continue
+
+                    try:
+                        tweet_tree = cls.__new__(cls)._create_tweet_tree(*fetched[tweet_id], argumentative_types)
+                    except Exception as error:
+                        yield tweet_id, None, error
+                        continue
+
+                    yield tweet_id, tweet_tree, None
+
+    @staticmethod
+    def _classify_replies(conversation_threads):
+        """
+        :param conversation_threads:    lists of replies, classified together in one batch
+        :return:                        mapping from reply id to its argumentative relation to its parent, for the
+                                        replies whose parent text was fetched with them
+        """
+        replies = [reply for conversation_thread in conversation_threads for reply in conversation_thread
+                   if "text" in reply['referenced_tweets'][0]]
+        pairs = [(reply['referenced_tweets'][0]["text"], reply["text"]) for reply in replies]
+
+        return dict(zip([reply['id'] for reply in replies],
+                        TweetTreeBuilder.argumentation_relation_service.predict_argumentative_relations(pairs)))
+
+    @staticmethod
+    def _get_conversations(tweet, tweet_conversation_thread, related_conversations):
+        # The (tweet, replies) pairs of the root conversation and of the related conversations
+        return [(tweet, tweet_conversation_thread)] + list(related_conversations)
+
+    @classmethod
+    def _set_conversations_sentiment(cls, conversations):
+        """
+        Scores the sentiment of the tweets which end up in the tweet trees in one batch: the tweets starting the
+        conversations, and their replies except the ones whose parent is not in the conversation, as they are left out
+        of the trees. The sentiment is only scored once the related tweets are selected, so the sentiment of the
+        discarded related tweets and of their conversations is never scored.
+
+        :param conversations:   (tweet, replies) pairs of the conversations
+        """
+        TwitterResponseParser.set_tweets_sentiment([
+            conversation_tweet for tweet, conversation_thread in conversations
+            for conversation_tweet in chain([tweet], *cls._get_reply_levels(tweet["id"], conversation_thread))])
+
+    @classmethod
+    def _fetch_conversations_of(cls, tweet_id):
+        # Every fetch has its own Twitter API client, as the HTTP sessions are not shared between threads
+        builder = cls.__new__(cls)
+        builder._create_twitter_api_service(use_async_api=False)
+
+        return builder._fetch_conversations(tweet_id)
+
+    def _create_twitter_api_service(self, use_async_api=None):
         load_dotenv()
         TWITTER_API_KEY = os.getenv("TWITTER_API_KEY")
-        self.twitter_api_service = TwitterAPIService(TWITTER_API_KEY)
-        self.tweet_tree = self._build_tweet_tree(tweet_id)
+        if use_async_api is None:
+            use_async_api = os.getenv("TWITTER_API_ASYNC", "false").lower() == "true"
+        self.use_async_api = use_async_api
+        if self.use_async_api:
+            self.twitter_api_service = AsyncTwitterAPIService(TWITTER_API_KEY)
+        else:
+            self.twitter_api_service = TwitterAPIService(TWITTER_API_KEY)
+
+    def _run_async(self, coroutine):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+
+        # asyncio.run cannot be nested in the event loop running in this thread, run the coroutine on its own thread
+        with ThreadPoolExecutor(1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
 
     def _build_tweet_tree(self, tweet_id):
+        # Fetch the conversations, concurrently when the asynchronous Twitter API service is enabled
+        if self.use_async_api:
+            conversations = self._run_async(self._fetch_conversations_async(tweet_id))
+        elif os.getenv("TWEET_TREE_PIPELINE", "false").lower() == "true":
+            conversations = self._fetch_conversations_pipelined(tweet_id)
+        else:
+            conversations = self._fetch_conversations(tweet_id)
+
+        return self._create_tweet_tree(*conversations)
+
+    def _create_tweet_tree(self, tweet, tweet_conversation_thread, related_conversations, argumentative_types=None):
+        # Score the sentiment of the tweets of the tree in one batch, unless they already are
+        self._set_conversations_sentiment(
+            self._get_conversations(tweet, tweet_conversation_thread, related_conversations))
+
         # Build tweet tree
-        tweet = self.twitter_api_service.get_tweet(tweet_id)
         tweet["argumentative_type"] = "none"
-        tweet_text = tweet["text"]
-        tweet_conversation_thread = self.twitter_api_service.get_conversation_thread(tweet_id)
 
         # Compute metrics on root and initial tweet tree
         metrics = TweetTreeMetrics()
-        tweet_tree = TweetTree(tweet, tweet_conversation_thread, metrics)
+        tweet_tree = TweetTree(tweet, tweet_conversation_thread, metrics, argumentative_types)
         metrics.set_root_tweet_sentiment(tweet["sentiment"])
         metrics.compute_sentiment_towards_root()
 
-        # Build related tweet trees and append them to main tweet tree
-        related_tweets = self._get_related_tweets(tweet_text)
-        # related_tweets = []
-        for related_tweet in related_tweets:
-            related_tweet[
-                "argumentative_type"] = TweetTreeBuilder.argumentation_relation_service.predict_argumentative_relation(
-                tweet_text, related_tweet["text"])
-            # Only retrieve 'fresh' argumentative tweets that are not replies or are retweets tweets
-            if (related_tweet["argumentative_type"] != 'neutral') and ('referenced_tweets' not in related_tweet) and (
-                    related_tweet['id'] != tweet['id']):
-                related_tweet_thread = self.twitter_api_service.get_conversation_thread(related_tweet['id'])
-                related_tweet_tree = TweetTree(related_tweet, related_tweet_thread, metrics).get_tree()
-                tweet_tree.set_tree(nx.compose(tweet_tree.get_tree(), related_tweet_tree))
-                tweet_tree.add_edge(tweet['id'], related_tweet['id'])
+        # Add the related conversations to the main tweet tree, in place
+        for related_tweet, related_tweet_thread in related_conversations:
+            tweet_tree.add_related_conversation(related_tweet, related_tweet_thread, argumentative_types)
         return tweet_tree
 
-    def _get_related_tweets(self, tweet):
-        # Extract related tweets from twitter using a keyword
+    @staticmethod
+    def _get_reply_levels(tweet_id, conversation_thread):
+        """
+        :param tweet_id:            id of the tweet starting the conversation
+        :param conversation_thread: replies of the conversation
+        :return:                    replies grouped by depth, the replies to the tweet first, replies whose parent is
+                                    not in the conversation are left out
+        """
+        replies = {}
+        for reply in conversation_thread:
+            replies.setdefault(reply['referenced_tweets'][0]['id'], []).append(reply)
+
+        levels = []
+        parent_ids = [tweet_id]
+        while parent_ids:
+            level = [reply for parent_id in parent_ids for reply in replies.pop(parent_id, [])]
+            if level:
+                levels.append(level)
+            parent_ids = [reply['id'] for reply in level]
+
+        return levels
+
+    def _fetch_conversations(self, tweet_id, get_conversation_thread=None):
+        get_conversation_thread = get_conversation_thread or self.twitter_api_service.get_conversation_thread
+        tweet = self.twitter_api_service.get_tweet(tweet_id)
+        tweet_conversation_thread = get_conversation_thread(tweet_id)
+
+        related_tweets = self._select_related_tweets(tweet, self._get_related_tweets(tweet["text"]))
+        related_conversations = []
+        for related_tweet in related_tweets:
+            try:
+                related_tweet_thread = get_conversation_thread(related_tweet['id'], priority=RELATED_PRIORITY)
+                related_conversations.append((related_tweet, related_tweet_thread))
+            except RateLimitExceeded:
+                # The rate limit scheduler shed the request, leave the related tweet out of the tree
+                continue
+
+        return tweet, tweet_conversation_thread, related_conversations
+
+    def _fetch_conversations_pipelined(self, tweet_id):
+        """
+        Fetches the conversations like _fetch_conversations, but the replies of every page are passed on as soon as
+        they are fetched to the sentiment stage, then to the relation stage, so the models work on a page while the
+        next pages are fetched and the related tweets are searched for. Only the replies reachable from the tweet
+        starting their conversation are passed on, once the tweet they reply to is fetched, as the others are left out
+        of the tweet tree
+
+        :param tweet_id:    id of the tweet to fetch the conversations of
+        :return:            the conversations of _fetch_conversations, and the mapping from reply id to its
+                            argumentative relation to its parent
+        """
+        argumentative_types = {}
+        relation_stage = PipelineStage(RELATION_STAGE, lambda pages: argumentative_types.update(
+            self._classify_replies(pages)), item_size=len).start()
+        sentiment_stage = PipelineStage(SENTIMENT_STAGE, lambda pages: self.twitter_api_service.set_tweets_sentiment(
+            list(chain.from_iterable(pages))), next_stage=relation_stage, item_size=len).start()
+
+        def get_conversation_thread(conversation_id, priority=ROOT_PRIORITY):
+            conversation_thread = []
+            # The replies waiting for the tweet they reply to, by its id, as the newest replies are fetched first
+            waiting_replies = {}
+            reachable_ids = {str(conversation_id)}
+            for page in self.twitter_api_service.get_conversation_pages(conversation_id, priority):
+                conversation_thread.extend(page)
+                for reply in page:
+                    if reply['referenced_tweets']:
+                        waiting_replies.setdefault(reply['referenced_tweets'][0]['id'], []).append(reply)
+
+                # Pass on the replies which became reachable, and the replies to them, level by level
+                reachable_replies = []
+                parent_ids = [parent_id for parent_id in waiting_replies if parent_id in reachable_ids]
+                while parent_ids:
+                    level = [reply for parent_id in parent_ids for reply in waiting_replies.pop(parent_id, [])]
+                    reachable_replies.extend(level)
+                    parent_ids = [reply['id'] for reply in level]
+                    reachable_ids.update(parent_ids)
+                if reachable_replies:
+                    sentiment_stage.put(reachable_replies)
+            conversation_thread.sort(key=lambda x: x["id"])
+
+            return conversation_thread
+
+        try:
+            conversations = self._fetch_conversations(tweet_id, get_conversation_thread)
+        finally:
+            # The replies are only complete once both stages are done with them
+            sentiment_stage.close()
+            sentiment_stage.join()
+
+        return conversations + (argumentative_types,)
+
+    async def _fetch_conversations_async(self, tweet_id):
+        async with self.twitter_api_service as twitter_api_service:
+            # The root conversation is fetched in the background while the related tweets are searched for
+            tweet_task = asyncio.ensure_future(twitter_api_service.get_tweet(tweet_id))
+            conversation_thread_task = asyncio.ensure_future(twitter_api_service.get_conversation_thread(tweet_id))
+            tweet = await tweet_task
+
+            # The keyword and relation models run on worker threads, so they do not block the requests in flight
+            loop = asyncio.get_running_loop()
+            keyword = await loop.run_in_executor(None, self._get_keyword, tweet["text"])
+            related_tweets = []
+            if keyword is not None:
+                try:
+                    related_tweets = await twitter_api_service.get_tweets_from_keyword(keyword)
+                except RateLimitExceeded:
+                    pass
+            related_tweets = await loop.run_in_executor(None, self._select_related_tweets, tweet, related_tweets)
+
+            related_tweet_threads = await twitter_api_service.get_conversation_threads(
+                [related_tweet['id'] for related_tweet in related_tweets], priority=RELATED_PRIORITY)
+            tweet_conversation_thread = await conversation_thread_task
+
+        # Leave out the related tweets whose conversation requests were shed by the rate limit scheduler
+        related_conversations = [(related_tweet, related_tweet_thread) for related_tweet, related_tweet_thread
+                                 in zip(related_tweets, related_tweet_threads) if related_tweet_thread is not None]
+
+        return tweet, tweet_conversation_thread, related_conversations
+
+    def _select_related_tweets(self, tweet, related_tweets):
+        # Only retrieve 'fresh' tweets that are not replies or are retweets tweets, other than the root tweet
+        related_tweets = [related_tweet for related_tweet in related_tweets
+                          if ('referenced_tweets' not in related_tweet) and (related_tweet['id'] != tweet['id'])]
+        # Prune the related tweets least similar to the root tweet before the relation model and the conversation
+        # fetches, within the expansion budget
+        related_tweets = TweetTreeBuilder.relation_prefilter_service.select_candidates(tweet, related_tweets)
+
+        # Classify the argumentative relation of every related tweet to the root tweet in bulk
+        pairs = [(tweet["text"], related_tweet["text"]) for related_tweet in related_tweets]
+        argumentative_types = TweetTreeBuilder.argumentation_relation_service.predict_argumentative_relations(pairs)
+
+        selected_tweets = []
+        for related_tweet, argumentative_type in zip(related_tweets, argumentative_types):
+            related_tweet["argumentative_type"] = argumentative_type
+            # Only retrieve argumentative tweets
+            if related_tweet["argumentative_type"] != 'neutral':
+                selected_tweets.append(related_tweet)
+
+        return selected_tweets
+
+    def _get_keyword(self, tweet):
         keyword = TweetTreeBuilder.keyword_extraction_service.get_top_keyword(tweet)
         if keyword == "" or keyword is None:
             # No keyword extracted, don't query the API
+            return None
+
+        return keyword
+
+    def _get_related_tweets(self, tweet):
+        # Extract related tweets from twitter using a keyword
+        keyword = self._get_keyword(tweet)
+        if keyword is None:
             return []
 
-        # Retrieve tweets that discuss the extracted keyword
-        tweets_about_keyword = self.twitter_api_service.get_tweets_from_keyword(keyword)
+        # Retrieve tweets that discuss the extracted keyword, none if the rate limit scheduler shed the request
+        try:
+            tweets_about_keyword = self.twitter_api_service.get_tweets_from_keyword(keyword)
+        except RateLimitExceeded:
+            return []
         related_tweets = tweets_about_keyword
 
         return related_tweets
@@ -0,0 +1,131 @@
+import base64
+import binascii
+import threading
+
+# Orders of the children of a tweet in a view, the children first in the order are listed first
+ACCEPTABILITY_SORT = "acceptability"    # Strongest arguments first, the non-argumentative tweets last
+ENGAGEMENT_SORT = "engagement"          # Most liked, retweeted, replied to and quoted first
+TIME_SORT = "time"                      # Oldest first, as the ids of the tweets grow with time
+SORT_KEYS = {ACCEPTABILITY_SORT: lambda tweet: -(tweet.get("acceptability") or 0.0),
+             ENGAGEMENT_SORT: lambda tweet: -sum(tweet.get(count) or 0 for count in
+                                                 ("like_count", "retweet_count", "reply_count", "quote_count")),
+             TIME_SORT: lambda tweet: int(tweet["id"])}
+
+# Default number of children listed per tweet, and levels of replies listed below the viewed tweet
+DEFAULT_LIMIT = 10
+DEFAULT_DEPTH = 2
+# Most children listed per tweet and levels of replies a single view lists
+MAX_LIMIT = 100
+MAX_DEPTH = 10
+
+
+def encode_cursor(sort_by, offset):
+    """
+    :param sort_by: order of the children the cursor pages through
+    :param offset:  index of the first child of the next page in that order
+    :return:        opaque cursor of the next page
+    """
+    return base64.urlsafe_b64encode(f"{sort_by}:{offset}".encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, sort_by):
+    """
+    :param cursor:  cursor returned with the previous page
+    :param sort_by: order of the children requested, it must be the one of the cursor
+    :return:        index of the first child of the page
+    """
+    try:
+        cursor_sort_by, offset = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split(":")
+        offset = int(offset)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    if cursor_sort_by != sort_by or offset < 0:
+        raise ValueError(f"Invalid cursor {cursor!r} for the order {sort_by!r}")
+
+    return offset
+
+
+class TweetTreeView:
+    """
+    Incremental retrieval of an analysed tweet tree, kept server-side so clients only fetch the part they show: the
+    tweets down to a depth, the top children of each tweet in an order, and the next children of a tweet page by page
+    with cursors. The tweet tree must not change while it is viewed, the orders of the children are only computed
+    once per tweet.
+    """
+
+    def __init__(self, tweet_tree):
+        """
+        :param tweet_tree:  the analysed TweetTree
+        """
+        self.tweet_tree = tweet_tree
+        self.sorted_children = {}
+        self.lock = threading.Lock()
+
+    def _get_sorted_children(self, tweet_id, sort_by):
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"Unknown order {sort_by!r}, the orders are: {', '.join(SORT_KEYS)}")
+
+        with self.lock:
+            children = self.sorted_children.get((tweet_id, sort_by))
+        if children is None:
+            tree = self.tweet_tree.get_tree()
+            sort_key = SORT_KEYS[sort_by]
+            children = sorted(tree.successors(tweet_id),
+                              key=lambda child_id: sort_key(tree.nodes[child_id]["attributes"]))
+            with self.lock:
+                self.sorted_children[(tweet_id, sort_by)] = children
+
+        return children
+
+    def _get_node(self, tweet_id, depth, limit, sort_by):
+        """
+        :return:    the tweet like in TweetTree.get_json, with its number of children, its first limit children down
+                    to depth levels and the cursor of its next children, None if they are all listed
+        """
+        children = self._get_sorted_children(tweet_id, sort_by)
+        node = {**self.tweet_tree.get_tree().nodes[tweet_id], "name": tweet_id, "child_count": len(children)}
+        node.update(self._get_page(children, 0, depth, limit, sort_by))
+
+        return node
+
+    def _get_page(self, children, offset, depth, limit, sort_by):
+        if depth <= 0:
+            # None of the children is listed, the first page starts at the first child
+            return {"children": [], "next_cursor": encode_cursor(sort_by, 0) if children else None}
+
+        page = [self._get_node(child_id, depth - 1, limit, sort_by) for child_id in children[offset:offset + limit]]
+        next_offset = offset + limit
+
+        return {"children": page,
+                "next_cursor": encode_cursor(sort_by, next_offset) if next_offset < len(children) else None}
+
+    def get_view(self, depth=DEFAULT_DEPTH, limit=DEFAULT_LIMIT, sort_by=ACCEPTABILITY_SORT):
+        """
+        :param depth:   number of levels of replies listed below the root tweet
+        :param limit:   number of children listed for each tweet
+        :param sort_by: order of the children, ACCEPTABILITY_SORT, ENGAGEMENT_SORT or TIME_SORT
+        :return:        the tweet tree down to depth with the first limit children of each tweet, and the metrics
+        """
+        return {"tweet_tree": self._get_node(self.tweet_tree.get_root(), depth, limit, sort_by),
+                "metrics": self.tweet_tree.get_tweet_tree_metrics().get_metrics()}
+
+    def get_children(self, tweet_id, cursor=None, depth=0, limit=DEFAULT_LIMIT, sort_by=ACCEPTABILITY_SORT):
+        """
+        :param tweet_id:    id of a tweet of the tree, a KeyError is raised if it is not in the tree
+        :param cursor:      cursor of the page, returned with the previous page, None for the first page
+        :param depth:       number of levels of replies listed below each child
+        :param limit:       number of children of the page, and of each child listed below them
+        :param sort_by:     order of the children, ACCEPTABILITY_SORT, ENGAGEMENT_SORT or TIME_SORT
+        :return:            the children of the page, with the cursor of the next page, None for the last page
+        """
+        if tweet_id not in self.tweet_tree.get_tree():
+            raise KeyError(tweet_id)
+
+        offset = decode_cursor(cursor, sort_by) if cursor is not None else 0
+        children = self._get_sorted_children(tweet_id, sort_by)
+
+        return {"child_count": len(children), **self._get_page(children, offset, depth + 1, limit, sort_by)}
+
+
+if __name__ == "__main__":
+    pass
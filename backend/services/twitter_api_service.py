@@ -1,23 +1,37 @@
-from twarc.client2 import Twarc2
 from twarc.expansions import ensure_flattened
 
 from backend.services.sentiment_analysis_service import SentimentAnalysis
+from backend.services.utils.twitter_client import Twarc2Client
+from backend.services.utils.rate_limit_scheduler import ROOT_PRIORITY, RELATED_PRIORITY
 
 
-class TwitterAPIService:
+class TwitterResponseParser:
     """
-    Service that acts as a wrapper around the Twitter API to provide the rest of the application simple access to
-    the API. Provides high level functions to accessing information and data from the Twitter API.
+    Parses the tweets returned by the Twitter API into the tweets used by the rest of the application. Shared by the
+    synchronous and asynchronous Twitter API services so both return exactly the same data. The parsed tweets have no
+    sentiment, it is only scored with set_tweets_sentiment for the tweets which end up in a tweet tree.
     """
 
     sentiment_analysis_service = SentimentAnalysis()
 
-    def __init__(self, bearer_token):
-        self.twarc = Twarc2(bearer_token=bearer_token)
+    @staticmethod
+    def set_tweets_sentiment(tweets):
+        """
+        Scores the sentiment of the parsed tweets which have none yet, in one batch rather than one model call per tweet
+
+        :param tweets:  parsed tweets, their sentiment is set in place
+        :return:        the tweets
+        """
+        unscored_tweets = [tweet for tweet in tweets if "sentiment" not in tweet]
+        if not unscored_tweets:
+            return tweets
 
-    def _get_tweet_sentiment(self, tweet):
-        tweet_sentiment = TwitterAPIService.sentiment_analysis_service.predict_sentiment(tweet)
-        return tweet_sentiment
+        tweets_sentiment = TwitterResponseParser.sentiment_analysis_service.predict_sentiments(
+            [tweet["text"] for tweet in unscored_tweets])
+        for tweet, tweet_sentiment in zip(unscored_tweets, tweets_sentiment):
+            tweet["sentiment"] = tweet_sentiment
+
+        return tweets
 
     def _parse_tweet_reply(self, tweet):
         return {"id": tweet["id"],
@@ -26,8 +40,7 @@ class TwitterAPIService:
                 "retweet_count": tweet["public_metrics"]["retweet_count"],
                 "reply_count": tweet["public_metrics"]["reply_count"],
                 "like_count": tweet["public_metrics"]["like_count"],
-                "quote_count": tweet["public_metrics"]["quote_count"],
-                "sentiment": self._get_tweet_sentiment(tweet["text"])}
+                "quote_count": tweet["public_metrics"]["quote_count"]}
 
     def _parse_tweet_keyword(self, tweet):
         tweet.pop('attachments', None)
@@ -40,7 +53,6 @@ class TwitterAPIService:
         tweet["reply_count"] = tweet["public_metrics"]["reply_count"]
         tweet["like_count"] = tweet["public_metrics"]["like_count"]
         tweet["quote_count"] = tweet["public_metrics"]["quote_count"]
-        tweet["sentiment"] = self._get_tweet_sentiment(tweet["text"])
         tweet.pop('public_metrics', None)
 
         return tweet
@@ -51,8 +63,17 @@ class TwitterAPIService:
                 "retweet_count": tweet["public_metrics"]["retweet_count"],
                 "reply_count": tweet["public_metrics"]["reply_count"],
                 "like_count": tweet["public_metrics"]["like_count"],
-                "quote_count": tweet["public_metrics"]["quote_count"],
-                "sentiment": self._get_tweet_sentiment(tweet["text"])}
+                "quote_count": tweet["public_metrics"]["quote_count"]}
+
+
+class TwitterAPIService(TwitterResponseParser):
+    """
+    Service that acts as a wrapper around the Twitter API to provide the rest of the application simple access to
+    the API. Provides high level functions to accessing information and data from the Twitter API.
+    """
+
+    def __init__(self, bearer_token, base_url=None):
+        self.twarc = Twarc2Client(bearer_token, base_url=base_url)
 
     def get_tweet(self, tweet_id):
         # Fetch tweet from Twitter API
@@ -66,18 +87,32 @@ class TwitterAPIService:
 
         return parsed_tweet
 
-    def get_conversation_thread(self, conversation_id):
+    def get_conversation_pages(self, conversation_id, priority=ROOT_PRIORITY, since_id=None):
+        """
+        Fetches the replies of a conversation page by page, each page is only requested once the previous one is
+        consumed, e.g. to process a page while the next one is fetched
+
+        :param conversation_id: id of the conversation
+        :param priority:        priority of the requests, ROOT_PRIORITY or RELATED_PRIORITY
+        :param since_id:        only fetch the replies newer than this tweet id
+        :return:                generator of the pages of parsed replies, without their sentiment
+        """
         # Query Twitter API for the conversation thread using conversation_id, only allow English resukts
+        # Related conversations are fetched with a lower priority, as the rate limit quota is shared
+        # Only the replies newer than since_id are fetched when it is given, e.g. to follow a live conversation
         search_query = f"conversation_id: {conversation_id} lang:en"
         tweet_fields = "in_reply_to_user_id,public_metrics"
-        search_result = self.twarc.search_recent(query=search_query, tweet_fields=tweet_fields)
+        search_result = self.twarc.search_recent(query=search_query, since_id=since_id, tweet_fields=tweet_fields,
+                                                 priority=priority)
 
+        for page in search_result:
+            yield [self._parse_tweet_reply(tweet) for tweet in ensure_flattened(page)]
+
+    def get_conversation_thread(self, conversation_id, priority=ROOT_PRIORITY, since_id=None):
         # Parse the output to a list
         conversation_thread = []
-        for page in search_result:
-            for tweet in ensure_flattened(page):
-                parsed_tweet = self._parse_tweet_reply(tweet)
-                conversation_thread.append(parsed_tweet)
+        for page in self.get_conversation_pages(conversation_id, priority, since_id):
+            conversation_thread.extend(page)
 
         conversation_thread.sort(key=lambda x: x["id"])
 
@@ -88,7 +123,8 @@ class TwitterAPIService:
         # The tweet must be original, not a retweet, a reply or quote
         search_query = f"{keyword} lang:en -is:retweet -is:reply -is:quote"
         tweet_fields = "id,text,public_metrics"
-        search_result = self.twarc.search_recent(query=search_query, tweet_fields=tweet_fields, max_results=number_of_tweets)
+        search_result = self.twarc.search_recent(query=search_query, tweet_fields=tweet_fields,
+                                                 max_results=number_of_tweets, priority=RELATED_PRIORITY)
 
         # Parse the tweets
         tweets = []
@@ -0,0 +1,42 @@
+import os
+import argparse
+from transformers import AutoModel, AutoModelForSequenceClassification
+
+from backend.services.utils.model_registry import load_model
+from backend.services.utils.inference_backend import OUTPUT_NAMES, ONNX_FILE, export_onnx
+from backend.services.relation_based_classifier_service import RelationBasedClassifierServiceBert
+from backend.services.sentiment_analysis_service import BertweetSentimentAnalysis
+from backend.services.keyword_extraction_service import BertKeywordExtractor
+
+# Every transformer model used by the services, as (auto class, hub name, local directory, from_pretrained arguments)
+EXPORTED_MODELS = [
+    (AutoModelForSequenceClassification, RelationBasedClassifierServiceBert.MODEL,
+     RelationBasedClassifierServiceBert.PATH, {}),
+    (AutoModelForSequenceClassification, BertweetSentimentAnalysis.MODEL, BertweetSentimentAnalysis.PATH,
+     {"id2label": BertweetSentimentAnalysis.id2label, "label2id": BertweetSentimentAnalysis.label2id}),
+    (AutoModel, BertKeywordExtractor.MODEL, BertKeywordExtractor.PATH, {})
+]
+
+
+def export_models():
+    """
+    Exports every transformer model used by the services to ONNX, into an onnx directory next to each saved model
+    in backend/models, where the onnx inference backend loads it from
+
+    :return:    paths of the exported ONNX models
+    """
+    onnx_paths = []
+    for auto_model_class, model_name, path, kwargs in EXPORTED_MODELS:
+        onnx_path = os.path.normpath(os.path.join(path, ONNX_FILE))
+        export_onnx(load_model(auto_model_class, model_name, path, **kwargs), onnx_path, OUTPUT_NAMES[auto_model_class])
+        onnx_paths.append(onnx_path)
+
+    return onnx_paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the transformer models to ONNX into backend/models")
+    parser.parse_args()
+
+    for exported_path in export_models():
+        print(f"Exported {exported_path}")
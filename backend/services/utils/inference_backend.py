@@ -0,0 +1,159 @@
+import os
+import tempfile
+import numpy as np
+import torch
+from transformers import AutoConfig, AutoModel, AutoModelForSequenceClassification
+
+from backend.services.utils.model_registry import load_model
+
+# Supported inference backends, selected with the INFERENCE_BACKEND environment variable
+PYTORCH = "pytorch"             # Full precision (fp32) PyTorch, the default
+PYTORCH_INT8 = "pytorch-int8"   # PyTorch with dynamic int8 quantization of the linear layers
+ONNX = "onnx"                   # Exported ONNX model run with ONNX Runtime
+
+# Names of the outputs each kind of model returns, in the order the PyTorch model returns them
+OUTPUT_NAMES = {
+    AutoModelForSequenceClassification: ["logits"],
+    AutoModel: ["last_hidden_state", "pooler_output"]
+}
+
+ONNX_FILE = "onnx/model.onnx"
+
+
+class IInferenceBackend:
+
+    def __call__(self, tokens):
+        """
+        Abstract function that runs the model on a batch of tokenized inputs.
+
+        :param tokens:  tokenizer output of the batch as numpy arrays (return_tensors="np")
+        :return:        mapping from output name (e.g. logits, pooler_output) to its numpy array
+        """
+        pass
+
+
+class PyTorchBackend(IInferenceBackend):
+    """
+    Inference backend that runs a PyTorch model, either full precision or dynamically quantized.
+    """
+
+    def __init__(self, model, output_names):
+        """
+        :param model:           PyTorch model in evaluation mode
+        :param output_names:    names of the model outputs to return
+        """
+        self.model = model
+        self.config = model.config
+        self.output_names = output_names
+
+    def __call__(self, tokens):
+        inputs = {name: torch.from_numpy(np.asarray(value)) for name, value in tokens.items()}
+
+        with torch.inference_mode():
+            outputs = self.model(**inputs)
+
+        return {name: outputs[name].numpy() for name in self.output_names}
+
+
+class OnnxRuntimeBackend(IInferenceBackend):
+    """
+    Inference backend that runs an exported ONNX model with ONNX Runtime on CPU.
+    """
+
+    def __init__(self, onnx_path, config):
+        """
+        :param onnx_path:   path of the exported ONNX model
+        :param config:      transformers config of the exported model, e.g. for its id2label mapping
+        """
+        try:
+            import onnxruntime
+        except ImportError:
+            raise ImportError("The onnx inference backend requires onnxruntime, install it with "
+                              "'pip install onnxruntime'")
+
+        self.session = onnxruntime.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        self.config = config
+        self.input_names = [session_input.name for session_input in self.session.get_inputs()]
+        self.output_names = [session_output.name for session_output in self.session.get_outputs()]
+
+    def __call__(self, tokens):
+        # Only feed the inputs the exported graph expects, and in the integer type it was exported with
+        inputs = {name: np.asarray(tokens[name], dtype=np.int64) for name in self.input_names}
+        outputs = self.session.run(self.output_names, inputs)
+
+        return dict(zip(self.output_names, outputs))
+
+
+def export_onnx(model, onnx_path, output_names):
+    """
+    Exports a PyTorch model to ONNX with dynamic batch and sequence dimensions, so it accepts dynamically padded
+    batches of any size
+
+    :param model:           PyTorch model in evaluation mode
+    :param onnx_path:       path to write the ONNX model to
+    :param output_names:    names of the model outputs, in the order the model returns them
+    """
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+
+    input_names = ["input_ids", "attention_mask"]
+    dummy_inputs = (torch.ones((1, 8), dtype=torch.long), torch.ones((1, 8), dtype=torch.long))
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes.update({name: {0: "batch"} for name in output_names})
+
+    # Write to a temporary file of this export first, so concurrent workers exporting the same model never write to
+    # the same file or load a partially written model
+    file_descriptor, tmp_path = tempfile.mkstemp(dir=os.path.dirname(onnx_path),
+                                                 prefix=f"{os.path.basename(onnx_path)}.", suffix=".tmp")
+    os.close(file_descriptor)
+    try:
+        with torch.inference_mode():
+            torch.onnx.export(model, dummy_inputs, tmp_path, input_names=input_names, output_names=output_names,
+                              dynamic_axes=dynamic_axes, opset_version=13)
+        os.replace(tmp_path, onnx_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def get_backend_name():
+    """
+    :return:    name of the inference backend selected with the INFERENCE_BACKEND environment variable
+    """
+    return os.getenv("INFERENCE_BACKEND", PYTORCH).lower()
+
+
+def load_inference_backend(auto_model_class, model_name, path, backend=None, **kwargs):
+    """
+    Loads a model and wraps it in the selected inference backend. The ONNX model is exported into the model's local
+    directory the first time it is needed if the export command has not already produced it.
+
+    :param auto_model_class:    transformers auto class used to load the model, e.g. AutoModel
+    :param model_name:          Hugging Face hub name of the model
+    :param path:                local directory the model is saved in
+    :param backend:             name of the inference backend, defaults to the INFERENCE_BACKEND environment variable
+    :param kwargs:              extra arguments passed to from_pretrained
+    :return:                    the inference backend running the model
+    """
+    backend = get_backend_name() if backend is None else backend
+    output_names = OUTPUT_NAMES[auto_model_class]
+
+    if backend == PYTORCH:
+        return PyTorchBackend(load_model(auto_model_class, model_name, path, **kwargs), output_names)
+
+    if backend == PYTORCH_INT8:
+        model = load_model(auto_model_class, model_name, path, **kwargs)
+        quantized_model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return PyTorchBackend(quantized_model, output_names)
+
+    if backend == ONNX:
+        onnx_path = os.path.join(path, ONNX_FILE)
+        if not os.path.isfile(onnx_path):
+            export_onnx(load_model(auto_model_class, model_name, path, **kwargs), onnx_path, output_names)
+
+        return OnnxRuntimeBackend(onnx_path, AutoConfig.from_pretrained(path, **kwargs))
+
+    raise ValueError(f"Unknown inference backend '{backend}', expected one of {PYTORCH}, {PYTORCH_INT8}, {ONNX}")
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,195 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# SQLite limits the number of parameters of a query, so on-disk lookups are chunked
+SQLITE_CHUNK_SIZE = 500
+
+# Seconds a worker waits for another worker's write to the on-disk tier before failing
+SQLITE_TIMEOUT = 30.0
+
+
+def normalize_text(text):
+    """
+    Normalizes a text before hashing it, so texts that only differ in whitespace share a cache entry
+
+    :param text:    input text
+    :return:        text with its whitespace collapsed
+    """
+    return " ".join(text.split())
+
+
+class InferenceCache:
+    """
+    Content-addressed cache of model predictions. Entries are keyed by a hash of the model identifier and the
+    normalized input texts, so the same tweet (or (parent, child) pair) is only scored once per model and version.
+    It has a bounded in-memory LRU tier and an optional on-disk SQLite tier that survives restarts and is shared by
+    every worker using the same file.
+    """
+
+    def __init__(self, model_id, max_size=100000, path=None):
+        """
+        :param model_id:    identifier of the model and its version, part of every key
+        :param max_size:    maximum number of entries kept in memory
+        :param path:        path of the SQLite file of the on-disk tier, None to only cache in memory
+        """
+        self.model_id = model_id
+        self.max_size = max_size
+        self.path = path
+        self.memory = OrderedDict()
+        self.connection = None
+        self.lock = threading.Lock()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.computed = 0  # Predictions computed, duplicate inputs of a batch are computed once
+        self.compute_seconds = 0.0
+
+    def _get_connection(self):
+        # Only open the database on first use, so importing the services never touches the disk
+        if self.connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self.connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT, check_same_thread=False)
+            # Write-ahead logging lets the workers sharing the file read while another one writes
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS inference_cache (key TEXT PRIMARY KEY, value TEXT)")
+
+        return self.connection
+
+    def get_key(self, value):
+        """
+        :param value:   input text, or tuple of input texts, of the model
+        :return:        hash of the model identifier and the normalized input texts
+        """
+        texts = (value,) if isinstance(value, str) else value
+        content = "\x1f".join([self.model_id] + [normalize_text(text) for text in texts])
+
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _remember(self, key, prediction):
+        self.memory[key] = prediction
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+
+    def _get_from_disk(self, keys):
+        found = {}
+        connection = self._get_connection()
+        for start in range(0, len(keys), SQLITE_CHUNK_SIZE):
+            chunk = keys[start:start + SQLITE_CHUNK_SIZE]
+            placeholders = ",".join("?" * len(chunk))
+            rows = connection.execute(f"SELECT key, value FROM inference_cache WHERE key IN ({placeholders})", chunk)
+            found.update(rows)
+
+        return found
+
+    def _put_on_disk(self, predictions):
+        connection = self._get_connection()
+        connection.executemany("INSERT OR REPLACE INTO inference_cache (key, value) VALUES (?, ?)",
+                               predictions.items())
+        connection.commit()
+
+    def get_or_compute(self, values, compute):
+        """
+        Returns the prediction of every input, only computing the ones that are not cached. Duplicate inputs are
+        computed once.
+
+        :param values:  list of inputs, each an input text or a tuple of input texts
+        :param compute: function that takes a list of inputs and returns their predictions (strings) in order
+        :return:        predictions of every input, in the same order as the input
+        """
+        keys = [self.get_key(value) for value in values]
+        predictions = {}
+
+        with self.lock:
+            # The counters count inputs, so duplicate inputs of a batch are counted every time
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    predictions[key] = self.memory[key]
+                    self.memory_hits += 1
+
+            missing_keys = list(dict.fromkeys(key for key in keys if key not in predictions))
+            if self.path is not None and len(missing_keys) > 0:
+                disk_predictions = self._get_from_disk(missing_keys)
+                for key, prediction in disk_predictions.items():
+                    self._remember(key, prediction)
+                self.disk_hits += sum(key in disk_predictions for key in keys)
+                predictions.update(disk_predictions)
+
+        # Compute the misses outside the lock so other threads can keep reading the cache meanwhile
+        missing = {}
+        for key, value in zip(keys, values):
+            if key not in predictions:
+                missing.setdefault(key, value)
+
+        if len(missing) > 0:
+            start = time.perf_counter()
+            computed = dict(zip(missing, compute(list(missing.values()))))
+            seconds = time.perf_counter() - start
+
+            with self.lock:
+                self.misses += sum(key in computed for key in keys)
+                self.computed += len(computed)
+                self.compute_seconds += seconds
+                for key, prediction in computed.items():
+                    self._remember(key, prediction)
+                if self.path is not None:
+                    self._put_on_disk(computed)
+
+            predictions.update(computed)
+
+        return [predictions[key] for key in keys]
+
+    def get_stats(self):
+        """
+        :return:    hit and miss counters of the inputs, and an estimate of the model time saved by the hits based on
+                    the average time it took to compute a prediction
+        """
+        hits = self.memory_hits + self.disk_hits
+        seconds_per_prediction = self.compute_seconds / self.computed if self.computed > 0 else 0.0
+
+        return {"model_id": self.model_id,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "computed": self.computed,
+                "hit_rate": hits / (hits + self.misses) if hits + self.misses > 0 else 0.0,
+                "memory_size": len(self.memory),
+                "compute_seconds": self.compute_seconds,
+                "estimated_seconds_saved": hits * seconds_per_prediction}
+
+
+# Every cache created by the services, by name, so their counters can be exposed together
+inference_caches = {}
+
+
+def create_inference_cache(name, model_id):
+    """
+    Creates a cache for a service's model, configured with the INFERENCE_CACHE_SIZE (entries kept in memory) and
+    INFERENCE_CACHE_PATH (SQLite file of the optional on-disk tier) environment variables
+
+    :param name:        name of the cache in the exposed counters
+    :param model_id:    identifier of the model and its version, part of every key
+    :return:            the inference cache
+    """
+    cache = InferenceCache(model_id, max_size=int(os.getenv("INFERENCE_CACHE_SIZE", "100000")),
+                           path=os.getenv("INFERENCE_CACHE_PATH"))
+    inference_caches[name] = cache
+
+    return cache
+
+
+def get_inference_cache_stats():
+    """
+    :return:    counters of every inference cache, by name
+    """
+    return {name: cache.get_stats() for name, cache in inference_caches.items()}
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,176 @@
+import time
+import uuid
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Number of jobs kept, the oldest finished jobs are forgotten beyond it
+MAX_JOBS = 1000
+
+# Statuses of a job
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """
+    A submitted call of the function of a JobQueue, and its result once it is done
+    """
+
+    def __init__(self, job_id, key, future):
+        """
+        :param job_id:  unique id of the job
+        :param key:     key of the job, concurrent jobs with the same key are de-duplicated
+        :param future:  future of the call in the executor
+        """
+        self.job_id = job_id
+        self.key = key
+        self.future = future
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    def get_state(self):
+        if not self.future.done():
+            return RUNNING if self.future.running() else QUEUED
+
+        return FAILED if self.future.cancelled() or self.future.exception() is not None else DONE
+
+    def get_status(self):
+        """
+        :return:    id, key, state and timestamps of the job, with its result if it is done or the name of its error
+                    if it failed
+        """
+        state = self.get_state()
+        status = {"job_id": self.job_id, "key": self.key, "status": state, "submitted_at": self.submitted_at,
+                  "finished_at": self.finished_at}
+        if state == DONE:
+            status["result"] = self.future.result()
+        elif state == FAILED:
+            status["error"] = "Cancelled" if self.future.cancelled() else type(self.future.exception()).__name__
+
+        return status
+
+
+class JobQueue:
+    """
+    In-process job queue that runs a function on a pool of worker processes, so long running calls such as the
+    analysis of a tweet do not hold the request that submitted them. The workers are started on the first submitted
+    job, with the spawn start method so they never inherit the threads and models of the API process, and each runs
+    the initializer once, e.g. to load the models it keeps resident. A job submitted while another job with the same
+    key is queued or running gets that job instead of computing the same result twice.
+    """
+
+    def __init__(self, function, max_workers=None, initializer=None, max_jobs=MAX_JOBS, executor=None):
+        """
+        :param function:    function run by the jobs, it and its arguments and result must be picklable
+        :param max_workers: number of worker processes, defaults to the number of CPUs
+        :param initializer: function run once by every worker process when it starts
+        :param max_jobs:    number of jobs kept, the oldest finished jobs are forgotten beyond it
+        :param executor:    executor to run the jobs on instead of the worker processes, e.g. a thread pool in tests
+        """
+        self.function = function
+        self.max_workers = max_workers
+        self.initializer = initializer
+        self.max_jobs = max_jobs
+        self.executor = executor
+        self.jobs = OrderedDict()
+        self.active_jobs = {}
+        self.lock = threading.Lock()
+
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def _get_executor(self):
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=self.initializer,
+                                                mp_context=multiprocessing.get_context("spawn"))
+
+        return self.executor
+
+    def _submit(self, *args):
+        try:
+            return self._get_executor().submit(self.function, *args)
+        except BrokenProcessPool:
+            # A worker died, e.g. killed when running out of memory, start a new pool
+            self.executor = None
+            return self._get_executor().submit(self.function, *args)
+
+    def _finish(self, job):
+        with self.lock:
+            job.finished_at = time.time()
+            if self.active_jobs.get(job.key) == job.job_id:
+                del self.active_jobs[job.key]
+
+    def _forget_finished_jobs(self):
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.future.done()]:
+            if len(self.jobs) <= self.max_jobs:
+                break
+            del self.jobs[job_id]
+
+    def submit(self, key, *args):
+        """
+        Submits a job, unless a job with the same key is queued or running
+
+        :param key:     key of the job, e.g. the id of the tweet to analyse
+        :param args:    arguments of the function
+        :return:        status of the submitted job, or of the job with the same key
+        """
+        with self.lock:
+            active_job_id = self.active_jobs.get(key)
+            if active_job_id is not None:
+                self.deduplicated += 1
+                job = self.jobs[active_job_id]
+            else:
+                job = Job(uuid.uuid4().hex, key, self._submit(*args))
+                self.jobs[job.job_id] = job
+                self.active_jobs[key] = job.job_id
+                self.submitted += 1
+                self._forget_finished_jobs()
+
+        if active_job_id is None:
+            # The callback runs at once if the job is already done, so it is added outside of the lock
+            job.future.add_done_callback(lambda _: self._finish(job))
+
+        return job.get_status()
+
+    def get_status(self, job_id):
+        """
+        :param job_id:  id of a job
+        :return:        status of the job, None if it is unknown or was forgotten
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+
+        return job.get_status() if job is not None else None
+
+    def get_stats(self):
+        """
+        :return:    number of jobs in each state, and number of submitted and de-duplicated jobs
+        """
+        with self.lock:
+            states = [job.get_state() for job in self.jobs.values()]
+
+        return {**{state: states.count(state) for state in (QUEUED, RUNNING, DONE, FAILED)},
+                "submitted": self.submitted, "deduplicated": self.deduplicated}
+
+    def shutdown(self):
+        """
+        Stops the worker processes once the running jobs are done, the queued jobs are cancelled
+        """
+        # Cancelling a future runs its done callbacks, which take the lock, so the futures are cancelled without it
+        with self.lock:
+            futures = [job.future for job in self.jobs.values()]
+        for future in futures:
+            future.cancel()
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,35 @@
+import json
+from collections.abc import Mapping
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _encode_default(value):
+    # NumPy scalars, e.g. the degrees of the vectorized argumentation engine, are encoded as the Python numbers
+    if hasattr(value, "item"):
+        return value.item()
+    # Mappings which are not dicts, e.g. the TweetRecord attributes of the tweets, are encoded as JSON objects
+    if isinstance(value, Mapping):
+        return dict(value)
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(value):
+    """
+    Encodes a value as compact JSON, with orjson when it is installed and the json module otherwise
+
+    :param value:   value made of mappings, lists, strings, numbers, booleans and None
+    :return:        the UTF-8 encoded JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_encode_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    return json.dumps(value, default=_encode_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+if __name__ == "__main__":
+    pass
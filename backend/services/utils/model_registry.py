@@ -0,0 +1,177 @@
+import os
+import time
+import threading
+from transformers import AutoTokenizer
+
+from backend.services.utils.weights_store import is_exported, export_weights, load_model_mmap
+
+
+class ModelRegistry:
+    """
+    Process wide registry of the transformer models and tokenizers used by the services. Services register a loader
+    for each model at import time, which is cheap, and the model itself is only loaded the first time it is requested
+    (or when the registry is explicitly warmed up). Every model is loaded at most once per process and shared by all
+    the services that request it.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._instances = {}
+        self._load_times = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, loader):
+        """
+        Registers a loader for a model without loading it
+
+        :param name:    unique name of the model in the registry
+        :param loader:  function with no arguments that loads and returns the model
+        """
+        with self._lock:
+            self._loaders[name] = loader
+
+    def get(self, name):
+        """
+        Returns a registered model, loading it on first use
+
+        :param name:    name of the model in the registry
+        :return:        the loaded model instance shared by the whole process
+        """
+        if name in self._instances:
+            return self._instances[name]
+
+        with self._lock:
+            # Another thread may have loaded the model while this one was waiting for the lock
+            if name not in self._instances:
+                start = time.perf_counter()
+                self._instances[name] = self._loaders[name]()
+                self._load_times[name] = time.perf_counter() - start
+
+            return self._instances[name]
+
+    def is_loaded(self, name):
+        """
+        :param name:    name of the model in the registry
+        :return:        whether the model has already been loaded
+        """
+        return name in self._instances
+
+    def get_registered_names(self):
+        """
+        :return:    names of all the registered models, loaded or not
+        """
+        return list(self._loaders)
+
+    def warm_up(self, names=None):
+        """
+        Eagerly loads models, e.g. at application startup, so the first request does not pay for loading them
+
+        :param names:   names of the models to load, defaults to every registered model
+        :return:        seconds spent loading the requested models
+        """
+        start = time.perf_counter()
+        for name in (self.get_registered_names() if names is None else names):
+            self.get(name)
+
+        return time.perf_counter() - start
+
+    def get_load_times(self):
+        """
+        :return:    mapping from model name to the seconds it took to load, for the models loaded so far
+        """
+        return dict(self._load_times)
+
+
+def _is_saved(path, marker_file):
+    return os.path.isfile(os.path.join(path, marker_file))
+
+
+def load_tokenizer(model_name, path, **kwargs):
+    """
+    Loads a tokenizer from its local directory if it has been saved there, otherwise downloads it from the Hugging
+    Face hub and saves it to the local directory once to prevent re-downloading
+
+    :param model_name:  Hugging Face hub name of the tokenizer
+    :param path:        local directory the tokenizer is saved in
+    :param kwargs:      extra arguments passed to from_pretrained
+    :return:            the loaded tokenizer
+    """
+    # Set tokenizer normalization to true to continue tweet preprocessing (normalization) according to the models'
+    # requirements
+    kwargs.setdefault("normalization", True)
+    if _is_saved(path, "tokenizer_config.json"):
+        return AutoTokenizer.from_pretrained(path, **kwargs)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=path, **kwargs)
+    tokenizer.save_pretrained(path)
+
+    return tokenizer
+
+
+def load_model(auto_model_class, model_name, path, **kwargs):
+    """
+    Loads a model from its local directory if it has been saved there, otherwise downloads it from the Hugging Face
+    hub and saves it to the local directory once to prevent re-downloading.
+
+    If MMAP_MODEL_WEIGHTS is true, the weights are instead memory-mapped from a read-only weights store exported next
+    to the saved model (exported on first use), so every worker process on the host shares the same weight pages.
+
+    :param auto_model_class:    transformers auto class used to load the model, e.g. AutoModel
+    :param model_name:          Hugging Face hub name of the model
+    :param path:                local directory the model is saved in
+    :param kwargs:              extra arguments passed to from_pretrained
+    :return:                    the loaded model, in evaluation mode
+    """
+    store_path = os.path.join(path, "mmap")
+    use_weights_store = os.getenv("MMAP_MODEL_WEIGHTS", "false").lower() == "true"
+
+    if use_weights_store and is_exported(store_path) and _is_saved(path, "config.json"):
+        return load_model_mmap(auto_model_class, path, store_path, **kwargs)
+
+    if _is_saved(path, "config.json"):
+        model = auto_model_class.from_pretrained(path, **kwargs)
+    else:
+        model = auto_model_class.from_pretrained(model_name, cache_dir=path, **kwargs)
+        model.save_pretrained(path)
+
+    if use_weights_store:
+        # Export the weights store once, then drop this private copy for the shared memory-mapped one
+        export_weights(model, store_path)
+        return load_model_mmap(auto_model_class, path, store_path, **kwargs)
+
+    model.eval()
+
+    return model
+
+
+# Single registry shared by the whole process
+model_registry = ModelRegistry()
+
+# The keyword extraction and sentiment analysis models are both fine-tuned from vinai/bertweet-base and use its
+# tokenizer and vocabulary, so they can share a single tokenizer instance
+BERTWEET_MODEL = "vinai/bertweet-base"
+BERTWEET_PATH = os.path.join(os.path.dirname(__file__), "../../models/vinai/bertweet-base")
+BERTWEET_TOKENIZER = "bertweet/tokenizer"
+
+
+def register_bertweet_tokenizer(name, loader):
+    """
+    Registers the tokenizer of a BERTweet based model. If SHARE_BERTWEET_TOKENIZER is true, the name points at the
+    single BERTweet tokenizer shared by all the services instead
+
+    :param name:    name of the tokenizer in the registry
+    :param loader:  function that loads the model's own tokenizer, used when sharing is off
+    """
+    if os.getenv("SHARE_BERTWEET_TOKENIZER", "false").lower() != "true":
+        model_registry.register(name, loader)
+        return
+
+    if BERTWEET_TOKENIZER not in model_registry.get_registered_names():
+        model_registry.register(BERTWEET_TOKENIZER,
+                                lambda: load_tokenizer(BERTWEET_MODEL, BERTWEET_PATH))
+
+    model_registry.register(name, lambda: model_registry.get(BERTWEET_TOKENIZER))
+
+
+if __name__ == "__main__":
+    pass
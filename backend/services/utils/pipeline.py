@@ -0,0 +1,177 @@
+import time
+import queue
+import threading
+from collections import defaultdict
+
+# Items waiting in the queue of a stage at most, the stage before it waits when the queue is full
+QUEUE_SIZE = 8
+# Items a stage processes together at most, taken from its queue when they are already waiting
+MAX_BATCH_SIZE = 8
+
+# Marks the end of the items put in the queue of a stage
+_DONE = object()
+
+
+class PipelineStats:
+    """
+    Counters of the pipeline stages run by the process, aggregated by stage name: the items and batches processed,
+    the seconds spent processing them, and the items waiting in the queues of the running stages
+    """
+
+    def __init__(self):
+        self.items = defaultdict(int)
+        self.batches = defaultdict(int)
+        self.busy_seconds = defaultdict(float)
+        self.max_queue_depth = defaultdict(int)
+        self.running_stages = set()
+        self.lock = threading.Lock()
+
+    def start(self, stage):
+        with self.lock:
+            self.running_stages.add(stage)
+
+    def stop(self, stage):
+        with self.lock:
+            self.running_stages.discard(stage)
+
+    def record(self, name, items, seconds, queue_depth):
+        """
+        :param name:        name of the stage
+        :param items:       number of items of the processed batch
+        :param seconds:     seconds spent processing the batch
+        :param queue_depth: items waiting in the queue of the stage when the batch was taken
+        """
+        with self.lock:
+            self.items[name] += items
+            self.batches[name] += 1
+            self.busy_seconds[name] += seconds
+            self.max_queue_depth[name] = max(self.max_queue_depth[name], queue_depth)
+
+    def get_stats(self):
+        """
+        :return:    items, batches, busy seconds, throughput in items per busy second, and current and max queue depth
+                    of each stage
+        """
+        with self.lock:
+            queue_depths = defaultdict(int)
+            for stage in self.running_stages:
+                queue_depths[stage.name] += stage.get_queue_depth()
+
+            return {name: {"items": self.items[name],
+                           "batches": self.batches[name],
+                           "busy_seconds": self.busy_seconds[name],
+                           "items_per_second": self.items[name] / self.busy_seconds[name]
+                           if self.busy_seconds[name] > 0 else 0.0,
+                           "queue_depth": queue_depths[name],
+                           "max_queue_depth": self.max_queue_depth[name]}
+                    for name in sorted(set(self.batches) | set(queue_depths))}
+
+
+pipeline_stats = PipelineStats()
+
+
+class PipelineStage:
+    """
+    Stage of a producer/consumer pipeline running on its own worker thread. The items put in its bounded queue are
+    processed in batches, the items already waiting when a batch starts are processed with it, then passed on to the
+    next stage, so each stage works on a batch while the stages before it produce the next ones. When the function
+    of a stage fails, the stage keeps taking the items put in its queue without processing them, so the producers
+    never wait forever, and its error is raised by join.
+    """
+
+    def __init__(self, name, function, next_stage=None, queue_size=QUEUE_SIZE, max_batch_size=MAX_BATCH_SIZE,
+                 item_size=None, stats=pipeline_stats):
+        """
+        :param name:            name of the stage in the stats
+        :param function:        function processing a list of items, its return value is ignored
+        :param next_stage:      stage the processed items are put in, closed once this stage is done
+        :param queue_size:      items waiting in the queue at most
+        :param max_batch_size:  items processed together at most
+        :param item_size:       function returning the number of items an item counts for in the stats, e.g. the
+                                number of tweets of a page, 1 by default
+        :param stats:           PipelineStats the stage records its batches in
+        """
+        self.name = name
+        self.function = function
+        self.next_stage = next_stage
+        self.max_batch_size = max_batch_size
+        self.item_size = item_size or (lambda item: 1)
+        self.stats = stats
+        self.queue = queue.Queue(queue_size)
+        self.error = None
+        self.thread = threading.Thread(target=self._run, name=f"pipeline-{name}", daemon=True)
+
+    def start(self):
+        self.stats.start(self)
+        self.thread.start()
+
+        return self
+
+    def put(self, item):
+        """
+        Puts an item in the queue of the stage, waits while the queue is full
+        """
+        self.queue.put(item)
+
+    def close(self):
+        """
+        Marks the end of the items, the stage stops once it has processed the items in its queue
+        """
+        self.queue.put(_DONE)
+
+    def join(self):
+        """
+        Waits for the stage and the stages after it to process all their items
+
+        :return:    None, the error of the first failed stage is raised
+        """
+        self.thread.join()
+        self.stats.stop(self)
+        if self.next_stage is not None:
+            self.next_stage.join()
+        if self.error is not None:
+            raise self.error
+
+    def get_queue_depth(self):
+        return self.queue.qsize()
+
+    def _take_batch(self):
+        # Waits for an item, then takes the items already waiting behind it
+        batch = [self.queue.get()]
+        queue_depth = self.queue.qsize() + 1
+        while batch[-1] is not _DONE and len(batch) < self.max_batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+
+        return batch, queue_depth
+
+    def _run(self):
+        done = False
+        while not done:
+            batch, queue_depth = self._take_batch()
+            if batch[-1] is _DONE:
+                batch.pop()
+                done = True
+            if not batch or self.error is not None:
+                continue
+
+            start = time.perf_counter()
+            try:
+                self.function(batch)
+            except BaseException as error:
+                self.error = error
+                continue
+            self.stats.record(self.name, sum(map(self.item_size, batch)), time.perf_counter() - start, queue_depth)
+
+            if self.next_stage is not None:
+                for item in batch:
+                    self.next_stage.put(item)
+
+        if self.next_stage is not None:
+            self.next_stage.close()
+
+
+if __name__ == "__main__":
+    pass
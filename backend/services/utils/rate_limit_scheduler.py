@@ -0,0 +1,210 @@
+import os
+import time
+import asyncio
+import threading
+from collections import defaultdict
+
+# Priorities of the Twitter API requests, lower values are served first
+ROOT_PRIORITY = 0       # Requests for the analysed tweet and its conversation
+RELATED_PRIORITY = 1    # Requests expanding the analysis with related tweets and their conversations
+PRIORITY_NAMES = {ROOT_PRIORITY: "root", RELATED_PRIORITY: "related"}
+
+# Longest a waiting request sleeps before checking the quota again, as other requests may update it meanwhile
+POLL_SECONDS = 1.0
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a low priority request is shed because it would wait too long for the rate limit quota
+    """
+    pass
+
+
+class RateLimitScheduler:
+    """
+    Central scheduler of the Twitter API requests of every analysis running in the process. It tracks the remaining
+    quota of each endpoint from the x-rate-limit headers of the responses and makes requests wait for the quota to
+    reset rather than stalling in the API client. Part of the quota is reserved for the root conversation fetches,
+    related tweet expansions only proceed while no root request is waiting, and related requests that would wait
+    longer than their maximum wait are shed.
+    """
+
+    def __init__(self, root_reserve=0, max_wait=None, clock=time.time, sleep=time.sleep):
+        """
+        :param root_reserve:    number of requests of each window only root requests can use
+        :param max_wait:        mapping from priority to the maximum seconds its requests wait before being shed, the
+                                requests of the missing priorities wait as long as needed
+        :param clock:           function returning the current time in seconds since the epoch, like the reset header
+        :param sleep:           function sleeping a number of seconds, replaced along with the clock in tests
+        """
+        self.root_reserve = root_reserve
+        self.max_wait = max_wait or {}
+        self.clock = clock
+        self.sleep = sleep
+        self.quotas = {}
+        self.waiting = defaultdict(int)
+        self.lock = threading.Lock()
+
+        self.requests = defaultdict(int)
+        self.shed = defaultdict(int)
+        self.wait_seconds = defaultdict(float)
+        self.max_wait_seconds = defaultdict(float)
+
+    def _reserve(self, endpoint, priority):
+        """
+        Takes one request from the quota of an endpoint if the priority allows it
+
+        :return:    0 if the request can be sent, otherwise the seconds until the quota resets
+        """
+        with self.lock:
+            quota = self.quotas.get(endpoint)
+            now = self.clock()
+            if quota is None or now >= quota["reset"]:
+                # Nothing is known about the current window yet, the response headers will tell
+                return 0.0
+
+            # Lower priorities leave the reserve and a request for every waiting higher priority request
+            required = 0
+            if priority > ROOT_PRIORITY:
+                required = self.root_reserve + sum(count for (waiting_endpoint, waiting_priority), count
+                                                   in self.waiting.items()
+                                                   if waiting_endpoint == endpoint and waiting_priority < priority)
+
+            if quota["remaining"] > required:
+                quota["remaining"] -= 1
+                return 0.0
+
+            return max(quota["reset"] - now, 0.0)
+
+    def _start_waiting(self, endpoint, priority, start, wait):
+        # Shed the request at once if it would wait longer than its priority allows
+        if priority in self.max_wait and self.clock() - start + wait > self.max_wait[priority]:
+            with self.lock:
+                self.shed[priority] += 1
+            raise RateLimitExceeded(f"Shed a request to {endpoint}, the rate limit resets in {wait:.0f}s")
+
+    def _record(self, priority, waited):
+        with self.lock:
+            self.requests[priority] += 1
+            self.wait_seconds[priority] += waited
+            self.max_wait_seconds[priority] = max(self.max_wait_seconds[priority], waited)
+
+        return waited
+
+    def acquire(self, endpoint, priority=ROOT_PRIORITY):
+        """
+        Waits until a request to an endpoint can be sent without exceeding its rate limit
+
+        :param endpoint:    path of the API endpoint, each endpoint has its own quota
+        :param priority:    priority of the request, ROOT_PRIORITY or RELATED_PRIORITY
+        :return:            seconds the request waited
+        """
+        start = self.clock()
+        wait = self._reserve(endpoint, priority)
+        if wait == 0.0:
+            return self._record(priority, 0.0)
+
+        with self.lock:
+            self.waiting[(endpoint, priority)] += 1
+        try:
+            while wait > 0.0:
+                self._start_waiting(endpoint, priority, start, wait)
+                self.sleep(min(wait, POLL_SECONDS))
+                wait = self._reserve(endpoint, priority)
+        finally:
+            with self.lock:
+                self.waiting[(endpoint, priority)] -= 1
+
+        return self._record(priority, self.clock() - start)
+
+    async def acquire_async(self, endpoint, priority=ROOT_PRIORITY):
+        """
+        Asynchronous variant of acquire, waiting without blocking the event loop
+
+        :param endpoint:    path of the API endpoint, each endpoint has its own quota
+        :param priority:    priority of the request, ROOT_PRIORITY or RELATED_PRIORITY
+        :return:            seconds the request waited
+        """
+        start = self.clock()
+        wait = self._reserve(endpoint, priority)
+        if wait == 0.0:
+            return self._record(priority, 0.0)
+
+        with self.lock:
+            self.waiting[(endpoint, priority)] += 1
+        try:
+            while wait > 0.0:
+                self._start_waiting(endpoint, priority, start, wait)
+                await asyncio.sleep(min(wait, POLL_SECONDS))
+                wait = self._reserve(endpoint, priority)
+        finally:
+            with self.lock:
+                self.waiting[(endpoint, priority)] -= 1
+
+        return self._record(priority, self.clock() - start)
+
+    def update(self, endpoint, headers):
+        """
+        Updates the quota of an endpoint from the rate limit headers of one of its responses
+
+        :param endpoint:    path of the API endpoint
+        :param headers:     headers of the response
+        """
+        if "x-rate-limit-remaining" not in headers or "x-rate-limit-reset" not in headers:
+            return
+
+        remaining = int(headers["x-rate-limit-remaining"])
+        reset = float(headers["x-rate-limit-reset"])
+        with self.lock:
+            quota = self.quotas.get(endpoint)
+            # Responses of concurrent requests arrive out of order, only keep the lowest quota seen in a window
+            if quota is None or reset > quota["reset"] or remaining < quota["remaining"]:
+                self.quotas[endpoint] = {"remaining": remaining, "reset": reset}
+
+    def exhaust(self, endpoint, reset):
+        """
+        Marks the quota of an endpoint as used up until it resets, after a 429 response
+
+        :param endpoint:    path of the API endpoint
+        :param reset:       time the quota resets, in seconds since the epoch
+        """
+        with self.lock:
+            self.quotas[endpoint] = {"remaining": 0, "reset": reset}
+
+    def get_stats(self):
+        """
+        :return:    remaining quota of each endpoint, and the number of requests, shed requests and seconds waited by
+                    priority
+        """
+        with self.lock:
+            priorities = sorted(set(self.requests) | set(self.shed))
+            priority_stats = {}
+            for priority in priorities:
+                priority_stats[PRIORITY_NAMES.get(priority, priority)] = {
+                    "requests": self.requests[priority],
+                    "shed": self.shed[priority],
+                    "wait_seconds": self.wait_seconds[priority],
+                    "max_wait_seconds": self.max_wait_seconds[priority]}
+
+            return {"quotas": {endpoint: dict(quota) for endpoint, quota in self.quotas.items()},
+                    "priorities": priority_stats}
+
+
+def create_rate_limit_scheduler():
+    """
+    Creates the scheduler configured with the TWITTER_ROOT_RESERVE (requests of each window reserved for the root
+    conversations) and TWITTER_RELATED_MAX_WAIT (seconds a related tweet request waits before being shed)
+    environment variables
+
+    :return:    the rate limit scheduler
+    """
+    return RateLimitScheduler(root_reserve=int(os.getenv("TWITTER_ROOT_RESERVE", "10")),
+                              max_wait={RELATED_PRIORITY: float(os.getenv("TWITTER_RELATED_MAX_WAIT", "30"))})
+
+
+# Single scheduler shared by every Twitter client of the process, as they share the same quota
+twitter_rate_limit_scheduler = create_rate_limit_scheduler()
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,110 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# Number of results kept, the oldest are forgotten beyond it
+MAX_RESULTS = 100
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls computing the same result: the first call for a key runs the function, the calls for
+    the same key arriving while it runs wait for it and get its result, or its error, instead of computing it again.
+    The results are then kept for ttl_seconds, so the calls arriving shortly after get them at once as well.
+    """
+
+    def __init__(self, ttl_seconds=0.0, max_results=MAX_RESULTS, clock=time.monotonic):
+        """
+        :param ttl_seconds: seconds a result is kept after it is computed, 0 to only coalesce the concurrent calls
+        :param max_results: number of results kept, the oldest are forgotten beyond it
+        :param clock:       function returning the current time in seconds, replaced in tests
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_results = max_results
+        self.clock = clock
+        self.calls = {}
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.executed = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    def _get_result(self, key):
+        """
+        :return:    the result kept for a key and whether it was found, expired results are forgotten
+        """
+        if key not in self.results:
+            return None, False
+
+        expires_at, result = self.results[key]
+        if expires_at <= self.clock():
+            del self.results[key]
+            return None, False
+
+        return result, True
+
+    def _keep_result(self, key, result):
+        if self.ttl_seconds <= 0:
+            return
+
+        self.results.pop(key, None)
+        self.results[key] = (self.clock() + self.ttl_seconds, result)
+        while len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+
+    def do(self, key, function, *args, **kwargs):
+        """
+        Calls a function, unless a call with the same key is running or its result is still kept
+
+        :param key:         key of the call, calls with the same key must compute the same result
+        :param function:    function computing the result
+        :param args:        arguments of the function
+        :param kwargs:      keyword arguments of the function
+        :return:            the result of the function, shared by every coalesced call
+        """
+        running = False
+        with self.lock:
+            result, found = self._get_result(key)
+            if found:
+                self.cache_hits += 1
+                return result
+
+            future = self.calls.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                future = self.calls[key] = Future()
+                self.executed += 1
+                running = True
+
+        if not running:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as error:
+            with self.lock:
+                del self.calls[key]
+            future.set_exception(error)
+            raise
+
+        with self.lock:
+            del self.calls[key]
+            self._keep_result(key, result)
+        future.set_result(result)
+
+        return result
+
+    def get_stats(self):
+        """
+        :return:    number of executed, coalesced and cached calls, and of calls running and results kept
+        """
+        with self.lock:
+            return {"executed": self.executed, "coalesced": self.coalesced, "cache_hits": self.cache_hits,
+                    "in_flight": len(self.calls), "cached_results": len(self.results)}
+
+
+if __name__ == "__main__":
+    pass
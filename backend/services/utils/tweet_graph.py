@@ -0,0 +1,276 @@
+import sys
+from collections.abc import MutableMapping
+
+# Attributes of the replies of a tweet tree, each stored in a slot of a TweetRecord rather than in a dict per tweet
+TWEET_FIELDS = ("id", "text", "retweet_count", "reply_count", "like_count", "quote_count", "sentiment",
+                "argumentative_type", "acceptability")
+_FIELDS = frozenset(TWEET_FIELDS)
+# Attributes with a handful of values, e.g. "positive" or "attack", interned so every tweet refers to the same string
+_INTERNED_FIELDS = frozenset(("sentiment", "argumentative_type"))
+
+
+class TweetRecord(MutableMapping):
+    """
+    Attributes of a tweet, with the interface of the attributes dict of a tweet tree node but stored in slots: a
+    record takes about a third of the memory of the dict, as the attribute names are not stored with every tweet. An
+    attribute which is not set, e.g. the acceptability before the evaluation, is missing like from a dict, and only
+    the attributes of TWEET_FIELDS can be set.
+    """
+    __slots__ = TWEET_FIELDS
+
+    def __init__(self, attributes=(), **kwargs):
+        """
+        :param attributes:  mapping or (name, value) pairs of the attributes of the tweet
+        :param kwargs:      attributes of the tweet
+        """
+        for key, value in dict(attributes, **kwargs).items():
+            self[key] = value
+
+    def __getitem__(self, key):
+        if key in _FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in _FIELDS:
+            raise KeyError(f"Unknown tweet attribute {key!r}, the attributes are: {', '.join(TWEET_FIELDS)}")
+        if key in _INTERNED_FIELDS and type(value) is str:
+            value = sys.intern(value)
+
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+
+        delattr(self, key)
+
+    def __contains__(self, key):
+        return key in _FIELDS and hasattr(self, key)
+
+    def __iter__(self):
+        return (key for key in TWEET_FIELDS if hasattr(self, key))
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, key, default=None):
+        if key in _FIELDS:
+            return getattr(self, key, default)
+
+        return default
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class _NodeView:
+    """
+    Nodes of a TweetGraph, like the nodes of a networkx graph: the data of a node is a dict holding its attributes
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, tweet_id):
+        return {"attributes": self.graph._attributes[self.graph._index[tweet_id]]}
+
+    def __call__(self, data=False, default=None):
+        graph = self.graph
+        if data is False:
+            return iter(graph._index)
+        if data is True:
+            return ((tweet_id, {"attributes": graph._attributes[index]}) for tweet_id, index in graph._index.items())
+        if data == "attributes":
+            return ((tweet_id, graph._attributes[index]) for tweet_id, index in graph._index.items())
+
+        return ((tweet_id, default) for tweet_id in graph._index)
+
+    def __iter__(self):
+        return iter(self.graph._index)
+
+    def __len__(self):
+        return len(self.graph._index)
+
+    def __contains__(self, tweet_id):
+        return tweet_id in self.graph._index
+
+
+class _EdgeView:
+    """
+    Edges of a TweetGraph, like the edges of a networkx graph: (parent id, tweet id) pairs, with the data of each
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, edge):
+        parent_id, tweet_id = edge
+        if not self.graph.has_edge(parent_id, tweet_id):
+            raise KeyError(edge)
+
+        return self.graph._edge_data[self.graph._index[tweet_id]]
+
+    def __call__(self, data=False):
+        graph = self.graph
+        edges = ((graph._parents[index], tweet_id, graph._edge_data[index])
+                 for tweet_id, index in graph._index.items() if graph._parents[index] is not None)
+        if data:
+            return edges
+
+        return ((parent_id, tweet_id) for parent_id, tweet_id, _ in edges)
+
+    def __iter__(self):
+        return self()
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, edge):
+        return self.graph.has_edge(*edge)
+
+
+class TweetGraph:
+    """
+    Compact store of the tweets of a tweet tree, with the part of the networkx DiGraph interface the tweet tree,
+    argumentation and API code use: the nodes with their attributes, the successors and predecessor of a tweet, the
+    edges with their data, and adding and removing tweets. Every tweet has at most one parent, so the tree is stored
+    as parallel lists indexed by the position of each tweet rather than as the successor, predecessor and data dicts
+    of every node. The data of the edges is shared between the edges with the same data, so it must not be changed
+    in place, add the edge again instead.
+    """
+
+    def __init__(self):
+        self._index = {}
+        self._attributes = []
+        self._parents = []
+        # The children of each tweet in the order they were added, None for the tweets without children
+        self._children = []
+        self._edge_data = []
+        self._shared_edge_data = {}
+
+    @property
+    def nodes(self):
+        return _NodeView(self)
+
+    @property
+    def edges(self):
+        return _EdgeView(self)
+
+    def __contains__(self, tweet_id):
+        return tweet_id in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def number_of_nodes(self):
+        return len(self._index)
+
+    def has_node(self, tweet_id):
+        return tweet_id in self._index
+
+    def has_edge(self, parent_id, tweet_id):
+        index = self._index.get(tweet_id)
+        return index is not None and parent_id is not None and self._parents[index] == parent_id
+
+    def add_node(self, tweet_id, attributes=None):
+        """
+        Adds a tweet, or replaces the attributes of the tweet if it is already in the graph
+
+        :param tweet_id:    id of the tweet
+        :param attributes:  attributes of the tweet, a TweetRecord for the compact storage or any mapping
+        """
+        index = self._index.get(tweet_id)
+        if index is not None:
+            if attributes is not None:
+                self._attributes[index] = attributes
+            return
+
+        self._index[tweet_id] = len(self._attributes)
+        self._attributes.append(attributes)
+        self._parents.append(None)
+        self._children.append(None)
+        self._edge_data.append(None)
+
+    def add_edge(self, parent_id, tweet_id, **data):
+        """
+        Adds an edge from a tweet to its reply, both must be in the graph. A tweet has a single parent, the edge
+        replaces the edge from its previous parent.
+
+        :param parent_id:   id of the tweet replied to
+        :param tweet_id:    id of the reply
+        :param data:        data of the edge, e.g. its color
+        """
+        parent_index = self._index[parent_id]
+        index = self._index[tweet_id]
+
+        previous_parent_id = self._parents[index]
+        if previous_parent_id != parent_id:
+            if previous_parent_id is not None:
+                self._children[self._index[previous_parent_id]].remove(tweet_id)
+            if self._children[parent_index] is None:
+                self._children[parent_index] = []
+            self._children[parent_index].append(tweet_id)
+            self._parents[index] = parent_id
+
+        key = tuple(sorted(data.items()))
+        self._edge_data[index] = self._shared_edge_data.setdefault(key, data)
+
+    def remove_nodes_from(self, tweet_ids):
+        """
+        Removes tweets and their edges, their replies left in the graph no longer have a parent
+
+        :param tweet_ids:   ids of the tweets to remove, the ids which are not in the graph are ignored
+        """
+        for tweet_id in tweet_ids:
+            index = self._index.pop(tweet_id, None)
+            if index is None:
+                continue
+
+            parent_id = self._parents[index]
+            if parent_id in self._index:
+                parent_index = self._index[parent_id]
+                self._children[parent_index].remove(tweet_id)
+                if not self._children[parent_index]:
+                    self._children[parent_index] = None
+            for child_id in self._children[index] or ():
+                child_index = self._index.get(child_id)
+                if child_index is not None:
+                    self._parents[child_index] = None
+                    self._edge_data[child_index] = None
+
+            # The position is left unused, so the positions of the other tweets do not change
+            self._attributes[index] = None
+            self._parents[index] = None
+            self._children[index] = None
+            self._edge_data[index] = None
+
+    def successors(self, tweet_id):
+        return iter(self._children[self._index[tweet_id]] or ())
+
+    def predecessors(self, tweet_id):
+        parent_id = self._parents[self._index[tweet_id]]
+        return iter(() if parent_id is None else (parent_id,))
+
+    def out_degree(self, tweet_id):
+        return len(self._children[self._index[tweet_id]] or ())
+
+    def in_degree(self, tweet_id):
+        return int(self._parents[self._index[tweet_id]] is not None)
+
+    def adjacency(self):
+        """
+        :return:    (tweet id, ids of its children) pairs of every tweet
+        """
+        return ((tweet_id, self._children[index] or ()) for tweet_id, index in self._index.items())
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,104 @@
+import os
+import threading
+from urllib.parse import urlparse
+from twarc.client2 import Twarc2
+from twarc.decorators2 import catch_request_exceptions, rate_limit
+
+from backend.services.utils.twitter_fixtures import TwitterFixtures
+from backend.services.utils.rate_limit_scheduler import ROOT_PRIORITY, twitter_rate_limit_scheduler
+
+# Base URL of the Twitter API, hardcoded in the URLs twarc requests
+TWITTER_API_BASE_URL = "https://api.twitter.com"
+# Connect and read timeouts of the requests, the ones twarc uses
+REQUEST_TIMEOUT = (3.05, 31)
+# Seconds the quota of an endpoint is considered used up after a 429 response without rate limit headers
+RATE_LIMITED_SECONDS = 10.0
+
+
+class Twarc2Client(Twarc2):
+    """
+    Twarc client whose requests can be sent to another base URL than the Twitter API, e.g. the local Twitter API
+    replay server, and whose tweet lookup and search responses can be recorded to disk as fixtures for it. Every
+    request first waits for the rate limit scheduler shared by the process, with the priority of the call it is made
+    for, and reports the quota left in its response back to the scheduler. A 429 response goes back to the scheduler
+    too, so the request waits for the quota or is shed like any other instead of sleeping in twarc.
+    """
+
+    def __init__(self, bearer_token, base_url=None, fixtures=None, scheduler=None):
+        """
+        :param bearer_token:    Twitter API bearer token
+        :param base_url:        base URL of the Twitter API, defaults to the TWITTER_API_BASE_URL environment variable
+        :param fixtures:        fixtures to record the responses in, defaults to the file set in the
+                                TWITTER_API_RECORD_PATH environment variable, if any
+        :param scheduler:       rate limit scheduler, defaults to the one shared by the process
+        """
+        super().__init__(bearer_token=bearer_token)
+        self.base_url = (base_url or os.getenv("TWITTER_API_BASE_URL", TWITTER_API_BASE_URL)).rstrip("/")
+
+        record_path = os.getenv("TWITTER_API_RECORD_PATH")
+        self.fixtures = fixtures if fixtures is not None or record_path is None else TwitterFixtures.load(record_path)
+
+        self.scheduler = scheduler or twitter_rate_limit_scheduler
+        # Priority of the call the requests of the current thread are made for, set around each page fetched
+        self.local = threading.local()
+        self.rate_limit_wait_seconds = 0.0  # Seconds this client's requests waited for the rate limit quota
+
+    @catch_request_exceptions
+    @rate_limit
+    def get(self, url, *args, **kwargs):
+        # Replaces Twarc2.get, whose rate_limit decorator sleeps on 429 responses, it is kept for the server errors
+        if url.startswith(TWITTER_API_BASE_URL):
+            url = self.base_url + url[len(TWITTER_API_BASE_URL):]
+
+        endpoint = urlparse(url).path
+        priority = getattr(self.local, "priority", ROOT_PRIORITY)
+        while True:
+            self.rate_limit_wait_seconds += self.scheduler.acquire(endpoint, priority)
+            if not self.client:
+                self.connect()
+            response = self.last_response = self.client.get(url, *args, timeout=REQUEST_TIMEOUT, **kwargs)
+            self.scheduler.update(endpoint, response.headers)
+            if response.status_code != 429:
+                return response
+
+            # The quota is used up, e.g. by another client of the same app, wait for it like any other request
+            now = self.scheduler.clock()
+            reset = float(response.headers.get("x-rate-limit-reset", 0))
+            self.scheduler.exhaust(endpoint, reset if reset > now else now + RATE_LIMITED_SECONDS)
+
+    def _get_pages(self, pages, priority):
+        """
+        Iterates the pages of a twarc generator, the requests it sends for each page are made with a priority
+
+        :param pages:       generator of the pages, it sends its requests lazily while being iterated, or any iterable
+                            of pages
+        :param priority:    priority of the requests, ROOT_PRIORITY or RELATED_PRIORITY
+        """
+        pages = iter(pages)
+        while True:
+            previous_priority = getattr(self.local, "priority", ROOT_PRIORITY)
+            self.local.priority = priority
+            try:
+                page = next(pages)
+            except StopIteration:
+                return
+            finally:
+                self.local.priority = previous_priority
+            yield page
+
+    def tweet_lookup(self, tweet_ids, *args, priority=ROOT_PRIORITY, **kwargs):
+        for page in self._get_pages(super().tweet_lookup(tweet_ids, *args, **kwargs), priority):
+            if self.fixtures is not None:
+                self.fixtures.record_tweet_lookup(page)
+            yield page
+
+    def search_recent(self, query, *args, priority=ROOT_PRIORITY, **kwargs):
+        pages = self._get_pages(super().search_recent(query, *args, **kwargs), priority)
+        for page_number, page in enumerate(pages):
+            if self.fixtures is not None:
+                self.fixtures.record_search_page(query, page, page_number)
+            yield page
+
+
+if __name__ == "__main__":
+    pass
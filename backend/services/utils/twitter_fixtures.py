@@ -0,0 +1,105 @@
+import os
+import copy
+import json
+import tempfile
+import threading
+
+# Key of the search results served for keyword searches that were not recorded, e.g. by synthetic fixtures whose
+# keyword depends on the keyword extraction model
+DEFAULT_KEYWORD_SEARCH = "*"
+
+
+class TwitterFixtures:
+    """
+    Recorded Twitter API v2 responses: the looked up tweets by id and the pages of every search by query. They are
+    written by the recording Twitter client and served by the local Twitter API replay server, stored as one JSON
+    file.
+    """
+
+    def __init__(self, tweets=None, searches=None, path=None):
+        """
+        :param tweets:      mapping from tweet id to the tweet returned by the tweet lookup endpoint
+        :param searches:    mapping from search query to the list of its result pages
+        :param path:        JSON file the fixtures are saved to as they are recorded, None to keep them in memory
+        """
+        self.tweets = tweets if tweets is not None else {}
+        self.searches = searches if searches is not None else {}
+        self.path = path
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path):
+        """
+        :param path:    JSON file of the fixtures, created on the first save if it does not exist
+        :return:        the fixtures stored in the file
+        """
+        if not os.path.isfile(path):
+            return cls(path=path)
+
+        with open(path) as fixtures_file:
+            fixtures = json.load(fixtures_file)
+
+        return cls(fixtures["tweets"], fixtures["searches"], path=path)
+
+    def save(self, path=None):
+        """
+        :param path:    JSON file to write the fixtures to, defaults to the file they were loaded from
+        """
+        path = path or self.path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file of this save first, so concurrent saves never write to the same file
+        with tempfile.NamedTemporaryFile("w", dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp",
+                                         delete=False) as fixtures_file:
+            json.dump({"tweets": self.tweets, "searches": self.searches}, fixtures_file)
+        os.replace(fixtures_file.name, path)
+
+    def record_tweet_lookup(self, page):
+        """
+        :param page:    page returned by the tweet lookup endpoint
+        """
+        # Copy the responses, as the services parse the tweets in place
+        with self.lock:
+            for tweet in page.get("data", []):
+                self.tweets[tweet["id"]] = copy.deepcopy(tweet)
+            if self.path is not None:
+                self.save()
+
+    def record_search_page(self, query, page, page_number):
+        """
+        :param query:       query of the search
+        :param page:        page returned by the search endpoint
+        :param page_number: position of the page in the results, the first page replaces any previous recording
+        """
+        with self.lock:
+            pages = self.searches.setdefault(query, [])
+            del pages[page_number:]
+            pages.append(copy.deepcopy(page))
+            if self.path is not None:
+                self.save()
+
+    def get_tweets(self, tweet_ids):
+        """
+        :param tweet_ids:   ids of the tweets to look up
+        :return:            the recorded tweets among them, in order
+        """
+        return [self.tweets[tweet_id] for tweet_id in tweet_ids if tweet_id in self.tweets]
+
+    def get_search_pages(self, query):
+        """
+        :param query:   query of the search
+        :return:        the recorded pages of the search. Keyword searches that were not recorded get the default
+                        keyword search results if there are any, other searches get no results
+        """
+        if query in self.searches:
+            return self.searches[query]
+
+        if not query.startswith("conversation_id:") and DEFAULT_KEYWORD_SEARCH in self.searches:
+            return self.searches[DEFAULT_KEYWORD_SEARCH]
+
+        return []
+
+
+if __name__ == "__main__":
+    pass
@@ -0,0 +1,127 @@
+import os
+import json
+import tempfile
+import numpy as np
+import torch
+from transformers import AutoConfig
+
+WEIGHTS_FILE = "weights.bin"
+INDEX_FILE = "weights.json"
+
+# Tensors are aligned in the weights file so each one can be viewed in place without copying
+ALIGNMENT = 64
+
+
+def _iter_tensors(model):
+    """
+    Iterates over every parameter and buffer of a model together with the module that owns it
+
+    :param model:   PyTorch model
+    :return:        generator of (qualified name, owning module, attribute name, is parameter, tensor)
+    """
+    for module_name, module in model.named_modules():
+        prefix = f"{module_name}." if module_name else ""
+        for key, parameter in module._parameters.items():
+            if parameter is not None:
+                yield prefix + key, module, key, True, parameter
+        for key, buffer in module._buffers.items():
+            if buffer is not None:
+                yield prefix + key, module, key, False, buffer
+
+
+def is_exported(store_path):
+    """
+    :param store_path:  directory of the weights store
+    :return:            whether a weights store has been exported to the directory
+    """
+    return os.path.isfile(os.path.join(store_path, INDEX_FILE))
+
+
+def export_weights(model, store_path):
+    """
+    Exports the weights of a model into a flat, aligned binary file plus a JSON index, the format read by
+    load_model_mmap. Tied tensors are only written once. Each export writes to its own temporary files, then moves
+    the weights file into place before the index, so workers exporting concurrently do not overwrite each other's
+    files and a worker that finds the index always finds the complete weights it describes.
+
+    :param model:       PyTorch model to export
+    :param store_path:  directory to write the weights store to
+    """
+    os.makedirs(store_path, exist_ok=True)
+    weights_file_descriptor, weights_tmp_path = tempfile.mkstemp(dir=store_path, prefix=f"{WEIGHTS_FILE}.",
+                                                                 suffix=".tmp")
+    index_tmp_path = None
+
+    try:
+        index = {}
+        offsets = {}  # Offset of every tensor already written, keyed by its storage, to only write tied tensors once
+        offset = 0
+        with os.fdopen(weights_file_descriptor, "wb") as weights_file:
+            for name, _, _, _, tensor in _iter_tensors(model):
+                array = tensor.detach().cpu().contiguous().numpy()
+                key = (tensor.data_ptr(), array.nbytes)
+
+                if key not in offsets:
+                    padding = -offset % ALIGNMENT
+                    weights_file.write(b"\0" * padding)
+                    offset += padding
+
+                    offsets[key] = offset
+                    weights_file.write(array.tobytes())
+                    offset += array.nbytes
+
+                index[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offsets[key]}
+
+        index_file_descriptor, index_tmp_path = tempfile.mkstemp(dir=store_path, prefix=f"{INDEX_FILE}.",
+                                                                 suffix=".tmp")
+        with os.fdopen(index_file_descriptor, "w") as index_file:
+            json.dump(index, index_file)
+
+        os.replace(weights_tmp_path, os.path.join(store_path, WEIGHTS_FILE))
+        os.replace(index_tmp_path, os.path.join(store_path, INDEX_FILE))
+    finally:
+        # Only left behind if the export failed
+        for tmp_path in (weights_tmp_path, index_tmp_path):
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def load_model_mmap(auto_model_class, config_path, store_path, **kwargs):
+    """
+    Builds a model from its config and points every parameter and buffer at a memory-mapped view of the weights
+    store. The weights file is mapped copy-on-write and inference never writes to it, so every worker process on the
+    host shares the same physical pages (the OS page cache) instead of holding its own copy of the weights.
+
+    :param auto_model_class:    transformers auto class used to build the model, e.g. AutoModel
+    :param config_path:         directory holding the model's config.json
+    :param store_path:          directory of the exported weights store
+    :param kwargs:              extra arguments used to build the model config, e.g. id2label
+    :return:                    the model backed by the memory-mapped weights, in evaluation mode
+    """
+    with open(os.path.join(store_path, INDEX_FILE)) as index_file:
+        index = json.load(index_file)
+    weights = np.memmap(os.path.join(store_path, WEIGHTS_FILE), dtype=np.uint8, mode="c")
+
+    config = AutoConfig.from_pretrained(config_path, **kwargs)
+    model = auto_model_class.from_config(config)
+
+    for name, module, key, is_parameter, tensor in _iter_tensors(model):
+        entry = index[name]
+        dtype = np.dtype(entry["dtype"])
+        size = int(np.prod(entry["shape"], dtype=np.int64)) * dtype.itemsize
+        array = weights[entry["offset"]:entry["offset"] + size].view(dtype).reshape(entry["shape"])
+        mapped_tensor = torch.from_numpy(array)
+
+        if is_parameter:
+            # Replacing the data releases the randomly initialised weights built from the config
+            tensor.data = mapped_tensor
+        else:
+            module._buffers[key] = mapped_tensor
+
+    model.eval()
+
+    return model
+
+
+if __name__ == "__main__":
+    pass
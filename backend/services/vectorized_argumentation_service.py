@@ -0,0 +1,246 @@
+import numpy as np
+from itertools import chain, repeat
+from operator import itemgetter, methodcaller
+
+from backend.services.argumentation_service import ArgumentationAlgorithmService
+
+# Relation of an argument to the tweet it replies to, as the sign of its degree in the score of that tweet
+SUPPORT = 1
+ATTACK = -1
+NON_ARGUMENT = 0
+
+# Codes of the argumentative types of the tweets in the arrays
+TYPE_CODES = {"none": 0, "support": 1, "attack": 2, "neutral": 3}
+
+
+class ArgumentTreeArrays:
+    """
+    Compact array representation of the arguments of a tweet tree. The tweets are numbered in breadth first order,
+    so each level of the tree is a contiguous slice of the arrays and the replies of every tweet are contiguous and
+    in the order of the tweet tree. Non-argumentative tweets are kept, with a 0 relation sign, but not their replies
+    as they are not part of the evaluation. The tweet ids and attributes are kept in the order of the tweet tree, as
+    visiting a large tree in another order than its tweets are stored in is much slower.
+    """
+
+    def __init__(self, tweet_ids, attributes, indexes, parents, level_offsets, signs, base_strengths):
+        """
+        :param tweet_ids:       tweet id of each tweet of the tweet tree
+        :param attributes:      attributes dictionary of each tweet of the tweet tree, where its degree is stored
+        :param indexes:         index of each tweet in tweet_ids and attributes
+        :param parents:         index of the tweet each tweet replies to, -1 for the root
+        :param level_offsets:   index of the first tweet of each level, followed by the number of tweets
+        :param signs:           relation sign of each tweet, SUPPORT, ATTACK or NON_ARGUMENT
+        :param base_strengths:  base strength of each tweet
+        """
+        self.tweet_ids = tweet_ids
+        self.attributes = attributes
+        self.indexes = indexes
+        self.parents = parents
+        self.level_offsets = level_offsets
+        self.signs = signs
+        self.base_strengths = base_strengths
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def get_depths(self):
+        """
+        :return:    depth of each tweet below the root
+        """
+        return np.repeat(np.arange(len(self.level_offsets) - 1), np.diff(self.level_offsets))
+
+
+class VectorizedArgumentationService(ArgumentationAlgorithmService):
+    """
+    Service that runs the EBS argumentation algorithm on a tweet tree converted to NumPy arrays. The degrees are
+    evaluated level by level from the deepest level up, every level with a handful of vectorized operations, which
+    avoids the per node dictionary overhead of walking the tree on trees of hundreds of thousands of tweets. It
+    produces the same degrees as the ArgumentationAlgorithmService, up to floating point rounding.
+    """
+
+    def to_arrays(self, tweet):
+        """
+        Converts the tree below a tweet node to arrays. The tweet tree is read in bulk rather than walked, and the
+        depth of every tweet, and whether it is part of the evaluation, are computed by pointer jumping: every tweet
+        repeatedly jumps to the ancestor of its ancestor, which takes a logarithmic number of vectorized steps in the
+        depth of the tree.
+
+        :param tweet:   root tweet node of the tree to convert
+        :return:        the ArgumentTreeArrays of the tree
+        """
+        # Only keep what is needed from the (tweet id, replies) pairs, as keeping a million new objects alive makes
+        # the garbage collector scan the whole tweet tree
+        tweet_ids = list(map(itemgetter(0), self.tweet_tree.adjacency()))
+        replies = list(map(itemgetter(1), self.tweet_tree.adjacency()))
+        indexes = dict(zip(tweet_ids, range(len(tweet_ids))))
+        attributes_by_id = dict(self.tweet_tree.nodes(data="attributes"))
+        attributes = list(map(attributes_by_id.__getitem__, tweet_ids))
+
+        # Index of the tweet each tweet replies to, and position of each reply in the replies of the tree, ordered like
+        # the successors of every tweet
+        number_of_replies = np.fromiter(map(len, replies), dtype=np.intp, count=len(replies))
+        reply_indexes = np.fromiter(map(indexes.__getitem__, chain.from_iterable(replies)), dtype=np.intp,
+                                    count=number_of_replies.sum())
+        parents = np.full(len(tweet_ids), -1, dtype=np.intp)
+        parents[reply_indexes] = np.repeat(np.arange(len(tweet_ids)), number_of_replies)
+        reply_positions = np.full(len(tweet_ids), -1, dtype=np.intp)
+        reply_positions[reply_indexes] = np.arange(len(reply_indexes))
+
+        types = np.fromiter(map(TYPE_CODES.get, map(itemgetter("argumentative_type"), attributes),
+                                repeat(TYPE_CODES["attack"])), dtype=np.int8, count=len(attributes))
+        scores = (np.fromiter(map(methodcaller("get", "like_count", 0), attributes), dtype=np.float64,
+                              count=len(attributes)) +
+                  np.fromiter(map(methodcaller("get", "retweet_count", 0), attributes), dtype=np.float64,
+                              count=len(attributes)))
+
+        # The replies of a non-argumentative tweet, and the tweet the evaluation starts from, start their own tree
+        root = indexes[tweet["attributes"]["id"]]
+        ancestors = parents.copy()
+        ancestors[parents < 0] = np.flatnonzero(parents < 0)
+        cut = (parents >= 0) & (types[parents] == TYPE_CODES["neutral"])
+        ancestors[cut] = np.flatnonzero(cut)
+        ancestors[root] = root
+        depths = (ancestors != np.arange(len(ancestors))).astype(np.intp)
+        while True:
+            next_ancestors = ancestors[ancestors]
+            if np.array_equal(next_ancestors, ancestors):
+                break
+            depths += depths[ancestors]
+            ancestors = next_ancestors
+
+        # Number the tweets of the tree level by level, and the replies of every tweet in order
+        in_tree = np.flatnonzero(ancestors == root)
+        order = in_tree[np.lexsort((reply_positions[in_tree], depths[in_tree]))]
+        positions = np.empty(len(tweet_ids), dtype=np.intp)
+        positions[order] = np.arange(len(order))
+        tree_parents = np.where(parents[order] >= 0, positions[parents[order]], -1)
+        tree_parents[0] = -1
+        level_offsets = np.r_[0, np.cumsum(np.bincount(depths[order]))]
+
+        tree_types = types[order]
+        signs = np.where(tree_types == TYPE_CODES["support"], SUPPORT, ATTACK)
+        signs[tree_types == TYPE_CODES["neutral"]] = NON_ARGUMENT
+
+        # Same base strength as _base_strength, with the original tweet at 0.5
+        arguments = tree_types != TYPE_CODES["none"]
+        base_strengths = np.full(len(order), 0.5)
+        normalized_scores = (scores[order[arguments]] - self.min_score) / (self.max_score - self.min_score)
+        base_strengths[arguments] = normalized_scores + 0.000001
+
+        return ArgumentTreeArrays(tweet_ids, attributes, order, tree_parents, level_offsets, signs, base_strengths)
+
+    def evaluate(self, arrays):
+        """
+        Computes the EBS acceptability degrees of the tweets of a tree converted to arrays, from the deepest level up
+
+        :param arrays:  the ArgumentTreeArrays of the tree
+        :return:        array of the acceptability degree of each tweet, 0.0 for the non-argumentative tweets
+        """
+        supporters_scores = np.zeros(len(arrays))
+        attackers_scores = np.zeros(len(arrays))
+        degrees = np.zeros(len(arrays))
+
+        for level in range(len(arrays.level_offsets) - 2, -1, -1):
+            start, end = arrays.level_offsets[level], arrays.level_offsets[level + 1]
+            base_strengths = arrays.base_strengths[start:end]
+            strength_child = supporters_scores[start:end] - attackers_scores[start:end]
+
+            level_degrees = 1 - ((1 - base_strengths ** 2) / (1 + (base_strengths * np.power(2.0, strength_child))))
+            signs = arrays.signs[start:end]
+            level_degrees[signs == NON_ARGUMENT] = 0.0
+            degrees[start:end] = level_degrees
+
+            if level == 0:
+                break
+
+            # Scatter-add the degrees into the scores of the previous level. The replies of a tweet are summed in the
+            # order of the tree, like the iterative evaluation, so both produce the same sums
+            parents = arrays.parents[start:end]
+            parent_start = arrays.level_offsets[level - 1]
+            number_of_parents = start - parent_start
+            for sign, scores in ((SUPPORT, supporters_scores), (ATTACK, attackers_scores)):
+                mask = signs == sign
+                scores[parent_start:start] = np.bincount(parents[mask] - parent_start, weights=level_degrees[mask],
+                                                         minlength=number_of_parents)
+
+        return degrees
+
+    def _post_order_ranks(self, arrays):
+        """
+        Computes the position of every tweet in the post-order of the tree, the order the iterative evaluation
+        evaluates them in, from the subtree sizes and the sizes of the earlier replies of every ancestor
+
+        :param arrays:  the ArgumentTreeArrays of the tree
+        :return:        array of the post-order rank of each tweet
+        """
+        offsets = arrays.level_offsets
+        subtree_sizes = np.ones(len(arrays), dtype=np.int64)
+        for level in range(len(offsets) - 2, 0, -1):
+            start, end = offsets[level], offsets[level + 1]
+            parent_start = offsets[level - 1]
+            subtree_sizes[parent_start:start] += np.bincount(arrays.parents[start:end] - parent_start,
+                                                             weights=subtree_sizes[start:end],
+                                                             minlength=start - parent_start).astype(np.int64)
+
+        # Number of tweets evaluated before the subtree of each tweet
+        first_ranks = np.zeros(len(arrays), dtype=np.int64)
+        for level in range(1, len(offsets) - 1):
+            start, end = offsets[level], offsets[level + 1]
+            parents = arrays.parents[start:end]
+            earlier_sizes = np.cumsum(subtree_sizes[start:end]) - subtree_sizes[start:end]
+            first_replies = np.flatnonzero(np.r_[True, parents[1:] != parents[:-1]])
+            earlier_sizes -= np.repeat(earlier_sizes[first_replies], np.diff(np.r_[first_replies, end - start]))
+            first_ranks[start:end] = first_ranks[parents] + earlier_sizes
+
+        return first_ranks + subtree_sizes - 1
+
+    def _strongest_argument(self, arrays, degrees):
+        """
+        Finds the strongest argument, the first one with the highest degree in the evaluation order of the
+        ArgumentationAlgorithmService
+
+        :param arrays:  the ArgumentTreeArrays of the tree
+        :param degrees: array of the acceptability degree of each tweet
+        :return:        index of the strongest argument
+        """
+        argument_degrees = np.where(arrays.signs == NON_ARGUMENT, -1.0, degrees)
+        strongest = np.flatnonzero(argument_degrees == argument_degrees.max())
+        if len(strongest) == 1:
+            return strongest[0]
+
+        # Several arguments share the highest degree, e.g. replies with the same public metrics, the post-order is
+        # only computed then
+        return strongest[np.argmin(self._post_order_ranks(arrays)[strongest])]
+
+    def acceptability_degrees(self, tweet):
+        """
+        Computes the EBS acceptability degree of a tweet node and of every argument below it. The degree of every
+        argument is also stored in its "acceptability" attribute, and the strongest argument is set.
+
+        :param tweet:   input tweet node of the tree to compute acceptability degree using EBS
+        :return:        mapping from tweet id to acceptability degree, 0.0 for the non-argumentative tweets
+        """
+        if tweet["attributes"]["argumentative_type"] == "neutral":
+            # The tweet is non-argumentative, hence, should not be included in the algorithm
+            return {tweet["attributes"]["id"]: 0.0}
+
+        arrays = self.to_arrays(tweet)
+        degrees = self.evaluate(arrays)
+
+        # Store the degrees in the order of the tweet tree
+        tree_order = np.argsort(arrays.indexes)
+        indexes = arrays.indexes[tree_order].tolist()
+        tree_degrees = degrees[tree_order].tolist()
+        for index, sign, degree in zip(indexes, arrays.signs[tree_order].tolist(), tree_degrees):
+            if sign != NON_ARGUMENT:
+                arrays.attributes[index]["acceptability"] = degree
+
+        strongest = self._strongest_argument(arrays, degrees)
+        self.tweet_tree_metrics.set_strongest_argument_id(arrays.tweet_ids[arrays.indexes[strongest]],
+                                                          float(degrees[strongest]))
+
+        return dict(zip(map(arrays.tweet_ids.__getitem__, indexes), tree_degrees))
+
+
+if __name__ == "__main__":
+    pass
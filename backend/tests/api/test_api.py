@@ -1,5 +1,12 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+import networkx as nx
 from fastapi.testclient import TestClient
-from backend.api.api import app
+from backend.api.api import app, warm_up_models, startup_report
+from backend.services.tweet_tree_builder_service import TweetTree, TweetTreeMetrics
+from backend.services.tweet_tree_view_service import TweetTreeView
+from backend.benchmarks.argumentation_benchmark import generate_tweet_tree
+from backend.services.utils.job_queue import JobQueue
 
 
 class TestAPI:
@@ -17,20 +24,89 @@ class TestAPI:
         assert response.status_code == 200
         assert response.json() == {"response": "API is up and running!"}
 
+    def test_startup_timing(self):
+        """
+        Tests the startup timing endpoint that reports how long the models took to load.
+        """
+        response = TestAPI.client.get("/api/health/startup")
+
+        assert response.status_code == 200
+        assert set(response.json()["response"]) == {"warm_up_seconds", "models"}
+
+    def test_warm_up_models(self, mocker, monkeypatch):
+        """
+        Tests that the models of the API process are warmed up at startup, even with analysis worker processes, as the
+        synchronous endpoints run in the API process.
+        """
+        monkeypatch.setattr("backend.api.api.analysis_workers", 2)
+        monkeypatch.setitem(startup_report, "warm_up_seconds", None)
+        warm_up = mocker.patch("backend.api.api.model_registry.warm_up", return_value=1.5)
+
+        warm_up_models()
+
+        warm_up.assert_called_once()
+        assert startup_report["warm_up_seconds"] == 1.5
+
+        monkeypatch.setenv("WARM_UP_MODELS", "false")
+        warm_up_models()
+
+        warm_up.assert_called_once()
+
+    def test_metrics(self):
+        """
+        Tests the metrics endpoint that exposes the runtime counters, e.g. the inference cache hits and misses and the
+        Twitter API rate limit quota.
+        """
+        response = TestAPI.client.get("/api/metrics")
+
+        assert response.status_code == 200
+        assert {"sentiment", "relation"} <= set(response.json()["response"]["inference_cache"])
+        assert set(response.json()["response"]["twitter_rate_limit"]) == {"quotas", "priorities"}
+        assert {"executed", "coalesced", "cache_hits"} <= set(response.json()["response"]["analyses"])
+        assert isinstance(response.json()["response"]["tweet_tree_pipeline"], dict)
+        assert {"candidates", "kept", "pruned"} <= set(response.json()["response"]["related_prefilter"])
+
     def test_tweet_analyzer(self, mocker):
         """
         Tests the tweet analyzer API endpoint that computes the argumentation models and does all the computation.
         """
-        # Mock the controller to return "Success" as the controller is not being tested here, to ensure better
-        # test separation and quality.
+        # Mock the controller to return "Success", encoded as JSON like the analyses, as the controller is not being
+        # tested here, to ensure better test separation and quality.
         mocker.patch("backend.controllers.tweet_analyzer_controller.TweetAnalyzerController.analyze_tweet",
-                     return_value="Success")
+                     return_value=b'"Success"')
 
         response = TestAPI.client.get("/api/analyze/123")
 
         assert response.status_code == 200
         assert response.json() == {"response": "Success"}
 
+    def test_tweet_analyzer_columns(self, mocker):
+        """
+        Tests that the tweet analyzer API endpoint sends the columnar format when it is asked for with the format
+        query parameter or the Accept header, compressed when the client accepts gzip.
+        """
+        analyze_tweet = mocker.patch(
+            "backend.controllers.tweet_analyzer_controller.TweetAnalyzerController.analyze_tweet",
+            return_value=b'{"tweet_tree":{"ids":["123"],"parents":[-1]}}')
+
+        response = TestAPI.client.get("/api/analyze/123?format=columns", headers={"Accept-Encoding": "gzip"})
+        accept_response = TestAPI.client.get("/api/analyze/123",
+                                             headers={"Accept": "application/vnd.tweet-tree.columns+json"})
+
+        assert response.status_code == 200
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.json() == {"response": {"tweet_tree": {"ids": ["123"], "parents": [-1]}}}
+        assert accept_response.headers["content-type"].startswith("application/vnd.tweet-tree.columns+json")
+        assert [call.kwargs["output_format"] for call in analyze_tweet.call_args_list] == ["columns", "columns"]
+
+    def test_tweet_analyzer_unknown_format(self):
+        """
+        Tests that the tweet analyzer API endpoint rejects an unknown format.
+        """
+        response = TestAPI.client.get("/api/analyze/123?format=xml")
+
+        assert response.status_code == 400
+
     def test_tweet_analyzer_error(self, mocker):
         """
         Tests the tweet analyzer API endpoint in the case of an error.
@@ -47,3 +123,138 @@ class TestAPI:
             "detail": "Oops! Something went wrong while processing your request. Make sure the Tweet ID passed is "
                       "valid and try again later."}
 
+    def test_tweet_analyzer_stream(self, mocker):
+        """
+        Tests the streaming tweet analyzer API endpoint that sends the analysis as server-sent events, ending with an
+        error event if the analysis fails midway.
+        """
+        def stream_analysis(tweet_id):
+            yield "root", {"nodes": [{"name": str(tweet_id)}]}
+            raise ValueError()
+
+        mocker.patch("backend.controllers.tweet_analyzer_controller.TweetAnalyzerController.stream_analysis",
+                     side_effect=stream_analysis)
+
+        response = TestAPI.client.get("/api/analyze/123/stream")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = response.text.strip().split("\n\n")
+        assert events[0] == 'event: root\ndata: {"nodes": [{"name": "123"}]}'
+        assert events[1].startswith("event: error\ndata: ")
+
+    def test_tweet_analyzer_bulk(self, mocker):
+        """
+        Tests the bulk tweet analyzer API endpoint that sends the analysis of each tweet as a line of JSON, and reports
+        the tweets whose analysis failed without stopping the others.
+        """
+        mocker.patch("backend.controllers.tweet_analyzer_controller.TweetAnalyzerController.analyze_tweets",
+                     return_value=iter([(1, "Success", None), (2, None, ValueError())]))
+
+        response = TestAPI.client.post("/api/analyze/bulk", json=[1, 2])
+
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0] == {"tweet_id": 1, "response": "Success"}
+        assert lines[1]["tweet_id"] == 2 and "error" in lines[1]
+
+    def test_tweet_analyzer_bulk_too_many_tweets(self, mocker):
+        """
+        Tests that the bulk tweet analyzer API endpoint rejects more tweets than it accepts at once.
+        """
+        mocker.patch("backend.api.api.bulk_max_tweets", 1)
+
+        response = TestAPI.client.post("/api/analyze/bulk", json=[1, 2])
+
+        assert response.status_code == 400
+
+    def test_tweet_analyzer_view(self, mocker):
+        """
+        Tests the tweet analyzer view API endpoints that list the analysis down to a depth, and page through the
+        children of a tweet with cursors.
+        """
+        tree, root_id, _, _ = generate_tweet_tree(30, depth=5)
+        # The tweet ids of the tweet trees are strings
+        tree = nx.relabel_nodes(tree, str)
+        for tweet_id in tree.nodes:
+            tree.nodes[tweet_id]["attributes"]["id"] = tweet_id
+        tweet_tree = TweetTree(tree.nodes[str(root_id)]["attributes"], [], TweetTreeMetrics())
+        tweet_tree.set_tree(tree)
+        mocker.patch("backend.controllers.tweet_analyzer_controller.TweetAnalyzerController.get_analysis_view",
+                     return_value=TweetTreeView(tweet_tree))
+
+        response = TestAPI.client.get("/api/analyze/0/view", params={"depth": 1, "limit": 1, "sort": "time"})
+
+        assert response.status_code == 200
+        root = response.json()["response"]["tweet_tree"]
+        assert root["child_count"] == tree.out_degree("0")
+        assert [child["name"] for child in root["children"]] == sorted(tree.successors("0"), key=int)[:1]
+
+        response = TestAPI.client.get("/api/analyze/0/view/0/children",
+                                      params={"cursor": root["next_cursor"], "limit": 100, "sort": "time"})
+
+        assert response.status_code == 200
+        assert [child["name"] for child in response.json()["response"]["children"]] == \
+               sorted(tree.successors("0"), key=int)[1:]
+        assert response.json()["response"]["next_cursor"] is None
+
+    def test_tweet_analyzer_view_invalid(self, mocker):
+        """
+        Tests that the tweet analyzer view API endpoints reject unknown orders and invalid cursors, and report the
+        tweets which are not in the tweet tree.
+        """
+        root_tweet = {"id": "0", "like_count": 0, "retweet_count": 0, "argumentative_type": "none"}
+        mocker.patch("backend.controllers.tweet_analyzer_controller.TweetAnalyzerController.get_analysis_view",
+                     return_value=TweetTreeView(TweetTree(root_tweet, [], TweetTreeMetrics())))
+
+        assert TestAPI.client.get("/api/analyze/0/view", params={"sort": "likes"}).status_code == 400
+        assert TestAPI.client.get("/api/analyze/0/view", params={"depth": 1000}).status_code == 422
+        assert TestAPI.client.get("/api/analyze/0/view/0/children", params={"cursor": "x"}).status_code == 400
+        assert TestAPI.client.get("/api/analyze/0/view/1/children").status_code == 404
+
+    def test_track_tweet(self, mocker):
+        """
+        Tests the tracking API endpoints that start tracking a tweet, return its latest model and stop tracking it.
+        """
+        mocker.patch("backend.services.conversation_tracker_service.ConversationTracker.track",
+                     return_value={"tweet_tree": {}, "metrics": {}})
+        mocker.patch("backend.services.conversation_tracker_service.ConversationTracker.start")
+        mocker.patch("backend.services.conversation_tracker_service.ConversationTracker.get_model",
+                     return_value={"tweet_tree": {}, "metrics": {}})
+        mocker.patch("backend.services.conversation_tracker_service.ConversationTracker.get_status",
+                     return_value={"polls": 1})
+        mocker.patch("backend.services.conversation_tracker_service.ConversationTracker.untrack", return_value=True)
+
+        assert TestAPI.client.post("/api/track/123").json() == {"response": {"tweet_tree": {}, "metrics": {}}}
+        assert TestAPI.client.get("/api/track/123").json() == {
+            "response": {"tweet_tree": {}, "metrics": {}, "tracking": {"polls": 1}}}
+        assert TestAPI.client.delete("/api/track/123").status_code == 200
+
+    def test_tracked_tweet_not_tracked(self):
+        """
+        Tests the tracking API endpoints with a tweet that is not tracked.
+        """
+        assert TestAPI.client.get("/api/track/404").status_code == 404
+        assert TestAPI.client.delete("/api/track/404").status_code == 404
+
+    def test_tweet_analysis_job(self, mocker):
+        """
+        Tests the job API endpoints that submit the analysis of a tweet and return its result once it is done.
+        """
+        # Run the jobs on a thread rather than on the worker processes, with the controller mocked
+        jobs = JobQueue(lambda tweet_id: "Success", executor=ThreadPoolExecutor(1))
+        mocker.patch("backend.api.api.analysis_jobs", jobs)
+
+        response = TestAPI.client.post("/api/jobs/analyze/123")
+        assert response.status_code == 202
+        job_id = response.json()["response"]["job_id"]
+        jobs.jobs[job_id].future.result()
+
+        response = TestAPI.client.get(f"/api/jobs/{job_id}")
+        assert response.status_code == 200
+        assert response.json()["response"]["status"] == "done"
+        assert response.json()["response"]["tweet_id"] == 123
+        assert response.json()["response"]["result"] == "Success"
+
+        assert TestAPI.client.get("/api/jobs/unknown").status_code == 404
+        jobs.shutdown()
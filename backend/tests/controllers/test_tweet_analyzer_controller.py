@@ -1,5 +1,8 @@
+import json
+import pytest
 from backend.controllers.tweet_analyzer_controller import TweetAnalyzerController
 from backend.services.tweet_tree_builder_service import TweetTreeMetrics, TweetTree
+from backend.services.vectorized_argumentation_service import VectorizedArgumentationService
 
 
 class TestTweetAnalyzerController:
@@ -56,3 +59,144 @@ class TestTweetAnalyzerController:
                          }
 
         assert data == expected_data
+
+    def test_analyze_tweet_vectorized_engine(self, mocker):
+        """
+        Tests that the vectorized EBS engine, selected with the ARGUMENTATION_ENGINE environment variable, produces the
+        same argumentation model
+        """
+        mocker.patch.dict("os.environ", {"ARGUMENTATION_ENGINE": "vectorized"})
+        controller = TweetAnalyzerController()
+
+        root_tweet = {"id": 0, "like_count": 0.1, "retweet_count": 0, "argumentative_type": "none",
+                      "sentiment": "positive"}
+        tweet_tree = TweetTree(root_tweet, [], TweetTreeMetrics())
+        mocker.patch("backend.services.tweet_tree_builder_service.TweetTreeBuilder._build_tweet_tree",
+                     return_value=tweet_tree)
+        argumentation_service = mocker.spy(VectorizedArgumentationService, "acceptability_degrees")
+
+        data = controller.analyze_tweet(0)
+
+        assert argumentation_service.call_count == 1
+        assert data["tweet_tree"]["attributes"]["acceptability"] == 0.5
+        assert data["metrics"]["root_tweet_argument_strength"] == 0.5
+        assert data["metrics"]["strongest_argument_id"] == 0
+
+    def test_analyze_tweet_unknown_engine(self, monkeypatch):
+        """
+        Tests that an unknown ARGUMENTATION_ENGINE raises a ValueError naming the engines, before any tweet is fetched.
+        """
+        monkeypatch.setenv("ARGUMENTATION_ENGINE", "quantum")
+
+        with pytest.raises(ValueError, match="iterative, vectorized"):
+            TweetAnalyzerController().analyze_tweet(0)
+
+    def test_analyze_tweet_reuses_analysis(self, mocker):
+        """
+        Tests that analysing the same tweet again reuses its analysis instead of building the tweet tree again
+        """
+        controller = TweetAnalyzerController(analysis_cache_seconds=60)
+
+        root_tweet = {"id": 0, "like_count": 0.1, "retweet_count": 0, "argumentative_type": "none",
+                      "sentiment": "positive"}
+        build_tweet_tree = mocker.patch(
+            "backend.services.tweet_tree_builder_service.TweetTreeBuilder._build_tweet_tree",
+            side_effect=lambda tweet_id: TweetTree(root_tweet, [], TweetTreeMetrics()))
+
+        data = controller.analyze_tweet(0)
+
+        assert controller.analyze_tweet("0") is data
+        assert controller.analyze_tweet(0, "vectorized") == data
+        assert build_tweet_tree.call_count == 2
+        assert controller.get_stats()["cache_hits"] == 1
+
+    def test_stream_analysis(self, mocker):
+        """
+        Tests that streaming the analysis yields the tweet tree events, then the argumentation model
+        """
+        controller = TweetAnalyzerController()
+
+        root_tweet = {"id": 0, "like_count": 0.1, "retweet_count": 0, "argumentative_type": "none",
+                      "sentiment": "positive"}
+        tweet_tree = TweetTree(root_tweet, [], TweetTreeMetrics())
+
+        def stream_tweet_tree(tweet_id):
+            yield "root", {"nodes": tweet_tree.get_nodes([0])}
+            return tweet_tree
+
+        mocker.patch("backend.services.tweet_tree_builder_service.TweetTreeBuilder.stream_tweet_tree",
+                     side_effect=stream_tweet_tree)
+
+        events = list(controller.stream_analysis(0))
+
+        assert [event for event, _ in events] == ["root", "model"]
+        assert events[1][1]["tweet_tree"]["attributes"]["acceptability"] == 0.5
+
+    def test_analyze_tweets(self, mocker):
+        """
+        Tests that analysing many tweets evaluates the tweet tree of each, and passes on the tweets that failed
+        """
+        controller = TweetAnalyzerController()
+
+        root_tweet = {"id": 0, "like_count": 0.1, "retweet_count": 0, "argumentative_type": "none",
+                      "sentiment": "positive"}
+        error = ValueError()
+        mocker.patch("backend.services.tweet_tree_builder_service.TweetTreeBuilder.build_tweet_trees",
+                     return_value=iter([(0, TweetTree(root_tweet, [], TweetTreeMetrics()), None), (1, None, error)]))
+
+        results = list(controller.analyze_tweets([0, 1]))
+
+        assert [(tweet_id, error) for tweet_id, _, error in results] == [(0, None), (1, error)]
+        assert results[0][1]["tweet_tree"]["attributes"]["acceptability"] == 0.5
+        assert results[1][1] is None
+
+    def test_analyze_tweet_encoded(self, mocker):
+        """
+        Tests that the analysis encoded as JSON bytes is the encoded analysis
+        """
+        controller = TweetAnalyzerController()
+
+        root_tweet = {"id": 0, "like_count": 0.1, "retweet_count": 0, "argumentative_type": "none",
+                      "sentiment": "positive"}
+        mocker.patch("backend.services.tweet_tree_builder_service.TweetTreeBuilder._build_tweet_tree",
+                     side_effect=lambda tweet_id: TweetTree(dict(root_tweet), [], TweetTreeMetrics()))
+
+        assert json.loads(controller.analyze_tweet(0, encoded=True)) == controller.analyze_tweet(0)
+
+    def test_analyze_tweet_columns(self, mocker):
+        """
+        Tests that the analysis can be returned as the columns of the tweet tree, and that unknown formats are rejected
+        """
+        controller = TweetAnalyzerController()
+
+        root_tweet = {"id": 0, "like_count": 0.1, "retweet_count": 0, "argumentative_type": "none",
+                      "sentiment": "positive"}
+        mocker.patch("backend.services.tweet_tree_builder_service.TweetTreeBuilder._build_tweet_tree",
+                     side_effect=lambda tweet_id: TweetTree(dict(root_tweet), [], TweetTreeMetrics()))
+
+        data = controller.analyze_tweet(0, output_format="columns")
+
+        assert data["tweet_tree"]["ids"] == [0]
+        assert data["tweet_tree"]["acceptabilities"] == [0.5]
+        assert json.loads(controller.analyze_tweet(0, encoded=True, output_format="columns")) == data
+        with pytest.raises(ValueError, match="tree, columns"):
+            controller.analyze_tweet(0, output_format="xml")
+
+    def test_get_analysis_view(self, mocker):
+        """
+        Tests that the view of an analysis is computed once and kept, and lists the evaluated tweet tree
+        """
+        controller = TweetAnalyzerController()
+
+        root_tweet = {"id": 0, "like_count": 0.1, "retweet_count": 0, "argumentative_type": "none",
+                      "sentiment": "positive"}
+        build_tweet_tree = mocker.patch(
+            "backend.services.tweet_tree_builder_service.TweetTreeBuilder._build_tweet_tree",
+            side_effect=lambda tweet_id: TweetTree(dict(root_tweet), [], TweetTreeMetrics()))
+
+        view = controller.get_analysis_view(0)
+
+        assert controller.get_analysis_view("0") is view
+        assert build_tweet_tree.call_count == 1
+        assert view.get_view()["tweet_tree"]["attributes"]["acceptability"] == 0.5
+        assert view.get_view()["metrics"]["root_tweet_argument_strength"] == 0.5
@@ -94,3 +94,52 @@ class TestArgumentationAlgorithmService:
 
         assert acceptability_degree == expected_acceptability_degree
 
+    def test_acceptability_degrees(self):
+        """
+        Tests the acceptability_degrees function that returns the acceptability degree of every argument in the tree,
+        and sets the strongest argument
+        """
+        graph = DiGraph()
+        metrics = TweetTreeMetrics()
+
+        graph.add_node(0, attributes={"id": 0, "like_count": 0.1, "retweet_count": 0, "argumentative_type": "none"})
+        graph.add_node(1, attributes={"id": 1, "like_count": 0.9, "retweet_count": 0, "argumentative_type": "support"})
+        graph.add_node(2, attributes={"id": 2, "like_count": 0.95, "retweet_count": 0, "argumentative_type": "attack"})
+        graph.add_node(3, attributes={"id": 3, "like_count": 0.8, "retweet_count": 0, "argumentative_type": "neutral"})
+        graph.add_node(4, attributes={"id": 4, "like_count": 0.7, "retweet_count": 0, "argumentative_type": "support"})
+        graph.add_edge(0, 1)
+        graph.add_edge(0, 2)
+        graph.add_edge(0, 3)
+        graph.add_edge(3, 4)
+
+        argumentation_model = ArgumentationAlgorithmService(1, 0, graph, metrics)
+        degrees = argumentation_model.acceptability_degrees(graph.nodes[0])
+
+        # The neutral tweet has a degree of 0.0 and its replies are not evaluated, the leaves keep their base strength
+        assert set(degrees) == {0, 1, 2, 3}
+        assert degrees[3] == 0.0
+        assert round(degrees[1], 3) == 0.9
+        assert round(degrees[2], 3) == 0.95
+        assert "acceptability" not in graph.nodes[4]["attributes"]
+        assert graph.nodes[0]["attributes"]["acceptability"] == degrees[0]
+
+        # The strongest argument is the attacker with the highest base strength
+        assert metrics.strongest_argument_id == 2
+
+    def test_acceptability_degree_deep_thread(self):
+        """
+        Tests that the acceptability degree of a very deep reply chain is computed without hitting the recursion limit
+        """
+        depth = 100000
+        graph = DiGraph()
+        graph.add_node(0, attributes={"id": 0, "like_count": 0, "retweet_count": 0, "argumentative_type": "none"})
+        for tweet_id in range(1, depth + 1):
+            graph.add_node(tweet_id, attributes={"id": tweet_id, "like_count": tweet_id % 10, "retweet_count": 0,
+                                                 "argumentative_type": "support" if tweet_id % 2 else "attack"})
+            graph.add_edge(tweet_id - 1, tweet_id)
+
+        argumentation_model = ArgumentationAlgorithmService(9, 0, graph, TweetTreeMetrics())
+        degrees = argumentation_model.acceptability_degrees(graph.nodes[0])
+
+        assert len(degrees) == depth + 1
+        assert 0.0 < argumentation_model.acceptability_degree(graph.nodes[0]) < 1.0
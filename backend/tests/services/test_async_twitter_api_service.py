@@ -0,0 +1,143 @@
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from backend.services.twitter_api_service import TwitterResponseParser
+from backend.services.async_twitter_api_service import AsyncTwitterAPIService
+from backend.services.utils.twitter_fixtures import TwitterFixtures
+from backend.services.utils.rate_limit_scheduler import RateLimitScheduler, RateLimitExceeded, RELATED_PRIORITY
+from backend.benchmarks.twitter_replay_server import ReplayServer
+
+
+def _tweet(tweet_id, text, parent=None):
+    tweet = {"id": tweet_id,
+             "text": text,
+             "public_metrics": {"retweet_count": 1, "reply_count": 0, "like_count": 2, "quote_count": 0}}
+    if parent is not None:
+        tweet["referenced_tweets"] = [{"type": "replied_to", "id": parent}]
+
+    return tweet
+
+
+# Recorded v2 API responses served by the stand-in server, keyed by conversation id and next_token
+LOOKUP_RESPONSE = {"data": [_tweet("0", "Pizza is the best food")]}
+SEARCH_RESPONSES = {
+    ("0", None): {"data": [_tweet("2", "It really is not", parent="0")],
+                  "includes": {"tweets": [_tweet("0", "Pizza is the best food")]},
+                  "meta": {"result_count": 1, "next_token": "page2"}},
+    ("0", "page2"): {"data": [_tweet("1", "Agreed, pizza rules", parent="0")],
+                     "includes": {"tweets": [_tweet("0", "Pizza is the best food")]},
+                     "meta": {"result_count": 1}},
+    ("5", None): {"meta": {"result_count": 0}},
+}
+
+
+def _run_with_server(test, delay=0.0):
+    """
+    Runs a coroutine against a local stand-in of the Twitter API that replays the recorded responses
+
+    :param test:    function taking the server's base URL and the request statistics, returning the coroutine to run
+    :param delay:   seconds every response is delayed by
+    :return:        the result of the coroutine
+    """
+    stats = {"in_flight": 0, "max_in_flight": 0, "requests": 0}
+
+    async def replay(response):
+        stats["requests"] += 1
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        await asyncio.sleep(delay)
+        stats["in_flight"] -= 1
+
+        return web.json_response(response)
+
+    async def tweet_lookup(request):
+        return await replay(LOOKUP_RESPONSE)
+
+    async def search_recent(request):
+        conversation_id = request.query["query"].split()[1]
+        return await replay(SEARCH_RESPONSES[(conversation_id, request.query.get("next_token"))])
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/2/tweets", tweet_lookup)
+        app.router.add_get("/2/tweets/search/recent", search_recent)
+
+        server = TestServer(app)
+        await server.start_server()
+        try:
+            return await test(str(server.make_url("")), stats)
+        finally:
+            await server.close()
+
+    return asyncio.run(main())
+
+
+class TestAsyncTwitterAPIService:
+    """
+    Test class to test the AsyncTwitterAPIService, which fetches from the Twitter API concurrently. It runs against a
+    local stand-in server replaying recorded API responses.
+    """
+
+    def test_get_tweet_and_conversation_thread(self, mocker):
+        """
+        Tests that the tweet and its paginated conversation thread are fetched and parsed like the TwitterAPIService,
+        without scoring their sentiment.
+        """
+        predict_sentiments = mocker.patch.object(TwitterResponseParser.sentiment_analysis_service,
+                                                 "predict_sentiments")
+
+        async def test(base_url, stats):
+            async with AsyncTwitterAPIService("fake_token", base_url=base_url) as twitter_api_service:
+                return await twitter_api_service.get_tweet_and_conversation_thread("0")
+
+        tweet, conversation_thread = _run_with_server(test)
+
+        assert tweet == {"id": "0", "text": "Pizza is the best food", "retweet_count": 1, "reply_count": 0,
+                         "like_count": 2, "quote_count": 0}
+
+        # Both pages are fetched, sorted by id, and every reply carries the text of the tweet it replies to
+        assert [reply["id"] for reply in conversation_thread] == ["1", "2"]
+        assert conversation_thread[0]["referenced_tweets"][0]["text"] == "Pizza is the best food"
+        assert "sentiment" not in conversation_thread[0]
+        predict_sentiments.assert_not_called()
+
+    def test_get_conversation_threads_bounded_concurrency(self):
+        """
+        Tests that several conversations are fetched concurrently, in order, without exceeding the maximum number of
+        requests in flight.
+        """
+        async def test(base_url, stats):
+            async with AsyncTwitterAPIService("fake_token", base_url=base_url, max_concurrency=2) as service:
+                return await service.get_conversation_threads(["0", "5", "0", "0"]), stats
+
+        conversation_threads, stats = _run_with_server(test, delay=0.05)
+
+        assert [len(conversation_thread) for conversation_thread in conversation_threads] == [2, 0, 2, 2]
+        assert stats["requests"] == 7
+        assert stats["max_in_flight"] == 2
+
+    def test_rate_limited_by_another_client(self):
+        """
+        Tests that a 429 response caused by another client of the same quota goes through the scheduler, the root
+        request waits for the quota to reset and the related request is shed instead of failing with the HTTP error.
+        """
+        async def test(base_url, scheduler):
+            async with AsyncTwitterAPIService("fake_token", base_url=base_url, scheduler=RateLimitScheduler()) as other:
+                await other.get_conversation_thread("0")
+            async with AsyncTwitterAPIService("fake_token", base_url=base_url, scheduler=scheduler) as service:
+                with pytest.raises(RateLimitExceeded):
+                    await service.get_conversation_thread("0", priority=RELATED_PRIORITY)
+                await service.get_conversation_thread("0")
+
+                return service.rate_limit_wait_seconds
+
+        with ReplayServer(TwitterFixtures(), rate_limit=1, rate_limit_window=1) as server:
+            scheduler = RateLimitScheduler(max_wait={RELATED_PRIORITY: 0.0})
+            rate_limit_wait_seconds = asyncio.run(test(server.base_url, scheduler))
+            request_counts = server.get_request_counts()
+
+        assert request_counts["rate_limited"] == 1
+        assert scheduler.get_stats()["priorities"]["related"]["shed"] == 1
+        assert rate_limit_wait_seconds > 0.0
@@ -0,0 +1,172 @@
+import pytest
+
+from backend.services.twitter_api_service import TwitterAPIService, TwitterResponseParser
+from backend.services.tweet_tree_builder_service import TweetTreeBuilder
+from backend.services.conversation_tracker_service import ConversationTracker
+from backend.services.utils.rate_limit_scheduler import RateLimitExceeded
+from backend.benchmarks.twitter_replay_server import ReplayServer
+from backend.benchmarks.synthetic_conversations import generate_fixtures, FIRST_TWEET_ID, CONVERSATION_ID_STRIDE
+
+ROOT_ID = str(FIRST_TWEET_ID)
+RELATED_ID = str(FIRST_TWEET_ID + CONVERSATION_ID_STRIDE)
+# Newest tweets of the conversations, each has 3 + 9 replies
+ROOT_SINCE_ID = str(FIRST_TWEET_ID + 12)
+RELATED_SINCE_ID = str(FIRST_TWEET_ID + CONVERSATION_ID_STRIDE + 12)
+
+
+def add_reply(fixtures, conversation_id, tweet_id, parent_id, like_count=10):
+    """
+    Adds a new reply to the first search page of a conversation of the fixtures, newest first like the Twitter API
+    """
+    page = fixtures.searches[f"conversation_id: {conversation_id} lang:en"][0]
+    tweets = page["data"] + page["includes"]["tweets"] + [fixtures.tweets[conversation_id]]
+    parent_tweet = next(tweet for tweet in tweets if tweet["id"] == parent_id)
+    reply = {"id": tweet_id, "text": "No way, that is just wrong", "conversation_id": conversation_id,
+             "referenced_tweets": [{"type": "replied_to", "id": parent_id}],
+             "public_metrics": {"retweet_count": 0, "reply_count": 0, "like_count": like_count, "quote_count": 0}}
+    page["data"].insert(0, reply)
+    page["includes"]["tweets"].append(parent_tweet)
+
+
+@pytest.fixture
+def fixtures(mocker, monkeypatch):
+    """
+    Two synthetic conversations, the second is found as a related tweet of the first one
+    """
+    mocker.patch.object(TwitterResponseParser.sentiment_analysis_service, "predict_sentiments",
+                        side_effect=lambda texts: ["negative"] * len(texts))
+    mocker.patch.object(TweetTreeBuilder.keyword_extraction_service, "get_top_keyword", return_value="pizza")
+    mocker.patch.object(TweetTreeBuilder.argumentation_relation_service, "predict_argumentative_relations",
+                        side_effect=lambda pairs: ["attack"] * len(pairs))
+    monkeypatch.setenv("TWITTER_API_ASYNC", "false")
+
+    return generate_fixtures(2, depth=2, breadth=3)
+
+
+class TestConversationTracker:
+    """
+    Test class that tests the ConversationTracker, which keeps the tweet trees of tracked tweets up to date with the
+    new replies of their conversations, against the local Twitter API replay server.
+    """
+
+    def test_track(self, fixtures, monkeypatch):
+        """
+        Tests that tracking a tweet analyses its conversation and the conversation of its related tweet once
+        """
+        with ReplayServer(fixtures) as server:
+            monkeypatch.setenv("TWITTER_API_BASE_URL", server.base_url)
+            tracker = ConversationTracker()
+            model = tracker.track(int(ROOT_ID))
+
+            assert tracker.track(ROOT_ID) is model
+            assert server.get_request_counts()["search"] == 3
+
+        assert tracker.is_tracked(ROOT_ID)
+        assert tracker.get_model(ROOT_ID) is model
+        assert {child["name"] for child in model["tweet_tree"]["children"]} >= {RELATED_ID}
+        assert tracker.get_status(ROOT_ID)["number_of_tweets"] == 2 * (1 + 3 + 9)
+        assert tracker.get_status(ROOT_ID)["since_ids"] == {ROOT_ID: ROOT_SINCE_ID, RELATED_ID: RELATED_SINCE_ID}
+
+    def test_poll(self, fixtures, monkeypatch):
+        """
+        Tests that polling only fetches and adds the replies newer than the newest tweet of each conversation, and
+        updates the model
+        """
+        with ReplayServer(fixtures) as server:
+            monkeypatch.setenv("TWITTER_API_BASE_URL", server.base_url)
+            tracker = ConversationTracker()
+            model = tracker.track(ROOT_ID)
+
+            # Nothing new, the model is kept as it is
+            assert tracker.poll(ROOT_ID) == 0
+            assert tracker.get_model(ROOT_ID) is model
+
+            new_ids = [str(FIRST_TWEET_ID + 2 * CONVERSATION_ID_STRIDE + number) for number in range(3)]
+            add_reply(fixtures, ROOT_ID, new_ids[0], str(FIRST_TWEET_ID + 1))
+            add_reply(fixtures, RELATED_ID, new_ids[1], RELATED_ID)
+            add_reply(fixtures, ROOT_ID, new_ids[2], new_ids[0])
+
+            assert tracker.poll_all() == {ROOT_ID: 3}
+            assert tracker.poll(ROOT_ID) == 0
+
+        tweet_tree = tracker.conversations[ROOT_ID].tweet_tree
+        assert tweet_tree.get_parent(new_ids[2]) == new_ids[0]
+        assert tweet_tree.get_parent(new_ids[1]) == RELATED_ID
+        assert "acceptability" in tweet_tree.get_tree().nodes[new_ids[2]]["attributes"]
+
+        status = tracker.get_status(ROOT_ID)
+        assert status["since_ids"] == {ROOT_ID: new_ids[2], RELATED_ID: new_ids[1]}
+        assert status["number_of_tweets"] == 2 * (1 + 3 + 9) + 3
+        assert status["polls"] == 3
+        assert tracker.get_model(ROOT_ID) is not model
+        assert tracker.get_model(ROOT_ID)["metrics"] == tweet_tree.get_json()["metrics"]
+
+    def test_poll_only_fetches_new_replies(self, fixtures, mocker, monkeypatch):
+        """
+        Tests that each conversation is polled with its newest tweet as since_id, and that only the new replies are
+        classified
+        """
+        with ReplayServer(fixtures) as server:
+            monkeypatch.setenv("TWITTER_API_BASE_URL", server.base_url)
+            tracker = ConversationTracker(TwitterAPIService("fake_token"))
+            tracker.track(ROOT_ID)
+
+            new_id = str(FIRST_TWEET_ID + 2 * CONVERSATION_ID_STRIDE)
+            add_reply(fixtures, ROOT_ID, new_id, ROOT_ID)
+            get_conversation_thread = mocker.spy(tracker.twitter_api_service, "get_conversation_thread")
+            relation_service = TweetTreeBuilder.argumentation_relation_service
+            relation_service.predict_argumentative_relations.reset_mock()
+
+            assert tracker.poll(ROOT_ID) == 1
+
+        since_ids = {call.args[0]: call.kwargs["since_id"] for call in get_conversation_thread.call_args_list}
+        assert since_ids == {ROOT_ID: ROOT_SINCE_ID, RELATED_ID: RELATED_SINCE_ID}
+        assert relation_service.predict_argumentative_relations.call_count == 1
+        assert len(relation_service.predict_argumentative_relations.call_args.args[0]) == 1
+
+    def test_poll_shed_conversation(self, fixtures, mocker, monkeypatch):
+        """
+        Tests that a conversation whose request is shed by the rate limit scheduler keeps its since_id, so its new
+        replies are fetched on the next poll even though the other conversation moved forward
+        """
+        with ReplayServer(fixtures) as server:
+            monkeypatch.setenv("TWITTER_API_BASE_URL", server.base_url)
+            tracker = ConversationTracker(TwitterAPIService("fake_token"))
+            tracker.track(ROOT_ID)
+
+            new_ids = [str(FIRST_TWEET_ID + 2 * CONVERSATION_ID_STRIDE + number) for number in range(2)]
+            add_reply(fixtures, RELATED_ID, new_ids[0], RELATED_ID)
+            add_reply(fixtures, ROOT_ID, new_ids[1], ROOT_ID)
+
+            get_conversation_thread = tracker.twitter_api_service.get_conversation_thread
+
+            def shed_related_conversation(conversation_id, priority, since_id):
+                if conversation_id == RELATED_ID:
+                    raise RateLimitExceeded()
+                return get_conversation_thread(conversation_id, priority=priority, since_id=since_id)
+
+            mocker.patch.object(tracker.twitter_api_service, "get_conversation_thread",
+                                side_effect=shed_related_conversation)
+            assert tracker.poll(ROOT_ID) == 1
+            assert tracker.get_status(ROOT_ID)["since_ids"] == {ROOT_ID: new_ids[1], RELATED_ID: RELATED_SINCE_ID}
+
+            mocker.patch.object(tracker.twitter_api_service, "get_conversation_thread",
+                                side_effect=get_conversation_thread)
+            assert tracker.poll(ROOT_ID) == 1
+
+        assert tracker.conversations[ROOT_ID].tweet_tree.get_parent(new_ids[0]) == RELATED_ID
+        assert tracker.get_status(ROOT_ID)["since_ids"] == {ROOT_ID: new_ids[1], RELATED_ID: new_ids[0]}
+
+    def test_untrack(self, fixtures, monkeypatch):
+        """
+        Tests that an untracked tweet is no longer polled
+        """
+        with ReplayServer(fixtures) as server:
+            monkeypatch.setenv("TWITTER_API_BASE_URL", server.base_url)
+            tracker = ConversationTracker()
+            tracker.track(ROOT_ID)
+
+            assert tracker.untrack(ROOT_ID)
+            assert not tracker.untrack(ROOT_ID)
+            assert tracker.poll_all() == {}
+            assert tracker.get_model(ROOT_ID) is None
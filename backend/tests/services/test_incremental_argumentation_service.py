@@ -0,0 +1,145 @@
+import pytest
+from backend.services.incremental_argumentation_service import IncrementalArgumentationService
+from backend.services.tweet_tree_builder_service import TweetTreeMetrics, TweetTree, TweetTreeBuilder
+
+ROOT_TWEET = {"id": "0", "text": "none 0", "retweet_count": 0, "reply_count": 0, "like_count": 0, "quote_count": 0,
+              "sentiment": "positive", "argumentative_type": "none"}
+
+
+def create_reply(tweet_id, parent_id, argumentative_type, like_count, sentiment="positive"):
+    """
+    Creates a reply, whose argumentative relation to its parent is the first word of its text
+    """
+    return {"id": tweet_id, "text": f"{argumentative_type} {tweet_id}", "retweet_count": 0, "reply_count": 0,
+            "like_count": like_count, "quote_count": 0, "sentiment": sentiment,
+            "referenced_tweets": [{"id": parent_id, "text": ""}]}
+
+
+CONVERSATION_THREAD = [create_reply("1", "0", "support", 10),
+                       create_reply("2", "0", "attack", 40, "negative"),
+                       create_reply("3", "1", "attack", 20),
+                       create_reply("4", "3", "support", 5, "neutral"),
+                       create_reply("5", "1", "neutral", 30),
+                       create_reply("6", "5", "attack", 40),
+                       create_reply("7", "2", "support", 15, "negative")]
+
+
+@pytest.fixture
+def relation_classifier(mocker):
+    mocker.patch.object(TweetTreeBuilder.argumentation_relation_service, "predict_argumentative_relations",
+                        side_effect=lambda pairs: [child_text.split()[0] for _, child_text in pairs])
+
+
+def create_tweet_tree(conversation_thread):
+    tweet_tree = TweetTree(dict(ROOT_TWEET), conversation_thread, TweetTreeMetrics())
+    IncrementalArgumentationService(tweet_tree).evaluate()
+
+    return tweet_tree
+
+
+def assert_same_tweet_tree(tweet_tree, expected_tweet_tree):
+    """
+    Asserts that a tweet tree updated incrementally has the same degrees and metrics as one built from scratch
+    """
+    degrees = dict(tweet_tree.get_tree().nodes(data="attributes"))
+    expected_degrees = dict(expected_tweet_tree.get_tree().nodes(data="attributes"))
+    assert degrees.keys() == expected_degrees.keys()
+    for tweet_id, tweet in expected_degrees.items():
+        assert tweet.get("acceptability") == pytest.approx(degrees[tweet_id].get("acceptability"), abs=1e-12)
+
+    metrics = tweet_tree.get_tweet_tree_metrics()
+    expected_metrics = expected_tweet_tree.get_tweet_tree_metrics()
+    assert metrics.get_max_public_metrics() == expected_metrics.get_max_public_metrics()
+    assert metrics.get_min_public_metrics() == expected_metrics.get_min_public_metrics()
+    assert metrics.strongest_argument_id == expected_metrics.strongest_argument_id
+    assert metrics.root_tweet_argument_strength == pytest.approx(expected_metrics.root_tweet_argument_strength,
+                                                                 abs=1e-12)
+    for sentiment_count in ["general_positive_sentiment_count", "general_negative_sentiment_count",
+                            "general_neutral_sentiment_count", "root_positive_sentiment_count",
+                            "root_negative_sentiment_count", "root_neutral_sentiment_count"]:
+        assert getattr(metrics, sentiment_count) == getattr(expected_metrics, sentiment_count)
+
+
+class TestIncrementalArgumentationService:
+    """
+    Test class that tests the IncrementalArgumentationService, which must keep a tweet tree in the same state as if it
+    was built and evaluated again from scratch.
+    """
+
+    def test_add_replies(self, mocker, relation_classifier):
+        """
+        Tests that new replies are evaluated along their path to the root, without evaluating the whole tree again
+        """
+        tweet_tree = TweetTree(dict(ROOT_TWEET), CONVERSATION_THREAD[:5], TweetTreeMetrics())
+        argumentation_service = IncrementalArgumentationService(tweet_tree)
+        argumentation_service.evaluate()
+        evaluate = mocker.spy(argumentation_service, "evaluate")
+
+        # The new replies are within the max and min public metrics, a reply to an unknown tweet is ignored
+        new_replies = CONVERSATION_THREAD[5:] + [create_reply("8", "7", "attack", 12),
+                                                 create_reply("9", "404", "attack", 1)]
+        root_argument_score = argumentation_service.add_replies(new_replies)
+
+        expected_tweet_tree = create_tweet_tree(CONVERSATION_THREAD + [create_reply("8", "7", "attack", 12)])
+        assert_same_tweet_tree(tweet_tree, expected_tweet_tree)
+        assert root_argument_score == tweet_tree.get_tweet_tree_metrics().root_tweet_argument_strength
+        assert evaluate.call_count == 0
+
+    def test_add_replies_new_max_public_metrics(self, mocker, relation_classifier):
+        """
+        Tests that the whole tree is evaluated again when a new reply changes the max public metrics
+        """
+        tweet_tree = create_tweet_tree(CONVERSATION_THREAD)
+        argumentation_service = IncrementalArgumentationService(tweet_tree)
+        evaluate = mocker.spy(argumentation_service, "evaluate")
+
+        argumentation_service.add_replies([create_reply("8", "4", "support", 100)])
+
+        assert_same_tweet_tree(tweet_tree, create_tweet_tree(CONVERSATION_THREAD + [create_reply("8", "4", "support",
+                                                                                                 100)]))
+        assert evaluate.call_count == 1
+
+    def test_update_public_metrics(self, mocker, relation_classifier):
+        """
+        Tests that updating the like counts of tweets, including weakening the strongest argument, only evaluates
+        their paths to the root when the max and min public metrics do not change
+        """
+        tweet_tree = create_tweet_tree(CONVERSATION_THREAD)
+        argumentation_service = IncrementalArgumentationService(tweet_tree)
+        evaluate = mocker.spy(argumentation_service, "evaluate")
+        assert tweet_tree.get_tweet_tree_metrics().strongest_argument_id == "2"
+
+        like_counts = {"7": 30, "2": 11, "3": 8}
+        for tweet_id, like_count in like_counts.items():
+            argumentation_service.update_public_metrics(tweet_id, like_count, 0)
+
+        updated_conversation_thread = [dict(tweet) for tweet in CONVERSATION_THREAD]
+        for tweet in updated_conversation_thread:
+            tweet["like_count"] = like_counts.get(tweet["id"], tweet["like_count"])
+
+        assert_same_tweet_tree(tweet_tree, create_tweet_tree(updated_conversation_thread))
+        assert evaluate.call_count == 0
+
+    def test_remove_tweet(self, relation_classifier):
+        """
+        Tests that removing a tweet removes the replies below it, and updates the degrees and metrics
+        """
+        tweet_tree = create_tweet_tree(CONVERSATION_THREAD)
+        argumentation_service = IncrementalArgumentationService(tweet_tree)
+
+        # A non-argumentative tweet and the argument below it
+        argumentation_service.remove_tweet("5")
+        assert_same_tweet_tree(tweet_tree, create_tweet_tree([tweet for tweet in CONVERSATION_THREAD
+                                                              if tweet["id"] not in ("5", "6")]))
+
+        # The tweet with the min public metrics, which evaluates the whole tree again
+        argumentation_service.remove_tweet("4")
+        assert_same_tweet_tree(tweet_tree, create_tweet_tree([tweet for tweet in CONVERSATION_THREAD
+                                                              if tweet["id"] not in ("4", "5", "6")]))
+
+        argumentation_service.remove_tweet("3")
+        assert_same_tweet_tree(tweet_tree, create_tweet_tree([tweet for tweet in CONVERSATION_THREAD
+                                                              if tweet["id"] in ("1", "2", "7")]))
+
+        with pytest.raises(ValueError):
+            argumentation_service.remove_tweet("0")
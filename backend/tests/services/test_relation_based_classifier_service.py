@@ -46,3 +46,17 @@ class TestBertRelationClassification:
 
         assert argumentative_relation_type == expected_argumentative_relation_type
 
+    def test_batch_argument_relations(self):
+        """
+        Tests that classifying several pairs in bulk returns the labels in the same order as the input pairs.
+        """
+        parent_tweet = "Python is probably the best programming language ever"
+        pairs = [(parent_tweet, "Hmm, I'm not sure really"),
+                 (parent_tweet, "I have to agree! Its super simple"),
+                 (parent_tweet, "I have to disagree! Its very slow in comparison to C++")]
+
+        argumentative_relation_types = TestBertRelationClassification.bert.predict_argumentative_relations(pairs,
+                                                                                                           batch_size=2)
+        expected_argumentative_relation_types = ["neutral", "support", "attack"]
+
+        assert argumentative_relation_types == expected_argumentative_relation_types
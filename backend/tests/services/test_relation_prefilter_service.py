@@ -0,0 +1,61 @@
+from backend.services.relation_prefilter_service import TfidfRelationPrefilter
+
+
+class TestTfidfRelationPrefilter:
+    """
+    Test class for TfidfRelationPrefilter which prunes the keyword search hits least similar to the analysed tweet
+    before their relation is classified.
+    """
+
+    tweet = {"id": "0", "text": "Pineapple on pizza is a crime against Italian food"}
+    candidates = [{"id": "1", "text": "The weather in London is great today, pizza later"},
+                  {"id": "2", "text": "Pineapple on pizza is delicious, Italian food purists are wrong"},
+                  {"id": "3", "text": "Italian food is the best food, but pineapple pizza is a crime"},
+                  {"id": "4", "text": "Watching the football tonight"}]
+
+    def test_ranking_and_budget(self):
+        """
+        Tests that the candidates most similar to the tweet are kept first, within the budget
+        """
+        prefilter = TfidfRelationPrefilter(budget=2, min_similarity=0.0)
+
+        selected = prefilter.select_candidates(TestTfidfRelationPrefilter.tweet, TestTfidfRelationPrefilter.candidates)
+
+        assert sorted(candidate["id"] for candidate in selected) == ["2", "3"]
+        assert prefilter.get_stats() == {"budget": 2, "min_similarity": 0.0, "analyses": 1, "candidates": 4, "kept": 2,
+                                         "pruned": 2}
+
+    def test_no_budget(self):
+        """
+        Tests that without a budget nor a minimum similarity every candidate is kept in the search order, and counted
+        """
+        prefilter = TfidfRelationPrefilter(budget=None, min_similarity=0.0)
+
+        selected = prefilter.select_candidates(TestTfidfRelationPrefilter.tweet, TestTfidfRelationPrefilter.candidates)
+
+        assert selected == TestTfidfRelationPrefilter.candidates
+        assert prefilter.get_stats() == {"budget": None, "min_similarity": 0.0, "analyses": 1, "candidates": 4,
+                                         "kept": 4, "pruned": 0}
+
+    def test_min_similarity(self):
+        """
+        Tests that the candidates sharing no word with the tweet are pruned, whatever the budget
+        """
+        prefilter = TfidfRelationPrefilter(budget=10, min_similarity=0.01)
+
+        selected = prefilter.select_candidates(TestTfidfRelationPrefilter.tweet, TestTfidfRelationPrefilter.candidates)
+
+        assert "4" not in [candidate["id"] for candidate in selected]
+        assert len(selected) == 3
+
+    def test_no_words(self):
+        """
+        Tests that candidates without any word to compare are kept in the search order, and that no candidates are
+        handled
+        """
+        prefilter = TfidfRelationPrefilter(budget=2, min_similarity=0.0)
+        candidates = [{"id": "1", "text": "the"}, {"id": "2", "text": "a"}, {"id": "3", "text": "it"}]
+
+        assert prefilter.select_candidates({"id": "0", "text": "and"}, candidates) == candidates[:2]
+        assert prefilter.select_candidates(TestTfidfRelationPrefilter.tweet, []) == []
+        assert prefilter.get_stats()["analyses"] == 2
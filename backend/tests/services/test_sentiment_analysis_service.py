@@ -37,6 +37,18 @@ class TestVaderSentimentAnalysis:
 
         assert sentiment == expected_sentiment
 
+    def test_predict_sentiments(self):
+        """
+        Tests that VADER classifies a batch of tweets and returns the labels in the input order.
+        """
+        tweets = ["I hate this random topic, its super annoying and frustrating",
+                  "This is a neutral tweet",
+                  "I love this random topic, its super interesting and lovely"]
+        sentiments = TestVaderSentimentAnalysis.vader.predict_sentiments(tweets)
+        expected_sentiments = ["negative", "neutral", "positive"]
+
+        assert sentiments == expected_sentiments
+
 
 class TestBertSentimentAnalysis:
     """
@@ -74,6 +86,18 @@ class TestBertSentimentAnalysis:
 
         assert sentiment == expected_sentiment
 
+    def test_predict_sentiments(self):
+        """
+        Tests that BERTweet classifies a batch of tweets and returns the labels in the input order.
+        """
+        tweets = ["I hate this random topic, its super annoying and frustrating",
+                  "This is a neutral tweet",
+                  "I love this random topic, its super interesting and lovely"]
+        sentiments = TestBertSentimentAnalysis.bert.predict_sentiments(tweets, batch_size=2)
+        expected_sentiments = ["negative", "neutral", "positive"]
+
+        assert sentiments == expected_sentiments
+
 
 class TestSentimentAnalysis:
     """
@@ -113,3 +137,40 @@ class TestSentimentAnalysis:
         SentimentAnalysis.bertSentimentAnalysis.predict_sentiment.assert_called_once_with(tweet)
         # Vader should NOT have been called as BERT threw an exception
         SentimentAnalysis.vaderSentimentAnalysis.predict_sentiment.assert_not_called()
+
+    def test_predict_sentiments_bert(self, mocker):
+        """
+        Tests the case BERT classifies the whole batch without throwing an error.
+        """
+        mocker.patch("backend.services.sentiment_analysis_service.BertweetSentimentAnalysis.predict_sentiments",
+                     return_value=["positive", "negative"])
+        mocker.patch("backend.services.sentiment_analysis_service.VaderSentimentAnalysis.predict_sentiment")
+
+        tweets = ["Some random test tweet", "Another random test tweet"]
+
+        sentiments = TestSentimentAnalysis.sentiment_analyzer.predict_sentiments(tweets)
+
+        assert sentiments == ["positive", "negative"]
+        SentimentAnalysis.bertSentimentAnalysis.predict_sentiments.assert_called_once_with(tweets)
+        # Vader should NOT have been called as BERT classified the whole batch
+        SentimentAnalysis.vaderSentimentAnalysis.predict_sentiment.assert_not_called()
+
+    def test_predict_sentiments_partial_vader(self, mocker):
+        """
+        Tests the case the BERT batch fails, only the tweets BERT cannot classify on their own should fall back on
+        VADER.
+        """
+        mocker.patch("backend.services.sentiment_analysis_service.BertweetSentimentAnalysis.predict_sentiments",
+                     side_effect=Exception("Bert didn't work"))
+        mocker.patch("backend.services.sentiment_analysis_service.BertweetSentimentAnalysis.predict_sentiment",
+                     side_effect=["positive", Exception("Bert didn't work")])
+        mocker.patch("backend.services.sentiment_analysis_service.VaderSentimentAnalysis.predict_sentiment",
+                     return_value="negative")
+
+        tweets = ["Some random test tweet", "Another random test tweet"]
+
+        sentiments = TestSentimentAnalysis.sentiment_analyzer.predict_sentiments(tweets)
+
+        assert sentiments == ["positive", "negative"]
+        # Vader should have been called only for the tweet BERT failed on
+        SentimentAnalysis.vaderSentimentAnalysis.predict_sentiment.assert_called_once_with(tweets[1])
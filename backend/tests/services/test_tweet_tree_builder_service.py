@@ -1,4 +1,13 @@
-from backend.services.tweet_tree_builder_service import TweetTreeMetrics, TweetTree, TweetTreeBuilder
+import json
+import asyncio
+from backend.services.twitter_api_service import TwitterResponseParser
+from backend.services.tweet_tree_builder_service import TweetTreeMetrics, TweetTree, TweetTreeBuilder, ROOT_EVENT, \
+    CONVERSATION_EVENT, RELATED_EVENT, SENTIMENT_STAGE, RELATION_STAGE
+from backend.services.utils.pipeline import pipeline_stats
+from backend.benchmarks.twitter_replay_server import ReplayServer
+from backend.benchmarks.synthetic_conversations import generate_fixtures, FIRST_TWEET_ID
+from backend.benchmarks.argumentation_benchmark import generate_tweet_tree
+from backend.benchmarks.tweet_tree_memory_benchmark import generate_conversation
 
 
 class TestTweetTreeMetrics:
@@ -192,6 +201,75 @@ class TestTweetTree:
 
         assert tweet_tree_json == expected_tweet_tree_json
 
+    def test_get_json_bytes(self):
+        """
+        Tests that the tweet tree encoded straight to JSON bytes is the JSON of get_json, also for reply chains deeper
+        than the recursion limit
+        """
+        tree, root_id, _, _ = generate_tweet_tree(500, depth=50)
+        tweet_tree = TweetTree(tree.nodes[root_id]["attributes"], [], TweetTreeMetrics())
+        tweet_tree.set_tree(tree)
+
+        assert json.loads(tweet_tree.get_json_bytes()) == json.loads(json.dumps(tweet_tree.get_json()))
+
+        # Too deep for the json module to decode as well, every tweet but the last one has its reply as child
+        chain, root_id, _, _ = generate_tweet_tree(5000, depth=4999)
+        tweet_tree.set_tree(chain)
+        tweet_tree_json = tweet_tree.get_json_bytes()
+
+        assert tweet_tree_json.count(b'"children":[') == 4999
+        assert tweet_tree_json.count(b"{") == tweet_tree_json.count(b"}")
+
+    def test_get_columns(self):
+        """
+        Tests that the columns of the tweet tree list every tweet after its parent, with the index of its parent and
+        its attributes, and the metrics of get_json
+        """
+        tree, root_id, _, _ = generate_tweet_tree(200, depth=20)
+        tweet_tree = TweetTree(tree.nodes[root_id]["attributes"], [], TweetTreeMetrics())
+        tweet_tree.set_tree(tree)
+
+        columns = tweet_tree.get_columns()
+        tweet_tree_columns = columns["tweet_tree"]
+
+        assert columns["metrics"] == tweet_tree.get_json()["metrics"]
+        assert sorted(tweet_tree_columns["ids"]) == sorted(tree.nodes)
+        assert tweet_tree_columns["parents"][0] == -1
+        for index, (tweet_id, parent) in enumerate(zip(tweet_tree_columns["ids"], tweet_tree_columns["parents"])):
+            attributes = tree.nodes[tweet_id]["attributes"]
+            assert parent < index
+            assert parent == -1 or tweet_tree.get_parent(tweet_id) == tweet_tree_columns["ids"][parent]
+            assert tweet_tree_columns["like_counts"][index] == attributes["like_count"]
+            assert tweet_tree_columns["argumentative_types"][index] == attributes["argumentative_type"]
+            assert tweet_tree_columns["texts"][index] is None
+
+    def test_add_related_conversation(self):
+        """
+        Tests that a related conversation is added in place below the root tweet, with its replies counted like the
+        replies of the root conversation
+        """
+        root_tweet, conversation_thread, argumentative_types = generate_conversation(50, depth=5)
+        related_tweet, related_thread, related_types = generate_conversation(50, depth=5, seed=1, first_id=100)
+        related_tweet["argumentative_type"] = "attack"
+        metrics = TweetTreeMetrics()
+        tweet_tree = TweetTree(root_tweet, conversation_thread, metrics, argumentative_types)
+        tree = tweet_tree.get_tree()
+        root_reply_count = metrics.root_positive_sentiment_count + metrics.root_negative_sentiment_count + \
+            metrics.root_neutral_sentiment_count
+
+        added_tweet_ids = tweet_tree.add_related_conversation(related_tweet, related_thread, related_types)
+
+        assert tweet_tree.get_tree() is tree
+        assert tree.number_of_nodes() == 100
+        assert added_tweet_ids[0] == "100"
+        assert sorted(added_tweet_ids, key=int) == [str(tweet_id) for tweet_id in range(100, 150)]
+        assert all(added_tweet_ids.index(tweet_tree.get_parent(tweet_id)) < added_tweet_ids.index(tweet_id)
+                   for tweet_id in added_tweet_ids[1:])
+        assert tweet_tree.get_parent("100") == "0"
+        assert tree.edges["0", "100"]["color"] == "r"
+        assert metrics.root_positive_sentiment_count + metrics.root_negative_sentiment_count + \
+            metrics.root_neutral_sentiment_count == root_reply_count + tree.out_degree("100")
+
 
 class TestTweetTreeBuilder:
     """
@@ -242,3 +320,230 @@ class TestTweetTreeBuilder:
         }
 
         assert tweet_tree_json == expected_tweet_tree_json
+
+    def test_tweet_tree_builder_async_api(self, mocker, monkeypatch):
+        """
+        Tests that the tweet tree is built from the conversations fetched concurrently by the AsyncTwitterAPIService.
+        """
+        monkeypatch.setenv("TWITTER_API_ASYNC", "true")
+
+        root_tweet = {"id": "0", "text": "I love Pizza", "retweet_count": 25, "reply_count": 0, "like_count": 29,
+                      "quote_count": 0, "sentiment": "positive"}
+        related_tweet = {"id": "7", "text": "Pizza is overrated", "retweet_count": 1, "reply_count": 0,
+                         "like_count": 1, "quote_count": 0, "sentiment": "negative"}
+
+        # Mock the API calls to prevent querying Twitter, and the models
+        service = "backend.services.async_twitter_api_service.AsyncTwitterAPIService"
+        mocker.patch(f"{service}.get_tweet", return_value=root_tweet)
+        mocker.patch(f"{service}.get_tweets_from_keyword", return_value=[related_tweet])
+        get_conversation_thread = mocker.patch(f"{service}.get_conversation_thread", return_value=[])
+        mocker.patch.object(TweetTreeBuilder.keyword_extraction_service, "get_top_keyword", return_value="pizza")
+        mocker.patch.object(TweetTreeBuilder.argumentation_relation_service, "predict_argumentative_relations",
+                            return_value=["attack"])
+
+        tweet_tree = TweetTreeBuilder("0").get_tweet_tree()
+
+        # The root and related conversations are both fetched, and the related tweet is attached to the root
+        assert sorted(call.args[0] for call in get_conversation_thread.call_args_list) == ["0", "7"]
+        assert list(tweet_tree.get_tree().edges) == [("0", "7")]
+        assert tweet_tree.get_tree().nodes["7"]["attributes"]["argumentative_type"] == "attack"
+
+    def test_tweet_tree_builder_in_running_loop(self, mocker, monkeypatch):
+        """
+        Tests that the tweet tree can be built from a running event loop, with the TweetTreeBuilder constructor or
+        without blocking the loop with create_async.
+        """
+        monkeypatch.setenv("TWITTER_API_ASYNC", "true")
+
+        root_tweet = {"id": "0", "text": "I love Pizza", "retweet_count": 25, "reply_count": 0, "like_count": 29,
+                      "quote_count": 0, "sentiment": "positive"}
+
+        service = "backend.services.async_twitter_api_service.AsyncTwitterAPIService"
+        mocker.patch(f"{service}.get_tweet", return_value=root_tweet)
+        mocker.patch(f"{service}.get_tweets_from_keyword", return_value=[])
+        mocker.patch(f"{service}.get_conversation_thread", return_value=[])
+        mocker.patch.object(TweetTreeBuilder.keyword_extraction_service, "get_top_keyword", return_value="pizza")
+        mocker.patch.object(TweetTreeBuilder.argumentation_relation_service, "predict_argumentative_relations",
+                            return_value=[])
+
+        async def build_tweet_trees():
+            return TweetTreeBuilder("0").get_tweet_tree(), (await TweetTreeBuilder.create_async("0")).get_tweet_tree()
+
+        tweet_tree, async_tweet_tree = asyncio.run(build_tweet_trees())
+
+        assert tweet_tree.get_json() == async_tweet_tree.get_json()
+        assert list(tweet_tree.get_tree().nodes) == ["0"]
+
+    def test_stream_tweet_tree(self, mocker, monkeypatch):
+        """
+        Tests that streaming the tweet tree yields the root tweet, then each level of its replies, then the related
+        conversation, and builds the same tree as the TweetTreeBuilder
+        """
+        mocker.patch.object(TwitterResponseParser.sentiment_analysis_service, "predict_sentiments",
+                            side_effect=lambda texts: ["negative"] * len(texts))
+        mocker.patch.object(TweetTreeBuilder.keyword_extraction_service, "get_top_keyword", return_value="pizza")
+        mocker.patch.object(TweetTreeBuilder.argumentation_relation_service, "predict_argumentative_relations",
+                            side_effect=lambda pairs: ["attack"] * len(pairs))
+        monkeypatch.setenv("TWITTER_API_ASYNC", "true")
+        fixtures = generate_fixtures(2, depth=2, breadth=3)
+        root_id = str(FIRST_TWEET_ID)
+
+        with ReplayServer(fixtures) as server:
+            monkeypatch.setenv("TWITTER_API_BASE_URL", server.base_url)
+            stream = TweetTreeBuilder.stream_tweet_tree(root_id)
+            events = []
+            while True:
+                try:
+                    events.append(next(stream))
+                except StopIteration as stop:
+                    tweet_tree = stop.value
+                    break
+            built_tree = TweetTreeBuilder(root_id).get_tweet_tree()
+
+        assert [event for event, _ in events] == [ROOT_EVENT, CONVERSATION_EVENT, CONVERSATION_EVENT, RELATED_EVENT]
+        assert [len(data["nodes"]) for _, data in events] == [1, 3, 9, 1 + 3 + 9]
+        assert events[0][1]["nodes"][0]["name"] == root_id
+        assert events[3][1]["nodes"][0]["parent"] == root_id
+        assert set(tweet_tree.get_tree().edges) == set(built_tree.get_tree().edges)
+        assert events[-1][1]["metrics"] == built_tree.get_json()["metrics"]
+
+    def test_build_tweet_trees(self, mocker, monkeypatch):
+        """
+        Tests that building many tweet trees classifies the replies of all their conversations together, builds the
+        same trees as the TweetTreeBuilder and reports the tweets that could not be fetched
+        """
+        mocker.patch.object(TwitterResponseParser.sentiment_analysis_service, "predict_sentiments",
+                            side_effect=lambda texts: ["negative"] * len(texts))
+        mocker.patch.object(TweetTreeBuilder.keyword_extraction_service, "get_top_keyword", return_value=None)
+        predict_argumentative_relations = mocker.patch.object(
+            TweetTreeBuilder.argumentation_relation_service, "predict_argumentative_relations",
+            side_effect=lambda pairs: ["attack"] * len(pairs))
+        fixtures = generate_fixtures(3, depth=2, breadth=3)
+        tweet_ids = list(fixtures.tweets) + ["1"]
+
+        with ReplayServer(fixtures) as server:
+            monkeypatch.setenv("TWITTER_API_BASE_URL", server.base_url)
+            results = list(TweetTreeBuilder.build_tweet_trees(tweet_ids, max_workers=2, batch_size=len(tweet_ids)))
+            batch_calls = list(predict_argumentative_relations.call_args_list)
+            built_tree = TweetTreeBuilder(tweet_ids[0]).get_tweet_tree()
+
+        assert [tweet_id for tweet_id, _, _ in results] == tweet_ids
+        assert [error is None for _, _, error in results] == [True, True, True, False]
+        # The related tweets of each tweet, none here as no keyword is extracted, then the replies of every tweet
+        assert [len(call.args[0]) for call in batch_calls] == [0, 0, 0, 3 * (3 + 9)]
+        assert set(results[0][1].get_tree().edges) == set(built_tree.get_tree().edges)
+        assert results[0][1].get_json()["metrics"] == built_tree.get_json()["metrics"]
+
+    def test_tweet_tree_builder_pipeline(self, mocker, monkeypatch):
+        """
+        Tests that the pipelined build, where the pages of replies are scored and classified on worker threads while
+        the next pages are fetched, builds the same tree as the sequential build and records the stages in the stats
+        """
+        mocker.patch.object(TwitterResponseParser.sentiment_analysis_service, "predict_sentiments",
+                            side_effect=lambda texts: ["negative"] * len(texts))
+        mocker.patch.object(TweetTreeBuilder.keyword_extraction_service, "get_top_keyword", return_value="pizza")
+        mocker.patch.object(TweetTreeBuilder.argumentation_relation_service, "predict_argumentative_relations",
+                            side_effect=lambda pairs: ["attack"] * len(pairs))
+        fixtures = generate_fixtures(2, depth=2, breadth=3)
+        root_id = str(FIRST_TWEET_ID)
+        stage_items = {name: pipeline_stats.get_stats().get(name, {}).get("items", 0)
+                       for name in [SENTIMENT_STAGE, RELATION_STAGE]}
+
+        with ReplayServer(fixtures) as server:
+            monkeypatch.setenv("TWITTER_API_BASE_URL", server.base_url)
+            built_tree = TweetTreeBuilder(root_id).get_tweet_tree()
+            monkeypatch.setenv("TWEET_TREE_PIPELINE", "true")
+            pipelined_tree = TweetTreeBuilder(root_id).get_tweet_tree()
+
+        assert set(pipelined_tree.get_tree().edges) == set(built_tree.get_tree().edges)
+        assert pipelined_tree.get_json() == built_tree.get_json()
+        # The replies of the root conversation and of the related conversation went through both stages
+        for name in [SENTIMENT_STAGE, RELATION_STAGE]:
+            assert pipeline_stats.get_stats()[name]["items"] - stage_items[name] == 2 * (3 + 9)
+
+    def test_tweet_tree_builder_scores_kept_tweets(self, mocker, monkeypatch):
+        """
+        Tests that the sentiment is only scored for the tweets which end up in the tweet tree, in one batch, and not
+        for the related tweets discarded as neutral
+        """
+        predict_sentiments = mocker.patch.object(TwitterResponseParser.sentiment_analysis_service, "predict_sentiments",
+                                                 side_effect=lambda texts: ["negative"] * len(texts))
+        mocker.patch.object(TweetTreeBuilder.keyword_extraction_service, "get_top_keyword", return_value="pizza")
+        mocker.patch.object(TweetTreeBuilder.argumentation_relation_service, "predict_argumentative_relations",
+                            side_effect=lambda pairs: ["neutral"] * len(pairs))
+        fixtures = generate_fixtures(3, depth=2, breadth=3)
+        root_id = str(FIRST_TWEET_ID)
+
+        with ReplayServer(fixtures) as server:
+            monkeypatch.setenv("TWITTER_API_BASE_URL", server.base_url)
+            tweet_tree = TweetTreeBuilder(root_id).get_tweet_tree()
+
+        tree_texts = [attributes["text"] for _, attributes in tweet_tree.get_tree().nodes(data="attributes")]
+
+        # The root tweet and its 3 + 9 replies, the 2 related tweets are neutral so their conversations are left out
+        predict_sentiments.assert_called_once()
+        assert sorted(predict_sentiments.call_args.args[0]) == sorted(tree_texts)
+        assert len(tree_texts) == 1 + 3 + 9
+        assert all(attributes["sentiment"] == "negative"
+                   for _, attributes in tweet_tree.get_tree().nodes(data="attributes"))
+
+    def test_tweet_tree_builder_expansion_budget(self, mocker, monkeypatch):
+        """
+        Tests that the related tweets beyond the expansion budget are neither classified nor fetched
+        """
+        mocker.patch.object(TwitterResponseParser.sentiment_analysis_service, "predict_sentiments",
+                            side_effect=lambda texts: ["negative"] * len(texts))
+        mocker.patch.object(TweetTreeBuilder.keyword_extraction_service, "get_top_keyword", return_value="pizza")
+        predict_argumentative_relations = mocker.patch.object(
+            TweetTreeBuilder.argumentation_relation_service, "predict_argumentative_relations",
+            side_effect=lambda pairs: ["attack"] * len(pairs))
+        fixtures = generate_fixtures(4, depth=1, breadth=2)
+        root_id = str(FIRST_TWEET_ID)
+
+        request_counts = {}
+        for budget in [3, 1]:
+            mocker.patch.object(TweetTreeBuilder.relation_prefilter_service, "budget", budget)
+            predict_argumentative_relations.reset_mock()
+            with ReplayServer(fixtures) as server:
+                monkeypatch.setenv("TWITTER_API_BASE_URL", server.base_url)
+                tweet_tree = TweetTreeBuilder(root_id).get_tweet_tree()
+                request_counts[budget] = sum(server.get_request_counts().values())
+
+            # The first classification is the one of the related tweets kept by the pre-filter
+            assert len(predict_argumentative_relations.call_args_list[0].args[0]) == budget
+            assert tweet_tree.get_tree().out_degree(root_id) == 2 + budget
+
+        # The conversations of the 2 pruned related tweets are not fetched
+        assert request_counts[3] - request_counts[1] == 2
+
+    def test_tweet_tree_builder_pipeline_scores_reachable_replies(self, mocker, monkeypatch):
+        """
+        Tests that the pipelined build only scores the replies reachable from the root tweet, even when a reply is
+        fetched before the tweet it replies to, and never the replies whose parent is not in the conversation
+        """
+        monkeypatch.setenv("TWEET_TREE_PIPELINE", "true")
+        root_tweet = {"id": "0", "text": "I love Pizza", "retweet_count": 25, "reply_count": 0, "like_count": 29,
+                      "quote_count": 0}
+
+        def reply(tweet_id, text, parent_id, parent_text):
+            return {"id": tweet_id, "text": text, "retweet_count": 0, "reply_count": 0, "like_count": 0,
+                    "quote_count": 0, "referenced_tweets": [{"id": parent_id, "text": parent_text}]}
+
+        # The newest replies come first, the reply to the first reply is fetched before it
+        pages = [[reply("2", "No it is not", "1", "Pizza is great"), reply("3", "Deleted parent", "9", "Gone")],
+                 [reply("1", "Pizza is great", "0", "I love Pizza")]]
+        service = "backend.services.twitter_api_service.TwitterAPIService"
+        mocker.patch(f"{service}.get_tweet", return_value=root_tweet)
+        mocker.patch(f"{service}.get_tweets_from_keyword", return_value=[])
+        mocker.patch(f"{service}.get_conversation_pages", return_value=iter(pages))
+        predict_sentiments = mocker.patch.object(TwitterResponseParser.sentiment_analysis_service, "predict_sentiments",
+                                                 side_effect=lambda texts: ["negative"] * len(texts))
+        mocker.patch.object(TweetTreeBuilder.keyword_extraction_service, "get_top_keyword", return_value="pizza")
+        mocker.patch.object(TweetTreeBuilder.argumentation_relation_service, "predict_argumentative_relations",
+                            side_effect=lambda pairs: ["attack"] * len(pairs))
+
+        tweet_tree = TweetTreeBuilder("0").get_tweet_tree()
+
+        scored_texts = [text for call in predict_sentiments.call_args_list for text in call.args[0]]
+        assert sorted(scored_texts) == ["I love Pizza", "No it is not", "Pizza is great"]
+        assert set(tweet_tree.get_tree().edges) == {("0", "1"), ("1", "2")}
@@ -0,0 +1,117 @@
+import pytest
+
+from backend.services.tweet_tree_builder_service import TweetTree, TweetTreeMetrics
+from backend.services.tweet_tree_view_service import TweetTreeView, encode_cursor, decode_cursor
+from backend.benchmarks.argumentation_benchmark import generate_tweet_tree
+
+
+@pytest.fixture
+def tweet_tree():
+    """
+    Synthetic tweet tree of 200 tweets, with the acceptability of each tweet set to its id
+    """
+    tree, root_id, _, _ = generate_tweet_tree(200, depth=20)
+    for tweet_id in tree.nodes:
+        tree.nodes[tweet_id]["attributes"]["acceptability"] = tweet_id / 200
+
+    tweet_tree = TweetTree(tree.nodes[root_id]["attributes"], [], TweetTreeMetrics())
+    tweet_tree.set_tree(tree)
+
+    return tweet_tree
+
+
+def count_tweets(node):
+    """
+    Counts the tweets of a view, the tweet and the children listed below it
+    """
+    return 1 + sum(count_tweets(child) for child in node["children"])
+
+
+class TestTweetTreeView:
+    """
+    Test class that tests the TweetTreeView, which lists the parts of an analysed tweet tree kept server-side.
+    """
+
+    def test_get_view(self, tweet_tree):
+        """
+        Tests that the view lists the tweets down to the depth, the top children of each tweet by acceptability, and
+        a cursor on the tweets with more children
+        """
+        tree = tweet_tree.get_tree()
+        view = TweetTreeView(tweet_tree).get_view(depth=2, limit=3)
+
+        root = view["tweet_tree"]
+        assert view["metrics"] == tweet_tree.get_json()["metrics"]
+        assert root["name"] == 0
+        assert root["attributes"] == tree.nodes[0]["attributes"]
+        assert root["child_count"] == tree.out_degree(0)
+        assert [child["name"] for child in root["children"]] == sorted(tree.successors(0), reverse=True)[:3]
+        for child in root["children"]:
+            assert child["child_count"] == tree.out_degree(child["name"])
+            assert len(child["children"]) == min(3, child["child_count"])
+            assert all(grandchild["children"] == [] for grandchild in child["children"])
+            assert all((grandchild["next_cursor"] is None) == (grandchild["child_count"] == 0)
+                       for grandchild in child["children"])
+
+    def test_get_view_sort(self, tweet_tree):
+        """
+        Tests that the children can be sorted by engagement or time instead, and that unknown orders are rejected
+        """
+        tree = tweet_tree.get_tree()
+        view = TweetTreeView(tweet_tree)
+
+        engagement = [child["name"] for child in view.get_view(1, 100, "engagement")["tweet_tree"]["children"]]
+        time = [child["name"] for child in view.get_view(1, 100, "time")["tweet_tree"]["children"]]
+
+        def engagement_of(tweet_id):
+            attributes = tree.nodes[tweet_id]["attributes"]
+            return attributes["like_count"] + attributes["retweet_count"]
+
+        assert [engagement_of(tweet_id) for tweet_id in engagement] == \
+               sorted((engagement_of(tweet_id) for tweet_id in tree.successors(0)), reverse=True)
+        assert time == sorted(tree.successors(0))
+        with pytest.raises(ValueError, match="acceptability, engagement, time"):
+            view.get_view(sort_by="likes")
+
+    def test_get_children(self, tweet_tree):
+        """
+        Tests that paging through the children of a tweet with the cursors lists each child once, in order
+        """
+        tree = tweet_tree.get_tree()
+        view = TweetTreeView(tweet_tree)
+
+        children = []
+        page = view.get_children(0, limit=2)
+        while True:
+            assert page["child_count"] == tree.out_degree(0)
+            assert len(page["children"]) <= 2
+            children.extend(child["name"] for child in page["children"])
+            if page["next_cursor"] is None:
+                break
+            page = view.get_children(0, page["next_cursor"], limit=2)
+
+        assert children == sorted(tree.successors(0), reverse=True)
+
+    def test_get_children_depth(self, tweet_tree):
+        """
+        Tests that the depth of the children lists the replies below each child of the page
+        """
+        view = TweetTreeView(tweet_tree)
+
+        page = view.get_children(0, depth=200, limit=200)
+
+        assert sum(count_tweets(child) for child in page["children"]) == len(tweet_tree.get_tree()) - 1
+
+    def test_get_children_invalid(self, tweet_tree):
+        """
+        Tests that tweets which are not in the tree, invalid cursors and cursors of another order are rejected
+        """
+        view = TweetTreeView(tweet_tree)
+
+        with pytest.raises(KeyError):
+            view.get_children(1000)
+        with pytest.raises(ValueError):
+            view.get_children(0, "not a cursor")
+        with pytest.raises(ValueError):
+            view.get_children(0, encode_cursor("time", 2))
+        assert decode_cursor(encode_cursor("time", 2), "time") == 2
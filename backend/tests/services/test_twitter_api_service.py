@@ -1,6 +1,6 @@
 from twarc.client2 import Twarc2
 
-from backend.services.twitter_api_service import TwitterAPIService
+from backend.services.twitter_api_service import TwitterAPIService, TwitterResponseParser
 
 
 class TestTwitterAPIService:
@@ -31,14 +31,13 @@ class TestTwitterAPIService:
         api = TwitterAPIService("fake_token")
         api_result = api.get_tweet("0")
 
-        # The expected result is a parsed tweet containing only the needed attributes
+        # The expected result is a parsed tweet containing only the needed attributes, its sentiment is not scored yet
         expected_result = {"id": "0",
                            "text": "Hello world, its a great day today!",
                            "retweet_count": 1,
                            "reply_count": 2,
                            "like_count": 3,
-                           "quote_count": 4,
-                           "sentiment": "positive"
+                           "quote_count": 4
                            }
 
         assert api_result == expected_result
@@ -86,8 +85,7 @@ class TestTwitterAPIService:
                                          "reply_count": 2,
                                          "like_count": 3,
                                          "quote_count": 4,
-                                         "referenced_tweets": [],
-                                         "sentiment": "positive"
+                                         "referenced_tweets": []
                                          },
                                         {"id": "1",
                                          "text": "I know right! The weather is beautiful",
@@ -95,8 +93,7 @@ class TestTwitterAPIService:
                                          "reply_count": 0,
                                          "like_count": 1,
                                          "quote_count": 0,
-                                         "referenced_tweets": [{"id": 0}],
-                                         "sentiment": "positive"
+                                         "referenced_tweets": [{"id": 0}]
                                          },
                                         ]
 
@@ -155,8 +152,27 @@ class TestTwitterAPIService:
                                    "retweet_count": 1,
                                    "reply_count": 0,
                                    "like_count": 1,
-                                   "quote_count": 0,
-                                   "sentiment": "positive"},
+                                   "quote_count": 0},
                                   ]
 
         assert parsed_tweets == expected_parsed_tweets
+
+    def test_set_tweets_sentiment(self, mocker):
+        """
+        Tests that set_tweets_sentiment scores the sentiment of the tweets which have none in one batch, and keeps the
+        sentiment of the others.
+        """
+        predict_sentiments = mocker.patch.object(TwitterResponseParser.sentiment_analysis_service,
+                                                 "predict_sentiments",
+                                                 side_effect=lambda texts: ["negative"] * len(texts))
+        tweets = [{"id": "0", "text": "Pizza is great", "sentiment": "positive"},
+                  {"id": "1", "text": "Pizza is overrated"},
+                  {"id": "2", "text": "Pineapple does not belong on a pizza"}]
+
+        assert TwitterResponseParser.set_tweets_sentiment(tweets) is tweets
+        assert [tweet["sentiment"] for tweet in tweets] == ["positive", "negative", "negative"]
+        predict_sentiments.assert_called_once_with(["Pizza is overrated", "Pineapple does not belong on a pizza"])
+
+        TwitterResponseParser.set_tweets_sentiment(tweets)
+
+        assert predict_sentiments.call_count == 1
@@ -0,0 +1,133 @@
+import random
+from networkx import DiGraph
+from backend.services.argumentation_service import ArgumentationAlgorithmService
+from backend.services.vectorized_argumentation_service import VectorizedArgumentationService, SUPPORT, ATTACK, \
+    NON_ARGUMENT
+from backend.services.tweet_tree_builder_service import TweetTreeMetrics
+
+
+def create_tweet_tree(number_of_nodes, seed=0):
+    """
+    Creates a random tweet tree with arguments of every type, and repeated public metrics so several arguments share
+    the same degree
+    """
+    generator = random.Random(seed)
+    graph = DiGraph()
+    graph.add_node(0, attributes={"id": 0, "like_count": 3, "retweet_count": 0, "argumentative_type": "none"})
+    for tweet_id in range(1, number_of_nodes):
+        graph.add_node(tweet_id, attributes={"id": tweet_id, "like_count": generator.randint(0, 3),
+                                             "retweet_count": generator.randint(0, 1),
+                                             "argumentative_type": generator.choice(["support", "support", "attack",
+                                                                                     "attack", "neutral"])})
+        graph.add_edge(generator.randrange(tweet_id), tweet_id)
+
+    return graph
+
+
+class TestVectorizedArgumentationService:
+    """
+    Test class that tests the VectorizedArgumentationService, which must produce the same EBS degrees as the
+    ArgumentationAlgorithmService.
+    """
+
+    def test_to_arrays(self):
+        """
+        Tests that the tweet tree is numbered level by level, without the replies of the non-argumentative tweets
+        """
+        graph = DiGraph()
+        graph.add_node(0, attributes={"id": 0, "like_count": 0, "retweet_count": 0, "argumentative_type": "none"})
+        graph.add_node(1, attributes={"id": 1, "like_count": 1, "retweet_count": 0, "argumentative_type": "neutral"})
+        graph.add_node(2, attributes={"id": 2, "like_count": 2, "retweet_count": 0, "argumentative_type": "attack"})
+        graph.add_node(3, attributes={"id": 3, "like_count": 1, "retweet_count": 1, "argumentative_type": "support"})
+        graph.add_node(4, attributes={"id": 4, "like_count": 2, "retweet_count": 0, "argumentative_type": "support"})
+        graph.add_edge(2, 3)
+        graph.add_edge(0, 2)
+        graph.add_edge(0, 1)
+        graph.add_edge(1, 4)
+
+        arrays = VectorizedArgumentationService(2, 0, graph, TweetTreeMetrics()).to_arrays(graph.nodes[0])
+
+        assert [arrays.tweet_ids[index] for index in arrays.indexes] == [0, 2, 1, 3]
+        assert arrays.parents.tolist() == [-1, 0, 0, 1]
+        assert arrays.level_offsets.tolist() == [0, 1, 3, 4]
+        assert arrays.get_depths().tolist() == [0, 1, 1, 2]
+        assert arrays.signs.tolist() == [ATTACK, ATTACK, NON_ARGUMENT, SUPPORT]
+        assert [round(base_strength, 3) for base_strength in arrays.base_strengths] == [0.5, 1.0, 0.5, 1.0]
+
+    def test_acceptability_degrees(self):
+        """
+        Tests that the degrees, acceptability attributes and strongest argument are the same as the
+        ArgumentationAlgorithmService on random trees, including ties for the strongest argument
+        """
+        for seed in range(5):
+            graph = create_tweet_tree(500, seed)
+            metrics = TweetTreeMetrics()
+            expected_degrees = ArgumentationAlgorithmService(4, 0, graph, metrics).acceptability_degrees(graph.nodes[0])
+            expected_attributes = {tweet_id: graph.nodes[tweet_id]["attributes"].pop("acceptability", None)
+                                   for tweet_id in graph.nodes}
+
+            vectorized_metrics = TweetTreeMetrics()
+            argumentation_model = VectorizedArgumentationService(4, 0, graph, vectorized_metrics)
+            degrees = argumentation_model.acceptability_degrees(graph.nodes[0])
+
+            assert degrees.keys() == expected_degrees.keys()
+            for tweet_id, expected_degree in expected_degrees.items():
+                assert abs(degrees[tweet_id] - expected_degree) < 1e-12
+
+            for tweet_id, expected_degree in expected_attributes.items():
+                degree = graph.nodes[tweet_id]["attributes"].get("acceptability")
+                assert (degree is None) == (expected_degree is None)
+
+            assert vectorized_metrics.strongest_argument_id == metrics.strongest_argument_id
+
+    def test_strongest_argument_tie(self):
+        """
+        Tests that the strongest argument among arguments of the same degree is the first one evaluated by the
+        ArgumentationAlgorithmService, replies before the tweets they reply to, rather than the shallowest one
+        """
+        graph = DiGraph()
+        graph.add_node(0, attributes={"id": 0, "like_count": 0, "retweet_count": 0, "argumentative_type": "none"})
+        graph.add_node(1, attributes={"id": 1, "like_count": 0, "retweet_count": 0, "argumentative_type": "support"})
+        graph.add_node(2, attributes={"id": 2, "like_count": 5, "retweet_count": 0, "argumentative_type": "attack"})
+        graph.add_node(3, attributes={"id": 3, "like_count": 5, "retweet_count": 0, "argumentative_type": "support"})
+        graph.add_edge(0, 1)
+        graph.add_edge(0, 2)
+        graph.add_edge(1, 3)
+
+        metrics = TweetTreeMetrics()
+        degrees = VectorizedArgumentationService(5, 0, graph, metrics).acceptability_degrees(graph.nodes[0])
+
+        # Tweets 2 and 3 are leaves with the same base strength, tweet 3 is evaluated first
+        assert degrees[2] == degrees[3]
+        assert metrics.strongest_argument_id == 3
+
+    def test_acceptability_degree(self):
+        """
+        Tests the acceptability degree of the root of the tree and of a non-argumentative root
+        """
+        graph = create_tweet_tree(10)
+        argumentation_model = VectorizedArgumentationService(4, 0, graph, TweetTreeMetrics())
+        expected_degree = ArgumentationAlgorithmService(4, 0, graph, TweetTreeMetrics()).acceptability_degree(
+            graph.nodes[0])
+
+        assert abs(argumentation_model.acceptability_degree(graph.nodes[0]) - expected_degree) < 1e-12
+        assert argumentation_model.acceptability_degree({"attributes": {"argumentative_type": "neutral"}}) == 0.0
+        assert argumentation_model.acceptability_degree(None) == 0.0
+
+    def test_acceptability_degree_deep_thread(self):
+        """
+        Tests a very deep reply chain, which takes one level per tweet
+        """
+        depth = 20000
+        graph = DiGraph()
+        graph.add_node(0, attributes={"id": 0, "like_count": 0, "retweet_count": 0, "argumentative_type": "none"})
+        for tweet_id in range(1, depth + 1):
+            graph.add_node(tweet_id, attributes={"id": tweet_id, "like_count": tweet_id % 10, "retweet_count": 0,
+                                                 "argumentative_type": "support" if tweet_id % 2 else "attack"})
+            graph.add_edge(tweet_id - 1, tweet_id)
+
+        expected_degree = ArgumentationAlgorithmService(9, 0, graph, TweetTreeMetrics()).acceptability_degree(
+            graph.nodes[0])
+        degree = VectorizedArgumentationService(9, 0, graph, TweetTreeMetrics()).acceptability_degree(graph.nodes[0])
+
+        assert abs(degree - expected_degree) < 1e-12
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+from transformers import AutoModelForSequenceClassification, BertConfig, BertForSequenceClassification
+
+from backend.services.utils.inference_backend import PYTORCH, PYTORCH_INT8, ONNX, load_inference_backend
+
+
+class TestInferenceBackend:
+    """
+    Test class that tests the pluggable inference backends the transformer models run on.
+    """
+
+    # Batch of two dynamically padded inputs, as returned by a tokenizer with return_tensors="np"
+    tokens = {"input_ids": np.array([[1, 5, 7, 2], [1, 9, 2, 0]]),
+              "attention_mask": np.array([[1, 1, 1, 1], [1, 1, 1, 0]])}
+
+    def _save_model(self, path):
+        """
+        Saves a tiny randomly initialised classifier, so the tests need no download
+        """
+        config = BertConfig(vocab_size=32, hidden_size=8, num_hidden_layers=1, num_attention_heads=2,
+                            intermediate_size=16, max_position_embeddings=16, num_labels=3)
+        BertForSequenceClassification(config).save_pretrained(path)
+
+    def test_pytorch_backend(self, tmp_path):
+        """
+        Tests that the default fp32 PyTorch backend returns the logits of every input as numpy arrays.
+        """
+        self._save_model(tmp_path)
+        backend = load_inference_backend(AutoModelForSequenceClassification, "unused", tmp_path, backend=PYTORCH)
+
+        logits = backend(TestInferenceBackend.tokens)["logits"]
+
+        assert logits.shape == (2, 3)
+        assert len(backend.config.id2label) == 3
+
+    @pytest.mark.parametrize("candidate", [PYTORCH_INT8, ONNX])
+    def test_backend_parity(self, tmp_path, candidate):
+        """
+        Tests that the quantized and ONNX backends produce (nearly) the same logits as the fp32 PyTorch backend.
+        """
+        if candidate == ONNX:
+            pytest.importorskip("onnxruntime")
+
+        self._save_model(tmp_path)
+        reference = load_inference_backend(AutoModelForSequenceClassification, "unused", tmp_path, backend=PYTORCH)
+        backend = load_inference_backend(AutoModelForSequenceClassification, "unused", tmp_path, backend=candidate)
+
+        expected_logits = reference(TestInferenceBackend.tokens)["logits"]
+        logits = backend(TestInferenceBackend.tokens)["logits"]
+
+        assert np.allclose(logits, expected_logits, atol=1e-2)
+
+    def test_unknown_backend(self, tmp_path):
+        """
+        Tests that selecting a backend that does not exist raises an error instead of silently using another one.
+        """
+        with pytest.raises(ValueError):
+            load_inference_backend(AutoModelForSequenceClassification, "unused", tmp_path, backend="tensorrt")
@@ -0,0 +1,74 @@
+from backend.services.utils.inference_cache import InferenceCache
+
+
+class TestInferenceCache:
+    """
+    Test class that tests the InferenceCache which caches model predictions keyed by a hash of their inputs.
+    """
+
+    def test_memory_cache(self, mocker):
+        """
+        Tests that only the inputs that have not been predicted before are computed, and that the counters reflect it.
+        """
+        cache = InferenceCache("model@pytorch")
+        compute = mocker.Mock(side_effect=lambda texts: [text.upper() for text in texts])
+
+        assert cache.get_or_compute(["a", "b"], compute) == ["A", "B"]
+        # Only "c" is new, and texts that only differ in whitespace share an entry
+        assert cache.get_or_compute([" a ", "c", "b"], compute) == ["A", "C", "B"]
+
+        compute.assert_called_with(["c"])
+        stats = cache.get_stats()
+        assert stats["memory_hits"] == 2
+        assert stats["misses"] == 3
+
+    def test_duplicate_inputs(self, mocker):
+        """
+        Tests that duplicate inputs in the same batch are only computed once, but counted as every input.
+        """
+        cache = InferenceCache("model@pytorch")
+        compute = mocker.Mock(side_effect=lambda pairs: ["support" for _ in pairs])
+
+        predictions = cache.get_or_compute([("parent", "child"), ("parent", "child")], compute)
+        cache.get_or_compute([("parent", "child"), ("parent", "child"), ("parent", "child")], compute)
+
+        assert predictions == ["support", "support"]
+        compute.assert_called_once_with([("parent", "child")])
+        stats = cache.get_stats()
+        assert (stats["misses"], stats["computed"], stats["memory_hits"]) == (2, 1, 3)
+        assert stats["hit_rate"] == 3 / 5
+
+    def test_model_id_in_key(self):
+        """
+        Tests that the same input predicted by different models or backends does not share an entry.
+        """
+        assert InferenceCache("model@pytorch").get_key("a") != InferenceCache("model@onnx").get_key("a")
+
+    def test_lru_eviction(self, mocker):
+        """
+        Tests that the in-memory tier is bounded and evicts the least recently used entry.
+        """
+        cache = InferenceCache("model@pytorch", max_size=2)
+        compute = mocker.Mock(side_effect=lambda texts: [text.upper() for text in texts])
+
+        cache.get_or_compute(["a", "b"], compute)
+        cache.get_or_compute(["a"], compute)  # "a" is now more recently used than "b"
+        cache.get_or_compute(["c"], compute)  # Evicts "b"
+        cache.get_or_compute(["a", "b"], compute)
+
+        compute.assert_called_with(["b"])
+
+    def test_disk_cache(self, mocker, tmp_path):
+        """
+        Tests that the on-disk tier survives a restart, i.e. a new cache instance using the same file.
+        """
+        path = str(tmp_path / "inference_cache.sqlite")
+        compute = mocker.Mock(side_effect=lambda texts: [text.upper() for text in texts])
+
+        InferenceCache("model@pytorch", path=path).get_or_compute(["a"], compute)
+        restarted_cache = InferenceCache("model@pytorch", path=path)
+
+        assert restarted_cache.get_or_compute(["a"], compute) == ["A"]
+        compute.assert_called_once_with(["a"])
+        assert restarted_cache.get_stats()["disk_hits"] == 1
+        assert restarted_cache.connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
@@ -0,0 +1,129 @@
+import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.utils.job_queue import JobQueue, QUEUED, RUNNING, DONE, FAILED
+
+
+class TestJobQueue:
+    """
+    Test class that tests the JobQueue, which runs long calls on a pool of workers and de-duplicates the concurrent
+    jobs with the same key.
+    """
+
+    def test_submit(self):
+        """
+        Tests that a submitted job runs in the background and reports its result once it is done.
+        """
+        jobs = JobQueue(lambda tweet_id: {"tweet_id": tweet_id}, executor=ThreadPoolExecutor(1))
+
+        job_id = jobs.submit(1, 1)["job_id"]
+        jobs.jobs[job_id].future.result()
+
+        status = jobs.get_status(job_id)
+        assert status["status"] == DONE
+        assert status["result"] == {"tweet_id": 1}
+        assert jobs.get_status("unknown") is None
+        jobs.shutdown()
+
+    def test_deduplicate(self):
+        """
+        Tests that a job submitted while another job with the same key is queued or running gets that job, and that
+        a new job is started once it is done.
+        """
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def analyze(tweet_id):
+            calls.append(tweet_id)
+            started.set()
+            release.wait()
+            return tweet_id
+
+        jobs = JobQueue(analyze, executor=ThreadPoolExecutor(1))
+        first_job = jobs.submit(1, 1)
+        started.wait()
+        other_job = jobs.submit(2, 2)
+
+        assert jobs.submit(1, 1)["job_id"] == first_job["job_id"]
+        assert jobs.get_status(first_job["job_id"])["status"] == RUNNING
+        assert jobs.get_status(other_job["job_id"])["status"] == QUEUED
+
+        release.set()
+        jobs.jobs[other_job["job_id"]].future.result()
+        last_job = jobs.submit(1, 1)
+        assert last_job["job_id"] != first_job["job_id"]
+        jobs.jobs[last_job["job_id"]].future.result()
+        jobs.shutdown()
+
+        assert calls == [1, 2, 1]
+        assert jobs.get_stats()["submitted"] == 3
+        assert jobs.get_stats()["deduplicated"] == 1
+
+    def test_failed_job(self):
+        """
+        Tests that a job raising an error is reported as failed with the name of the error.
+        """
+        def analyze(tweet_id):
+            raise ValueError(tweet_id)
+
+        jobs = JobQueue(analyze, executor=ThreadPoolExecutor(1))
+        job_id = jobs.submit(1, 1)["job_id"]
+        jobs.jobs[job_id].future.exception()
+
+        status = jobs.get_status(job_id)
+        assert status["status"] == FAILED
+        assert status["error"] == "ValueError"
+        assert "result" not in status
+        jobs.shutdown()
+
+    def test_shutdown_with_queued_jobs(self):
+        """
+        Tests that shutting down waits for the running job and cancels the queued ones.
+        """
+        started = threading.Event()
+        release = threading.Event()
+
+        def analyze(tweet_id):
+            started.set()
+            release.wait()
+            return tweet_id
+
+        jobs = JobQueue(analyze, executor=ThreadPoolExecutor(1))
+        running_job = jobs.submit(1, 1)
+        started.wait()
+        queued_job = jobs.submit(2, 2)
+
+        # Let the running job finish once shutdown is waiting for it
+        threading.Timer(0.1, release.set).start()
+        jobs.shutdown()
+
+        assert jobs.get_status(running_job["job_id"])["status"] == DONE
+        assert jobs.get_status(queued_job["job_id"])["status"] == FAILED
+        assert jobs.get_status(queued_job["job_id"])["error"] == "Cancelled"
+        assert jobs.submit(2, 2)["job_id"] != queued_job["job_id"]
+
+    def test_forget_finished_jobs(self):
+        """
+        Tests that only the newest jobs are kept once there are more than max_jobs.
+        """
+        jobs = JobQueue(lambda tweet_id: tweet_id, max_jobs=2, executor=ThreadPoolExecutor(1))
+        job_ids = []
+        for tweet_id in range(4):
+            job_ids.append(jobs.submit(tweet_id, tweet_id)["job_id"])
+            jobs.jobs[job_ids[-1]].future.result()
+        jobs.shutdown()
+
+        assert [jobs.get_status(job_id) is not None for job_id in job_ids] == [False, False, True, True]
+
+    def test_worker_processes(self):
+        """
+        Tests that the jobs run on worker processes started with the initializer by default.
+        """
+        jobs = JobQueue(pow, max_workers=1, initializer=gc.collect)
+        job_id = jobs.submit("2 ** 10", 2, 10)["job_id"]
+        jobs.jobs[job_id].future.result(timeout=120)
+
+        assert jobs.get_status(job_id)["result"] == 1024
+        jobs.shutdown()
@@ -0,0 +1,77 @@
+from backend.services.utils.model_registry import ModelRegistry, register_bertweet_tokenizer
+
+
+class TestModelRegistry:
+    """
+    Test class that tests the ModelRegistry which lazily loads and shares the models used by the services.
+    """
+
+    def test_lazy_loading(self, mocker):
+        """
+        Tests that registering a model does not load it, and that it is only loaded once on first use.
+        """
+        registry = ModelRegistry()
+        loader = mocker.Mock(return_value="model")
+
+        registry.register("model", loader)
+
+        # Registering must not load the model
+        loader.assert_not_called()
+        assert registry.is_loaded("model") is False
+
+        # The same instance is shared by every caller and the loader only runs once
+        assert registry.get("model") == "model"
+        assert registry.get("model") == "model"
+        loader.assert_called_once()
+        assert registry.is_loaded("model") is True
+
+    def test_warm_up(self, mocker):
+        """
+        Tests that warming up loads every registered model and records how long each one took to load.
+        """
+        registry = ModelRegistry()
+        first_loader = mocker.Mock(return_value="first model")
+        second_loader = mocker.Mock(return_value="second model")
+
+        registry.register("first", first_loader)
+        registry.register("second", second_loader)
+        registry.warm_up()
+
+        first_loader.assert_called_once()
+        second_loader.assert_called_once()
+        assert set(registry.get_load_times()) == {"first", "second"}
+
+    def test_warm_up_subset(self, mocker):
+        """
+        Tests that warming up a subset of the models leaves the other models unloaded.
+        """
+        registry = ModelRegistry()
+        first_loader = mocker.Mock(return_value="first model")
+        second_loader = mocker.Mock(return_value="second model")
+
+        registry.register("first", first_loader)
+        registry.register("second", second_loader)
+        registry.warm_up(["first"])
+
+        assert registry.is_loaded("first") is True
+        assert registry.is_loaded("second") is False
+        second_loader.assert_not_called()
+
+    def test_shared_bertweet_tokenizer(self, mocker, monkeypatch):
+        """
+        Tests that BERTweet based services share a single tokenizer instance when SHARE_BERTWEET_TOKENIZER is true.
+        """
+        registry = ModelRegistry()
+        mocker.patch("backend.services.utils.model_registry.model_registry", registry)
+        mocker.patch("backend.services.utils.model_registry.load_tokenizer", return_value=mocker.Mock())
+        monkeypatch.setenv("SHARE_BERTWEET_TOKENIZER", "true")
+
+        first_loader = mocker.Mock()
+        second_loader = mocker.Mock()
+        register_bertweet_tokenizer("first", first_loader)
+        register_bertweet_tokenizer("second", second_loader)
+
+        # Both names resolve to the same shared instance and the services' own loaders are never used
+        assert registry.get("first") is registry.get("second")
+        first_loader.assert_not_called()
+        second_loader.assert_not_called()
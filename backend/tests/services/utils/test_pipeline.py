@@ -0,0 +1,88 @@
+import threading
+import pytest
+
+from backend.services.utils.pipeline import PipelineStage, PipelineStats
+
+
+class TestPipelineStage:
+    """
+    Test class that tests the PipelineStage, a stage of a producer/consumer pipeline processing batches of items on
+    its own worker thread.
+    """
+
+    def test_batches_and_forwarding(self):
+        """
+        Tests that the items waiting in the queue are processed together, and passed on to the next stage in order
+        """
+        stats = PipelineStats()
+        started = threading.Event()
+        release = threading.Event()
+        first_batches = []
+        second_items = []
+
+        def first_function(batch):
+            started.set()
+            release.wait(5)
+            first_batches.append(list(batch))
+
+        second_stage = PipelineStage("second", second_items.extend, stats=stats).start()
+        first_stage = PipelineStage("first", first_function, next_stage=second_stage, queue_size=10,
+                                    max_batch_size=4, stats=stats).start()
+
+        first_stage.put(0)
+        # The first batch waits for the release, while the next items queue up behind it
+        started.wait(5)
+        for item in range(1, 7):
+            first_stage.put(item)
+
+        assert stats.get_stats()["first"]["queue_depth"] == 6
+
+        release.set()
+        first_stage.close()
+        first_stage.join()
+
+        assert first_batches == [[0], [1, 2, 3, 4], [5, 6]]
+        assert second_items == list(range(7))
+
+    def test_stats(self):
+        """
+        Tests that the items, batches and queue depths of the stages are recorded by stage name
+        """
+        stats = PipelineStats()
+        stage = PipelineStage("pages", lambda pages: None, item_size=len, stats=stats).start()
+        for page in [[1, 2], [3], [4, 5, 6]]:
+            stage.put(page)
+        stage.close()
+        stage.join()
+
+        stage_stats = stats.get_stats()["pages"]
+
+        assert stage_stats["items"] == 6
+        assert 1 <= stage_stats["batches"] <= 3
+        assert stage_stats["queue_depth"] == 0
+        assert stage_stats["max_queue_depth"] >= 1
+        assert stage_stats["items_per_second"] > 0
+
+    def test_error(self):
+        """
+        Tests that the error of a stage is raised by join, and that its producers and the next stages do not wait
+        forever for it
+        """
+        stats = PipelineStats()
+        second_items = []
+
+        def fail(batch):
+            raise ValueError("Model failed")
+
+        second_stage = PipelineStage("second", second_items.extend, stats=stats).start()
+        first_stage = PipelineStage("first", fail, next_stage=second_stage, queue_size=1, max_batch_size=1,
+                                    stats=stats).start()
+        for item in range(10):
+            first_stage.put(item)
+        first_stage.close()
+
+        with pytest.raises(ValueError, match="Model failed"):
+            first_stage.join()
+
+        assert second_items == []
+        assert not second_stage.thread.is_alive()
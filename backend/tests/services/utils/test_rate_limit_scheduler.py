@@ -0,0 +1,140 @@
+import pytest
+
+from backend.services.utils.twitter_client import Twarc2Client
+from backend.services.utils.twitter_fixtures import TwitterFixtures
+from backend.services.utils.rate_limit_scheduler import RateLimitScheduler, RateLimitExceeded, ROOT_PRIORITY, \
+    RELATED_PRIORITY
+from backend.benchmarks.twitter_replay_server import ReplayServer
+
+ENDPOINT = "/2/tweets/search/recent"
+
+
+class FakeClock:
+    """
+    Clock whose sleep advances the time instantly, optionally running a function the first time it sleeps
+    """
+
+    def __init__(self, on_sleep=None):
+        self.now = 1000.0
+        self.on_sleep = on_sleep
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        if self.on_sleep is not None:
+            on_sleep, self.on_sleep = self.on_sleep, None
+            on_sleep()
+
+
+class TestRateLimitScheduler:
+    """
+    Test class to test the RateLimitScheduler, which schedules the Twitter API requests within the rate limit quota.
+    """
+
+    def test_wait_for_reset(self):
+        """
+        Tests that requests are sent while there is quota left, then wait until the window resets.
+        """
+        clock = FakeClock()
+        scheduler = RateLimitScheduler(clock=clock.time, sleep=clock.sleep)
+        scheduler.update(ENDPOINT, {"x-rate-limit-remaining": "1", "x-rate-limit-reset": "1060"})
+
+        assert scheduler.acquire(ENDPOINT) == 0.0
+        assert scheduler.acquire(ENDPOINT) == 60.0
+
+        stats = scheduler.get_stats()["priorities"]["root"]
+        assert stats["requests"] == 2
+        assert stats["max_wait_seconds"] == 60.0
+
+    def test_root_reserve_and_shedding(self):
+        """
+        Tests that related requests leave the reserved quota to the root requests, and are shed rather than waiting
+        longer than their maximum wait.
+        """
+        clock = FakeClock()
+        scheduler = RateLimitScheduler(root_reserve=1, max_wait={RELATED_PRIORITY: 30.0}, clock=clock.time,
+                                       sleep=clock.sleep)
+        scheduler.update(ENDPOINT, {"x-rate-limit-remaining": "2", "x-rate-limit-reset": "1060"})
+
+        assert scheduler.acquire(ENDPOINT, RELATED_PRIORITY) == 0.0
+        with pytest.raises(RateLimitExceeded):
+            scheduler.acquire(ENDPOINT, RELATED_PRIORITY)
+        assert scheduler.acquire(ENDPOINT, ROOT_PRIORITY) == 0.0
+
+        assert scheduler.get_stats()["priorities"]["related"]["shed"] == 1
+
+    def test_related_requests_yield_to_waiting_root_requests(self):
+        """
+        Tests that a related request does not take quota that becomes available while a root request is waiting.
+        """
+        related_results = []
+
+        def request_related():
+            # The quota is refilled while the root request waits, and a related request arrives
+            scheduler.update(ENDPOINT, {"x-rate-limit-remaining": "1", "x-rate-limit-reset": "2000"})
+            try:
+                related_results.append(scheduler.acquire(ENDPOINT, RELATED_PRIORITY))
+            except RateLimitExceeded:
+                related_results.append("shed")
+
+        clock = FakeClock(on_sleep=request_related)
+        scheduler = RateLimitScheduler(max_wait={RELATED_PRIORITY: 30.0}, clock=clock.time, sleep=clock.sleep)
+        scheduler.update(ENDPOINT, {"x-rate-limit-remaining": "0", "x-rate-limit-reset": "1060"})
+
+        scheduler.acquire(ENDPOINT, ROOT_PRIORITY)
+
+        assert related_results == ["shed"]
+        assert scheduler.get_stats()["quotas"][ENDPOINT]["remaining"] == 0
+
+    def test_twitter_client_stays_within_quota(self):
+        """
+        Tests that the Twitter client waits for the quota reported by the replay server instead of being rate limited.
+        """
+        with ReplayServer(TwitterFixtures(), rate_limit=2, rate_limit_window=1) as server:
+            client = Twarc2Client("fake_token", base_url=server.base_url, scheduler=RateLimitScheduler())
+            for _ in range(3):
+                list(client.search_recent("pizza"))
+            request_counts = server.get_request_counts()
+
+        assert request_counts["search"] == 3
+        assert request_counts["rate_limited"] == 0
+        assert client.rate_limit_wait_seconds > 0.0
+
+    def test_twitter_client_rate_limited_by_another_client(self):
+        """
+        Tests that a 429 response caused by another client of the same quota goes through the scheduler, the root
+        request waits for the quota to reset and the related request is shed instead of sleeping in twarc
+        """
+        with ReplayServer(TwitterFixtures(), rate_limit=1, rate_limit_window=1) as server:
+            other_client = Twarc2Client("fake_token", base_url=server.base_url, scheduler=RateLimitScheduler())
+            scheduler = RateLimitScheduler(max_wait={RELATED_PRIORITY: 0.0})
+            client = Twarc2Client("fake_token", base_url=server.base_url, scheduler=scheduler)
+
+            list(other_client.search_recent("pizza"))
+            with pytest.raises(RateLimitExceeded):
+                list(client.search_recent("pizza", priority=RELATED_PRIORITY))
+            list(client.search_recent("pizza"))
+            request_counts = server.get_request_counts()
+
+        assert request_counts["rate_limited"] == 1
+        assert scheduler.get_stats()["priorities"]["related"]["shed"] == 1
+        assert client.rate_limit_wait_seconds > 0.0
+
+    def test_twitter_client_priority_per_call(self, mocker):
+        """
+        Tests that the requests of interleaved searches are each made with the priority of their own call
+        """
+        with ReplayServer(TwitterFixtures()) as server:
+            scheduler = RateLimitScheduler()
+            acquire = mocker.spy(scheduler, "acquire")
+            client = Twarc2Client("fake_token", base_url=server.base_url, scheduler=scheduler)
+
+            root_pages = client.search_recent("pizza")
+            related_pages = client.search_recent("pasta", priority=RELATED_PRIORITY)
+            next(related_pages, None)
+            next(root_pages, None)
+            next(related_pages, None)
+
+        assert [call.args[1] for call in acquire.call_args_list] == [RELATED_PRIORITY, ROOT_PRIORITY]
@@ -0,0 +1,83 @@
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.services.utils.single_flight import SingleFlight
+
+
+class FakeClock:
+    """
+    Clock that only moves when the test advances it
+    """
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+
+class TestSingleFlight:
+    """
+    Test class that tests the SingleFlight, which shares a computation between the concurrent calls for the same key
+    and keeps its result for a while.
+    """
+
+    def test_coalesce_concurrent_calls(self):
+        """
+        Tests that the calls arriving while the first call for a key runs wait for it and share its result
+        """
+        single_flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute(key):
+            calls.append(key)
+            started.set()
+            release.wait(5)
+            return {"key": key}
+
+        with ThreadPoolExecutor(4) as executor:
+            first = executor.submit(single_flight.do, "tweet", compute, "tweet")
+            started.wait(5)
+            others = [executor.submit(single_flight.do, "tweet", compute, "tweet") for _ in range(3)]
+            other = executor.submit(single_flight.do, "other", lambda: "other")
+            assert other.result(5) == "other"
+            release.set()
+            results = [future.result(5) for future in [first] + others]
+
+        assert calls == ["tweet"]
+        assert all(result is results[0] for result in results)
+        assert single_flight.get_stats() == {"executed": 2, "coalesced": 3, "cache_hits": 0, "in_flight": 0,
+                                             "cached_results": 0}
+
+    def test_result_ttl(self):
+        """
+        Tests that a result is reused until it expires, and that the oldest results are forgotten beyond the maximum
+        """
+        clock = FakeClock()
+        single_flight = SingleFlight(ttl_seconds=10.0, max_results=2, clock=clock.time)
+
+        assert single_flight.do("tweet", list) == []
+        clock.now = 5.0
+        assert single_flight.do("tweet", lambda: ["recomputed"]) == []
+        clock.now = 10.0
+        assert single_flight.do("tweet", lambda: ["recomputed"]) == ["recomputed"]
+        single_flight.do("second", list)
+        single_flight.do("third", list)
+
+        stats = single_flight.get_stats()
+        assert (stats["executed"], stats["cache_hits"], stats["cached_results"]) == (4, 1, 2)
+
+    def test_failed_call(self):
+        """
+        Tests that the error of a call is raised to every coalesced call and that it is not kept
+        """
+        single_flight = SingleFlight(ttl_seconds=10.0)
+
+        with pytest.raises(ZeroDivisionError):
+            single_flight.do("tweet", lambda: 1 / 0)
+
+        assert single_flight.do("tweet", lambda: 1) == 1
+        assert single_flight.get_stats()["cached_results"] == 1
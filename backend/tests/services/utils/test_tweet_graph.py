@@ -0,0 +1,166 @@
+import json
+import copy
+import pickle
+import pytest
+
+from backend.services.utils.tweet_graph import TweetGraph, TweetRecord
+from backend.services.utils.json_encoder import encode_json
+from backend.services.tweet_tree_builder_service import TweetTree, TweetTreeMetrics
+from backend.services.argumentation_service import ArgumentationAlgorithmService
+from backend.services.vectorized_argumentation_service import VectorizedArgumentationService
+from backend.benchmarks.argumentation_benchmark import generate_tweet_tree
+
+
+def to_tweet_graph(tree):
+    """
+    Copies a networkx tweet tree to a TweetGraph, with the attributes of every tweet as a TweetRecord
+    """
+    tweet_graph = TweetGraph()
+    for tweet_id, attributes in tree.nodes(data="attributes"):
+        tweet_graph.add_node(tweet_id, TweetRecord(attributes))
+    for parent_id, tweet_id, data in tree.edges(data=True):
+        tweet_graph.add_edge(parent_id, tweet_id, **data)
+
+    return tweet_graph
+
+
+class TestTweetRecord:
+    """
+    Test class that tests the TweetRecord, the attributes of a tweet stored in slots with the interface of a dict.
+    """
+
+    def test_mapping(self):
+        """
+        Tests that a record behaves like the dict of its attributes, and that missing attributes are missing
+        """
+        attributes = {"id": "1", "text": "Pizza is great", "like_count": 3, "sentiment": "positive"}
+        record = TweetRecord(attributes)
+
+        assert record == attributes
+        assert dict(record) == attributes
+        assert record["like_count"] == 3
+        assert record.get("acceptability") is None
+        assert "acceptability" not in record
+        with pytest.raises(KeyError):
+            record["acceptability"]
+
+        record["acceptability"] = 0.5
+        del record["text"]
+
+        assert record == {"id": "1", "like_count": 3, "sentiment": "positive", "acceptability": 0.5}
+        assert len(record) == 4
+
+    def test_unknown_attribute(self):
+        """
+        Tests that only the attributes of a tweet can be set
+        """
+        with pytest.raises(KeyError, match="like_count"):
+            TweetRecord(likes=3)
+
+    def test_interned_attributes(self):
+        """
+        Tests that the sentiments and argumentative types of the records refer to the same strings
+        """
+        first_record = TweetRecord(sentiment="".join(["posi", "tive"]), argumentative_type="".join(["att", "ack"]))
+        second_record = TweetRecord(sentiment="".join(["pos", "itive"]), argumentative_type="".join(["at", "tack"]))
+
+        assert first_record["sentiment"] is second_record["sentiment"]
+        assert first_record["argumentative_type"] is second_record["argumentative_type"]
+
+    def test_copy_and_encode(self):
+        """
+        Tests that records can be pickled, copied and encoded as JSON objects
+        """
+        record = TweetRecord(id="1", like_count=3, acceptability=0.25)
+
+        assert pickle.loads(pickle.dumps(record)) == record
+        assert copy.deepcopy(record) == record
+        assert encode_json({"attributes": record}) == b'{"attributes":{"id":"1","like_count":3,"acceptability":0.25}}'
+
+
+class TestTweetGraph:
+    """
+    Test class that tests the TweetGraph, the compact store of the tweet trees with the interface of a networkx DiGraph.
+    """
+
+    def test_graph_interface(self):
+        """
+        Tests that the nodes, edges, successors and predecessors of the graph are the ones of the networkx tree
+        """
+        tree, _, _, _ = generate_tweet_tree(300, depth=30)
+        tweet_graph = to_tweet_graph(tree)
+
+        assert list(tweet_graph.nodes) == list(tree.nodes)
+        assert tweet_graph.number_of_nodes() == tree.number_of_nodes()
+        assert set(tweet_graph.edges) == set(tree.edges)
+        assert dict(tweet_graph.nodes(data="attributes")) == dict(tree.nodes(data="attributes"))
+        assert [(tweet_id, list(replies)) for tweet_id, replies in tweet_graph.adjacency()] == \
+               [(tweet_id, list(replies)) for tweet_id, replies in tree.adjacency()]
+        for tweet_id in tree.nodes:
+            assert tweet_graph.nodes[tweet_id] == tree.nodes[tweet_id]
+            assert list(tweet_graph.successors(tweet_id)) == list(tree.successors(tweet_id))
+            assert list(tweet_graph.predecessors(tweet_id)) == list(tree.predecessors(tweet_id))
+            assert tweet_graph.out_degree(tweet_id) == tree.out_degree(tweet_id)
+
+    def test_edge_data(self):
+        """
+        Tests that the data of an edge is the data it was added with, and that adding it again replaces it
+        """
+        tweet_graph = TweetGraph()
+        for tweet_id in ["1", "2", "3"]:
+            tweet_graph.add_node(tweet_id, TweetRecord(id=tweet_id))
+        tweet_graph.add_edge("1", "2", color="g", weight=3)
+        tweet_graph.add_edge("1", "3", color="g", weight=3)
+
+        assert tweet_graph.edges["1", "3"] == {"color": "g", "weight": 3}
+        assert tweet_graph.has_edge("1", "2") and not tweet_graph.has_edge("2", "1")
+
+        tweet_graph.add_edge("1", "3", color="r", weight=3)
+
+        assert tweet_graph.edges["1", "2"]["color"] == "g"
+        assert tweet_graph.edges["1", "3"]["color"] == "r"
+        assert list(tweet_graph.successors("1")) == ["2", "3"]
+
+    def test_remove_nodes_from(self):
+        """
+        Tests that removed tweets are removed from the children of their parent, and their replies left detached
+        """
+        tree, _, _, _ = generate_tweet_tree(20, depth=5)
+        tweet_graph = to_tweet_graph(tree)
+
+        tweet_graph.remove_nodes_from([2, 1000])
+
+        assert 2 not in tweet_graph
+        assert 2 not in list(tweet_graph.successors(1))
+        assert list(tweet_graph.predecessors(3)) == []
+        assert tweet_graph.number_of_nodes() == 19
+        assert set(tweet_graph.edges) == set(tree.edges) - {(1, 2), (2, 3)} - {(2, child) for child in tree[2]}
+
+    def test_argumentation(self):
+        """
+        Tests that both argumentation engines compute the same degrees on the TweetGraph as on the networkx tree
+        """
+        tree, root_id, min_score, max_score = generate_tweet_tree(500, depth=40)
+        tweet_graph = to_tweet_graph(tree)
+
+        for service_class in [ArgumentationAlgorithmService, VectorizedArgumentationService]:
+            degrees = service_class(max_score, min_score, tree, TweetTreeMetrics()).acceptability_degrees(
+                tree.nodes[root_id])
+            graph_degrees = service_class(max_score, min_score, tweet_graph, TweetTreeMetrics()).acceptability_degrees(
+                tweet_graph.nodes[root_id])
+
+            assert graph_degrees == pytest.approx(degrees)
+
+    def test_tweet_tree_json(self):
+        """
+        Tests that the JSON of a tweet tree stored in a TweetGraph is the one of the networkx tree
+        """
+        tree, root_id, _, _ = generate_tweet_tree(300, depth=30)
+        tweet_tree = TweetTree(tree.nodes[root_id]["attributes"], [], TweetTreeMetrics())
+        tweet_tree.set_tree(tree)
+        tweet_tree_json = tweet_tree.get_json()
+
+        tweet_tree.set_tree(to_tweet_graph(tree))
+
+        assert tweet_tree.get_json() == tweet_tree_json
+        assert json.loads(tweet_tree.get_json_bytes()) == tweet_tree_json
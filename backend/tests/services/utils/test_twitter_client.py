@@ -0,0 +1,74 @@
+import requests
+
+from backend.services.twitter_api_service import TwitterAPIService, TwitterResponseParser
+from backend.services.utils.twitter_client import Twarc2Client
+from backend.services.utils.twitter_fixtures import TwitterFixtures
+from backend.benchmarks.twitter_replay_server import ReplayServer
+from backend.benchmarks.synthetic_conversations import generate_fixtures, FIRST_TWEET_ID
+
+
+class TestTwarc2Client:
+    """
+    Test class to test the Twarc2Client, which can be pointed at the local Twitter API replay server and can record
+    the responses it receives.
+    """
+
+    def test_twitter_api_service_against_replay_server(self, mocker):
+        """
+        Tests that the TwitterAPIService fetches a synthetic conversation spanning several pages from the replay
+        server.
+        """
+        mocker.patch.object(TwitterResponseParser.sentiment_analysis_service, "predict_sentiments",
+                            side_effect=lambda texts: ["neutral"] * len(texts))
+        root_id = str(FIRST_TWEET_ID)
+
+        with ReplayServer(generate_fixtures(1, depth=2, breadth=12)) as server:
+            twitter_api_service = TwitterAPIService("fake_token", base_url=server.base_url)
+            tweet = twitter_api_service.get_tweet(root_id)
+            conversation_thread = twitter_api_service.get_conversation_thread(root_id)
+            request_counts = server.get_request_counts()
+
+        assert tweet["id"] == root_id
+
+        # 12 replies to the root and 12 replies to each of them, served in two pages
+        assert len(conversation_thread) == 12 + 12 * 12
+        assert request_counts["search"] == 2
+
+        # Every reply carries the tweet it replies to
+        replies_to_root = [reply for reply in conversation_thread if reply["referenced_tweets"][0]["id"] == root_id]
+        assert len(replies_to_root) == 12
+        assert replies_to_root[0]["referenced_tweets"][0]["text"] == tweet["text"]
+
+    def test_record_and_replay(self, tmp_path):
+        """
+        Tests that the responses recorded by the client are saved to disk and replayed identically.
+        """
+        path = str(tmp_path / "fixtures.json")
+        query = f"conversation_id: {FIRST_TWEET_ID} lang:en"
+
+        with ReplayServer(generate_fixtures(1, depth=1, breadth=3)) as server:
+            recorder = Twarc2Client("fake_token", base_url=server.base_url, fixtures=TwitterFixtures(path=path))
+            lookup_pages = list(recorder.tweet_lookup([str(FIRST_TWEET_ID)]))
+            search_pages = list(recorder.search_recent(query))
+
+        recorded_fixtures = TwitterFixtures.load(path)
+        with ReplayServer(recorded_fixtures) as server:
+            replayer = Twarc2Client("fake_token", base_url=server.base_url)
+            replayed_lookup_pages = list(replayer.tweet_lookup([str(FIRST_TWEET_ID)]))
+            replayed_search_pages = list(replayer.search_recent(query))
+
+        assert recorded_fixtures.get_tweets([str(FIRST_TWEET_ID)]) == lookup_pages[0]["data"]
+        assert replayed_lookup_pages[0]["data"] == lookup_pages[0]["data"]
+        assert [page["data"] for page in replayed_search_pages] == [page["data"] for page in search_pages]
+
+    def test_replay_server_rate_limit(self):
+        """
+        Tests that the replay server reports its quota in the rate limit headers and responds 429 once exhausted.
+        """
+        with ReplayServer(TwitterFixtures(), rate_limit=2) as server:
+            url = f"{server.base_url}/2/tweets/search/recent"
+            responses = [requests.get(url, params={"query": "pizza"}) for _ in range(3)]
+
+        assert [response.status_code for response in responses] == [200, 200, 429]
+        assert [response.headers["x-rate-limit-remaining"] for response in responses] == ["1", "0", "0"]
+        assert responses[0].headers["x-rate-limit-limit"] == "2"
@@ -0,0 +1,35 @@
+from backend.services.utils.twitter_fixtures import TwitterFixtures, DEFAULT_KEYWORD_SEARCH
+
+
+class TestTwitterFixtures:
+    """
+    Test class to test the TwitterFixtures, the recorded Twitter API responses served by the replay server.
+    """
+
+    def test_save_and_load(self, tmp_path):
+        """
+        Tests that recorded tweets and search pages survive a save and load, and that re-recording a search replaces
+        its pages.
+        """
+        path = str(tmp_path / "fixtures.json")
+        fixtures = TwitterFixtures(path=path)
+
+        fixtures.record_tweet_lookup({"data": [{"id": "0", "text": "Pizza"}]})
+        fixtures.record_search_page("pizza", {"data": [{"id": "1"}]}, 0)
+        fixtures.record_search_page("pizza", {"data": [{"id": "2"}]}, 1)
+        fixtures.record_search_page("pizza", {"data": [{"id": "3"}]}, 0)
+
+        loaded_fixtures = TwitterFixtures.load(path)
+
+        assert loaded_fixtures.get_tweets(["0", "5"]) == [{"id": "0", "text": "Pizza"}]
+        assert loaded_fixtures.get_search_pages("pizza") == [{"data": [{"id": "3"}]}]
+
+    def test_default_keyword_search(self):
+        """
+        Tests that keyword searches that were not recorded get the default results, but conversation searches do not.
+        """
+        default_pages = [{"data": [{"id": "0"}]}]
+        fixtures = TwitterFixtures(searches={DEFAULT_KEYWORD_SEARCH: default_pages})
+
+        assert fixtures.get_search_pages("pizza lang:en") == default_pages
+        assert fixtures.get_search_pages("conversation_id: 0 lang:en") == []
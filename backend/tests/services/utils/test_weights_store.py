@@ -0,0 +1,53 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import torch
+from transformers import AutoModel, BertConfig, BertModel
+
+from backend.services.utils.weights_store import is_exported, export_weights, load_model_mmap
+
+
+class TestWeightsStore:
+    """
+    Test class that tests the memory-mapped weights store that lets worker processes share model weights.
+    """
+
+    def test_export_and_load(self, tmp_path):
+        """
+        Tests that a model loaded from the memory-mapped weights store produces the same outputs as the original.
+        """
+        # A tiny randomly initialised model, so the test needs no download
+        config = BertConfig(vocab_size=32, hidden_size=8, num_hidden_layers=1, num_attention_heads=2,
+                            intermediate_size=16, max_position_embeddings=16)
+        model = BertModel(config).eval()
+        model.save_pretrained(tmp_path)
+
+        store_path = tmp_path / "mmap"
+        assert is_exported(store_path) is False
+
+        export_weights(model, store_path)
+        assert is_exported(store_path) is True
+
+        mapped_model = load_model_mmap(AutoModel, tmp_path, store_path)
+
+        tokens = torch.tensor([[1, 5, 7, 2]])
+        with torch.inference_mode():
+            expected_output = model(tokens)["pooler_output"]
+            output = mapped_model(tokens)["pooler_output"]
+
+        assert torch.allclose(output, expected_output)
+
+    def test_concurrent_exports(self, tmp_path):
+        """
+        Tests that workers exporting the same model at the same time do not overwrite each other's temporary files.
+        """
+        config = BertConfig(vocab_size=32, hidden_size=8, num_hidden_layers=1, num_attention_heads=2,
+                            intermediate_size=16, max_position_embeddings=16)
+        model = BertModel(config).eval()
+        model.save_pretrained(tmp_path)
+        store_path = tmp_path / "mmap"
+
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(lambda _: export_weights(model, store_path), range(8)))
+
+        assert sorted(os.listdir(store_path)) == ["weights.bin", "weights.json"]
+        assert load_model_mmap(AutoModel, tmp_path, store_path) is not None
@@ -0,0 +1,27 @@
+// Rebuilds the nested tweet tree from its columns, as returned by the API with format=columns
+export function decodeTweetTreeColumns(columns: TweetTreeColumnsResult): TweetTree {
+  const { tweet_tree: tree } = columns;
+  const nodes: TweetNode[] = tree.ids.map((id, index) => ({
+    name: id,
+    attributes: {
+      id: id,
+      text: tree.texts[index],
+      sentiment: tree.sentiments[index],
+      argumentative_type: tree.argumentative_types[index],
+      // The nested tweet tree leaves out the acceptability of the tweets which are not arguments
+      acceptability: tree.acceptabilities[index] ?? undefined,
+      like_count: tree.like_counts[index],
+      quote_count: tree.quote_counts[index],
+      reply_count: tree.reply_counts[index],
+      retweet_count: tree.retweet_counts[index],
+    },
+    children: [],
+  }));
+
+  // Every tweet comes after its parent, so the children keep the order of the columns
+  tree.parents.forEach((parent, index) => {
+    if (parent >= 0) nodes[parent].children.push(nodes[index]);
+  });
+
+  return { tweet_tree: nodes[0], metrics: columns.metrics };
+}
@@ -1,5 +1,7 @@
 import axios from "axios";
 
+import { decodeTweetTreeColumns } from "./DecodeTweetTree";
+
 import example1 from "../mock_data/example1.json";
 import example2 from "../mock_data/example2.json";
 import example3 from "../mock_data/example3.json";
@@ -23,3 +25,14 @@ export async function fetchTweetsApi(tweetId: string) {
   console.log(tweetsResponse);
   return tweetsResponse;
 }
+
+// Fetches the tweet tree as columns, smaller to send for large conversations, and rebuilds the nested tweet tree
+export async function fetchTweetsColumnsApi(
+  tweetId: string
+): Promise<TweetTreeAPIResponse> {
+  const response = await axios.get<TweetTreeColumnsAPIResponse>(
+    `http://127.0.0.1:80/api/analyze/${tweetId}?format=columns`
+  );
+  const { data: tweetsResponse } = response;
+  return { response: decodeTweetTreeColumns(tweetsResponse.response) };
+}
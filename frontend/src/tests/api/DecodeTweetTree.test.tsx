@@ -0,0 +1,62 @@
+import { decodeTweetTreeColumns } from "../../api/DecodeTweetTree";
+
+const metrics: TweetTreeMetrics = {
+  general_sentiment: "positive",
+  root_tweet_sentiment: "neutral",
+  sentiment_towards_root: "negative",
+  root_tweet_argument_strength: 0.5,
+  strongest_argument_id: "2",
+};
+
+const columns: TweetTreeColumnsResult = {
+  tweet_tree: {
+    ids: ["0", "1", "2"],
+    parents: [-1, 0, 1],
+    texts: ["Root", "Reply", "Reply to the reply"],
+    like_counts: [1, 2, 3],
+    retweet_counts: [0, 1, 0],
+    reply_counts: [1, 1, 0],
+    quote_counts: [0, 0, 0],
+    sentiments: ["neutral", "positive", "negative"],
+    argumentative_types: ["none", "support", "attack"],
+    acceptabilities: [0.5, 0.6, 0.7],
+  },
+  metrics: metrics,
+};
+
+test("decodes the columns into the nested tweet tree", () => {
+  const { tweet_tree: root, metrics: decodedMetrics } =
+    decodeTweetTreeColumns(columns);
+
+  expect(decodedMetrics).toBe(metrics);
+  expect(root.name).toBe("0");
+  expect(root.children).toHaveLength(1);
+  expect(root.children[0].attributes.argumentative_type).toBe("support");
+  expect(root.children[0].children[0].attributes).toEqual({
+    id: "2",
+    text: "Reply to the reply",
+    sentiment: "negative",
+    argumentative_type: "attack",
+    acceptability: 0.7,
+    like_count: 3,
+    quote_count: 0,
+    reply_count: 0,
+    retweet_count: 0,
+  });
+  expect(root.children[0].children[0].children).toEqual([]);
+});
+
+test("leaves the acceptability of the tweets which are not arguments undefined", () => {
+  const { tweet_tree: root } = decodeTweetTreeColumns({
+    tweet_tree: {
+      ...columns.tweet_tree,
+      argumentative_types: ["none", "neutral", "attack"],
+      acceptabilities: [0.5, null, null],
+    },
+    metrics: metrics,
+  });
+
+  expect(root.attributes.acceptability).toBe(0.5);
+  expect(root.children[0].attributes.acceptability).toBeUndefined();
+  expect(root.children[0].children[0].attributes.acceptability).toBeUndefined();
+});
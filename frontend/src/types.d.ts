@@ -14,7 +14,7 @@ type TweetNodeAttributes = {
   text: string;
   sentiment: TweetSentiment;
   argumentative_type: TweetArgumentativeType;
-  acceptability: number;
+  acceptability?: number; // Missing for the tweets which are not arguments
   // public_metrics: TweetPublicMetrics;
   like_count: number;
   quote_count: number;
@@ -44,3 +44,26 @@ type TweetTree = {
 type TweetTreeAPIResponse = {
   response: TweetTree;
 };
+
+// The tweet tree as parallel columns, one value per tweet in each, every tweet after its parent
+type TweetTreeColumns = {
+  ids: string[];
+  parents: number[]; // Index of the parent of each tweet, -1 for the root
+  texts: string[];
+  like_counts: number[];
+  retweet_counts: number[];
+  reply_counts: number[];
+  quote_counts: number[];
+  sentiments: TweetSentiment[];
+  argumentative_types: TweetArgumentativeType[];
+  acceptabilities: (number | null)[]; // null for the tweets which are not arguments
+};
+
+type TweetTreeColumnsResult = {
+  tweet_tree: TweetTreeColumns;
+  metrics: TweetTreeMetrics;
+};
+
+type TweetTreeColumnsAPIResponse = {
+  response: TweetTreeColumnsResult;
+};